@@ -1,14 +1,17 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from .config import settings
+from .http_client import http_client_pool
+from .document_cache import document_cache
 
 celery_app = Celery(
     "pdf_translator",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
     include=[
-        "app.tasks.translation",
-        "app.tasks.ocr",
-        "app.tasks.pdf"
+        "app.tasks.translation_tasks",
+        "app.tasks.ocr_tasks",
+        "app.tasks.pdf_tasks"
     ]
 )
 
@@ -30,4 +33,15 @@ celery_app.conf.task_routes = {
     "app.tasks.translation.*": {"queue": "translation"},
     "app.tasks.ocr.*": {"queue": "ocr"},
     "app.tasks.pdf.*": {"queue": "pdf"}
-} 
\ No newline at end of file
+}
+
+# 工作进程生命周期：fork后丢弃继承的连接和文档句柄并创建常驻事件循环，退出时关闭连接池
+@worker_process_init.connect
+def init_http_client_pool(**kwargs):
+    http_client_pool.reset()
+    http_client_pool.start_worker_loop()
+    document_cache.reset()
+
+@worker_process_shutdown.connect
+def close_http_client_pool(**kwargs):
+    http_client_pool.close()
@@ -0,0 +1,214 @@
+import time
+import redis
+import threading
+from typing import Optional, Dict, Any, List, Set, Tuple
+from .config import settings
+from .redis_client import redis_client as default_redis_client, BackgroundFlusher
+from .logger import translation_logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 累计连续失败次数，达到阈值或半开探测失败时打开断路器
+_FAILURE_SCRIPT = """
+local failures = redis.call("HINCRBY", KEYS[1], "failures", 1)
+local state = redis.call("HGET", KEYS[1], "state")
+if state == "open" or failures >= tonumber(ARGV[1]) then
+    redis.call("HSET", KEYS[1], "state", "open", "opened_at", ARGV[2])
+    redis.call("DEL", KEYS[2])
+    redis.call("PEXPIRE", KEYS[1], ARGV[4])
+    return 1
+end
+redis.call("PEXPIRE", KEYS[1], ARGV[3])
+return 0
+"""
+
+class CircuitBreaker:
+    """按提供商上游地址维护的断路器，状态保存在Redis中供所有工作进程共享
+
+    closed: 正常放行；连续失败达到阈值后打开
+    open: 直接拒绝请求，由调用方立即故障转移
+    half_open: 打开超过冷却时间后只放行一个探测请求，成功则关闭，失败则重新打开
+
+    请求路径读写进程内的记录，后台线程每CIRCUIT_CACHE_TTL秒将成功与失败事件写入Redis并刷新共享记录，
+    其他工作进程打开的断路器最多延迟一个周期生效。只有半开时抢占探测名额需要同步访问Redis。
+    """
+
+    KEY_PREFIX = "circuit:"
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        """初始化断路器"""
+        self.redis_client = redis_client if redis_client is not None else default_redis_client
+        self._failure_script = self.redis_client.register_script(_FAILURE_SCRIPT)
+        # 进程内的断路器记录，Redis不可用时即为唯一状态
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # 待写入Redis的事件：(提供商, 失败时间)，成功时失败时间为None
+        self._events: List[Tuple[str, Optional[float]]] = []
+        self._watched: Set[str] = set()
+        self._lock = threading.Lock()
+        self._flusher = BackgroundFlusher(self.flush, settings.CIRCUIT_CACHE_TTL)
+        self.metrics: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, provider: str, name: str) -> None:
+        """累计断路器事件次数"""
+        counters = self.metrics.setdefault(provider, {"rejected": 0, "opened": 0, "probes": 0})
+        counters[name] += 1
+
+    def _load(self, provider: str) -> Dict[str, Any]:
+        """读取进程内的断路器记录，并登记由后台线程刷新"""
+        with self._lock:
+            self._watched.add(provider)
+            record = dict(self._records.get(provider, {}))
+        self._flusher.start()
+        return record
+
+    def get_state(self, provider: str) -> str:
+        """获取断路器当前状态"""
+        return self._state(self._load(provider))
+
+    @staticmethod
+    def _state(record: Dict[str, Any]) -> str:
+        """由断路器记录计算状态，打开超过冷却时间即为半开"""
+        if record.get("state") != OPEN:
+            return CLOSED
+        if time.time() - record["opened_at"] < settings.CIRCUIT_OPEN_SECONDS:
+            return OPEN
+        return HALF_OPEN
+
+    @staticmethod
+    def _apply_failure(record: Dict[str, Any], failed_at: float) -> bool:
+        """在记录上累计一次失败，返回是否因此打开断路器"""
+        if record.get("state") != OPEN and failed_at - record.get("failed_at", failed_at) > settings.CIRCUIT_FAILURE_WINDOW:
+            record["failures"] = 0
+        record["failures"] = record.get("failures", 0) + 1
+        record["failed_at"] = failed_at
+        if record.get("state") == OPEN or record["failures"] >= settings.CIRCUIT_FAILURE_THRESHOLD:
+            record.update(state=OPEN, opened_at=failed_at, probe_until=0.0)
+            return True
+        return False
+
+    def _acquire_probe(self, provider: str) -> bool:
+        """半开状态下抢占唯一的探测名额，每个进程每个周期最多访问一次Redis"""
+        now = time.time()
+        with self._lock:
+            record = self._records.setdefault(provider, {})
+            if now < record.get("probe_until", 0.0):
+                return False
+            # 先占住进程内名额，其他协程不再重复访问Redis
+            record["probe_until"] = now + settings.CIRCUIT_CACHE_TTL
+        probe_ttl = settings.CIRCUIT_PROBE_TIMEOUT
+        try:
+            acquired = bool(self.redis_client.set(
+                f"{self.KEY_PREFIX}{provider}:probe", 1, nx=True, px=int(probe_ttl * 1000)
+            ))
+        except redis.RedisError:
+            acquired = True
+        if acquired:
+            with self._lock:
+                self._records.setdefault(provider, {})["probe_until"] = now + probe_ttl
+        return acquired
+
+    def allow(self, provider: str) -> bool:
+        """判断是否放行本次请求"""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return True
+        state = self.get_state(provider)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._acquire_probe(provider):
+            self._count(provider, "probes")
+            translation_logger.info(f"{provider}断路器半开，放行探测请求")
+            return True
+        self._count(provider, "rejected")
+        return False
+
+    def record_success(self, provider: str) -> None:
+        """请求成功，关闭断路器并清零失败次数"""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return
+        with self._lock:
+            self._records.pop(provider, None)
+            self._events.append((provider, None))
+        self._flusher.start()
+
+    def record_failure(self, provider: str) -> None:
+        """请求失败（超时、连接错误或上游5xx），达到阈值时打开断路器"""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return
+        now = time.time()
+        with self._lock:
+            opened = self._apply_failure(self._records.setdefault(provider, {}), now)
+            self._events.append((provider, now))
+        self._flusher.start()
+        if opened:
+            self._count(provider, "opened")
+            translation_logger.warning(f"{provider}连续失败，断路器打开{settings.CIRCUIT_OPEN_SECONDS}秒")
+
+    def flush(self) -> None:
+        """将排队的事件写入Redis并刷新共享记录，由后台线程调用"""
+        with self._lock:
+            events, self._events = self._events, []
+            providers = sorted(self._watched | set(self._records))
+        if not events and not providers:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for provider, failed_at in events:
+                keys = [self.KEY_PREFIX + provider, f"{self.KEY_PREFIX}{provider}:probe"]
+                if failed_at is None:
+                    pipe.delete(*keys)
+                else:
+                    self._failure_script(
+                        keys=keys,
+                        args=[
+                            settings.CIRCUIT_FAILURE_THRESHOLD,
+                            failed_at,
+                            int(settings.CIRCUIT_FAILURE_WINDOW * 1000),
+                            int((settings.CIRCUIT_OPEN_SECONDS + settings.CIRCUIT_FAILURE_WINDOW) * 1000)
+                        ],
+                        client=pipe
+                    )
+            for provider in providers:
+                pipe.hgetall(self.KEY_PREFIX + provider)
+            results = pipe.execute()
+        except redis.RedisError as e:
+            # 保留进程内记录继续使用
+            translation_logger.warning(f"同步断路器状态失败: {str(e)}")
+            return
+
+        with self._lock:
+            for provider, raw in zip(providers, results[len(events):]):
+                record = {
+                    "state": raw.get("state", CLOSED),
+                    "failures": int(raw.get("failures", 0)),
+                    "opened_at": float(raw.get("opened_at", 0))
+                } if raw else {}
+                if "probe_until" in self._records.get(provider, {}):
+                    record["probe_until"] = self._records[provider]["probe_until"]
+                # 同步期间新产生的事件尚未写入Redis，在共享记录上重放
+                for queued, failed_at in self._events:
+                    if queued != provider:
+                        continue
+                    if failed_at is None:
+                        record = {}
+                    else:
+                        self._apply_failure(record, failed_at)
+                self._records[provider] = record
+
+    def get_status(self, provider: str) -> Dict[str, Any]:
+        """获取断路器状态与统计"""
+        record = self._load(provider)
+        state = self._state(record)
+        retry_in = 0.0
+        if state == OPEN:
+            retry_in = max(0.0, record["opened_at"] + settings.CIRCUIT_OPEN_SECONDS - time.time())
+        return {
+            "state": state,
+            "failures": record.get("failures", 0),
+            "retry_in": round(retry_in, 2),
+            **self.metrics.get(provider, {"rejected": 0, "opened": 0, "probes": 0})
+        }
+
+# 创建全局断路器实例
+circuit_breaker = CircuitBreaker()
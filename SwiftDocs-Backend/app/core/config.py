@@ -1,7 +1,7 @@
 import os
 import platform
 from pydantic_settings import BaseSettings
-from typing import List, Optional, Union
+from typing import List, Optional, Union, Dict
 
 class Settings(BaseSettings):
     # API配置
@@ -17,7 +17,103 @@ class Settings(BaseSettings):
     BAIDU_APP_ID: Optional[str] = None
     BAIDU_APP_KEY: Optional[str] = None
     GOOGLE_API_KEY: Optional[str] = None
-    
+
+    # 翻译服务HTTP连接池配置
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP2_ENABLED: bool = True
+
+    # 翻译服务提供商上游地址，压测时可指向本地模拟服务（python -m app.mock_providers）
+    OPENAI_BASE_URL: str = "https://api.openai.com"
+    DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
+    BAIDU_BASE_URL: str = "https://api.fanyi.baidu.com"
+    GOOGLE_BASE_URL: str = "https://translation.googleapis.com"
+
+    # 翻译记忆缓存配置
+    TRANSLATION_CACHE_ENABLED: bool = True
+    TRANSLATION_CACHE_LOCAL_SIZE: int = 10000
+    TRANSLATION_CACHE_TTL: int = 30 * 24 * 3600  # 30天
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 1000000
+
+    # 翻译批处理配置
+    TRANSLATION_BATCH_MAX_CHARS: int = 4000
+    TRANSLATION_BATCH_MAX_TOKENS: int = 1500
+    TRANSLATION_BATCH_MAX_SEGMENTS: int = 50
+    # 流式片段翻译时，缓冲区中第一个片段最多等待多久即发出批次（秒）
+    TRANSLATION_STREAM_FLUSH_INTERVAL: float = 0.05
+
+    # 长文档分块翻译配置
+    TRANSLATION_CHUNK_MAX_TOKENS: int = 1500
+    TRANSLATION_MAX_CONCURRENCY: int = 4
+
+    # 翻译服务提供商限速配置（每秒请求数），并发限制按AIMD在上下限之间自适应
+    PROVIDER_RATE_LIMITS: Dict[str, float] = {"openai": 10.0, "deepseek": 10.0, "baidu": 10.0, "google": 20.0}
+    PROVIDER_DEFAULT_RATE_LIMIT: float = 5.0
+    PROVIDER_INITIAL_CONCURRENCY: int = 4
+    PROVIDER_MIN_CONCURRENCY: int = 1
+    PROVIDER_MAX_CONCURRENCY: int = 32
+    PROVIDER_MAX_RETRIES: int = 2
+
+    # 请求合并配置：相同翻译请求在进程内和跨工作进程只调用一次上游
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_LOCK_TTL: float = 60.0
+    SINGLE_FLIGHT_WAIT_TIMEOUT: float = 45.0
+
+    # 翻译路由配置：按请求模式决定是否对冲请求和故障转移
+    TRANSLATION_ROUTING_POLICIES: Dict[str, Dict[str, bool]] = {
+        "selection": {"hedge": True, "failover": True},
+        "full": {"hedge": False, "failover": True}
+    }
+    TRANSLATION_FALLBACK_PROVIDERS: List[str] = ["deepseek", "openai", "google", "baidu"]
+    TRANSLATION_HEDGE_PERCENTILE: float = 0.9
+    TRANSLATION_HEDGE_DEFAULT_DELAY: float = 3.0
+    TRANSLATION_HEDGE_MIN_DELAY: float = 0.3
+
+    # 提供商统计配置：延迟、错误率和吞吐量的EWMA，供provider=auto时选择提供商
+    PROVIDER_STATS_ALPHA: float = 0.2
+    PROVIDER_STATS_TTL: float = 300.0
+    # 后台线程批量写入样本、刷新共享统计的间隔（秒）
+    PROVIDER_STATS_REFRESH_INTERVAL: float = 1.0
+    PROVIDER_STATS_MIN_SAMPLES: int = 5
+    PROVIDER_MAX_ERROR_RATE: float = 0.5
+
+    # 断路器配置：提供商连续失败后快速失败并故障转移
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_FAILURE_WINDOW: float = 60.0
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_PROBE_TIMEOUT: float = 35.0
+    # 进程内断路器状态与Redis同步的间隔（秒）
+    CIRCUIT_CACHE_TTL: float = 1.0
+
+    # 术语表配置：术语与URL、代码、公式等受保护片段在翻译前遮蔽
+    GLOSSARY_DIR: str = "glossaries"
+    TRANSLATION_PROTECT_PATTERNS: bool = True
+
+    # 语言检测配置：跳过纯数字、符号以及已是目标语言的片段
+    LANGUAGE_SKIP_ENABLED: bool = True
+    LANGUAGE_SKIP_MIN_RATIO: float = 0.9
+    LANGUAGE_DETECT_MIN_LETTERS: int = 20
+    LANGUAGE_DETECT_MIN_MARGIN: float = 0.1
+
+    # 模糊翻译记忆配置：MinHash/LSH查找相似的历史翻译
+    FUZZY_MEMORY_ENABLED: bool = True
+    FUZZY_MEMORY_NUM_PERM: int = 64
+    FUZZY_MEMORY_BANDS: int = 16
+    FUZZY_MEMORY_MIN_CHARS: int = 10
+    FUZZY_MEMORY_BUCKET_SAMPLE: int = 20
+    FUZZY_MEMORY_REUSE_THRESHOLD: float = 1.0
+    FUZZY_MEMORY_REFERENCE_THRESHOLD: float = 0.6
+    FUZZY_MEMORY_MAX_REFERENCES: int = 3
+
+    # 文档修订配置：识别新上传的文档是否为旧文档的修订版，复用未改动片段的译文
+    REVISION_TRACKING_ENABLED: bool = True
+    REVISION_SKETCH_SIZE: int = 128
+    REVISION_MIN_SIMILARITY: float = 0.5
+    REVISION_MAX_CANDIDATES: int = 10
+
     # OCR配置 - 根据操作系统自动选择路径
     TESSERACT_CMD: str = ""
     OCR_LANGUAGES: List[str] = ["eng", "chi_sim"]
@@ -26,9 +122,41 @@ class Settings(BaseSettings):
     # PDF处理配置
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
     ALLOWED_EXTENSIONS: List[str] = ["pdf", "png", "jpg", "jpeg"]
+    # 页数不少于PDF_PARALLEL_MIN_PAGES时，文本和布局提取按每片页数拆分为Celery子任务并行处理；
+    # 同一文档最多由PDF_EXTRACT_WORKERS个子任务并行提取（0表示不限），实际并行度受Celery工作进程并发数（--concurrency）限制
+    PDF_EXTRACT_WORKERS: int = 0
+    PDF_EXTRACT_SHARD_PAGES: int = 16
+    PDF_PARALLEL_MIN_PAGES: int = 64
+    # 页面渲染缓存：进程内LRU与按总大小淘汰的磁盘LRU（字节）
+    RENDER_CACHE_ENABLED: bool = True
+    RENDER_CACHE_DIR: str = "cache/render"
+    RENDER_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024  # 64MB
+    RENDER_CACHE_DISK_BYTES: int = 1024 * 1024 * 1024  # 1GB
+    # 瓦片渲染配置：瓦片边长（像素）与最高缩放级别，级别L的缩放倍数为2^L
+    PDF_TILE_SIZE: int = 256
+    PDF_TILE_MAX_LEVEL: int = 4
+    # 有损图像格式（WebP、JPEG）的默认编码质量
+    PDF_IMAGE_QUALITY: int = 80
+    # 空间索引配置：按网格索引页面单词的边界框，用于区域取词和点击测试，磁盘层按总大小（字节）淘汰
+    SPATIAL_INDEX_ENABLED: bool = True
+    SPATIAL_INDEX_DIR: str = "cache/spatial"
+    SPATIAL_INDEX_CELL_SIZE: float = 32.0
+    SPATIAL_INDEX_MEMORY_PAGES: int = 256
+    SPATIAL_INDEX_DISK_BYTES: int = 256 * 1024 * 1024  # 256MB
+    # 全文检索配置：SQLite FTS5索引，中日韩文字按二元词切分
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_INDEX_PATH: str = "cache/search.db"
+    SEARCH_SNIPPET_CHARS: int = 120
+    # 文档句柄池配置：每个进程复用已打开的PDF文档，按数量和文件大小估算的内存淘汰
+    DOCUMENT_CACHE_ENABLED: bool = True
+    DOCUMENT_CACHE_SIZE: int = 16
+    DOCUMENT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB
     
     # 文件存储配置
     UPLOAD_DIR: str = "uploads"
+
+    # 日志配置
+    LOG_DIR: str = "logs"
     
     # Redis配置
     REDIS_HOST: str = "localhost"
@@ -62,3 +190,12 @@ class Settings(BaseSettings):
         os.makedirs(os.path.join(os.getcwd(), self.UPLOAD_DIR), exist_ok=True)
 
 settings = Settings()
+
+# 支持的翻译服务提供商，auto表示按实时统计自动选择
+TRANSLATION_PROVIDERS = ["openai", "deepseek", "baidu", "google", "auto"]
+
+# 支持的目标语言
+TARGET_LANGUAGES = [
+    "zh-CN", "zh-TW", "en-US", "en-GB", "ja-JP", "ko-KR",
+    "fr-FR", "de-DE", "es-ES", "ru-RU", "it-IT", "pt-PT"
+]
@@ -0,0 +1,122 @@
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from .logger import pdf_logger
+
+class DiskLRU:
+    """按总大小淘汰的磁盘LRU目录，以文件修改时间记录最近使用时间，多个工作进程共享同一目录
+
+    每个进程在内存中记录目录中的文件及大小，首次使用时扫描目录，之后只累加本进程的写入。
+    记录的占用超出预算时重新扫描目录，纳入其他进程写入的文件，再按修改时间从旧到新淘汰到低水位，
+    目录总大小最多超出预算各进程在两次扫描之间写入的量（每个进程不超过预算的1 - LOW_WATER）。
+    不是线程安全的，由调用方加锁。
+    """
+
+    # 超出预算时淘汰到预算的这一比例，避免每次写入都重新扫描目录
+    LOW_WATER = 0.9
+
+    def __init__(self, root: Path, max_bytes: int, pattern: str):
+        """初始化目录，pattern为缓存文件相对于root的glob模式"""
+        self.root = root
+        self.max_bytes = max_bytes
+        self.pattern = pattern
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._used = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        """以纳秒精度的当前时间更新修改时间，文件系统时间戳粒度较粗时也能区分先后"""
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def _key(self, path: Path) -> str:
+        """文件相对于根目录的路径"""
+        return path.relative_to(self.root).as_posix()
+
+    def _scan(self) -> "OrderedDict[str, int]":
+        """扫描目录，按修改时间从旧到新重建记录"""
+        entries = []
+        if self.root.is_dir():
+            for path in self.root.glob(self.pattern):
+                if path.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    # 文件可能刚被其他进程淘汰
+                    continue
+                if path.is_file():
+                    entries.append((stat.st_mtime_ns, self._key(path), stat.st_size))
+        entries.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in entries)
+        self._used = sum(size for _, _, size in entries)
+        return self._entries
+
+    def entries(self) -> "OrderedDict[str, int]":
+        """获取文件记录，首次使用时扫描目录"""
+        return self._entries if self._entries is not None else self._scan()
+
+    @property
+    def used(self) -> int:
+        """目录中已记录文件的总大小"""
+        self.entries()
+        return self._used
+
+    def _record(self, key: str, size: Optional[int]) -> None:
+        """更新一个文件的记录并移到最近使用的一端，size为None表示文件已不存在"""
+        entries = self.entries()
+        if key in entries:
+            self._used -= entries.pop(key)
+        if size is not None:
+            entries[key] = size
+            self._used += size
+
+    def read(self, path: Path) -> Optional[bytes]:
+        """读取文件并更新修改时间，文件不存在时返回None"""
+        key = self._key(path)
+        try:
+            data = path.read_bytes()
+            self._touch(path)
+        except OSError:
+            self._record(key, None)
+            return None
+        self._record(key, len(data))
+        return data
+
+    def write(self, path: Path, data: bytes) -> bool:
+        """先写临时文件再替换，其他进程不会读到写了一半的文件；超出预算时淘汰最久未使用的文件"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temp_path.write_bytes(data)
+            self._touch(temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            pdf_logger.warning(f"写入磁盘缓存失败: {str(e)}")
+            return False
+        self._record(self._key(path), len(data))
+        if self._used > self.max_bytes:
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """重新扫描目录，按修改时间淘汰到低水位"""
+        entries = self._scan()
+        target = self.max_bytes * self.LOW_WATER
+        while self._used > target and entries:
+            key, size = entries.popitem(last=False)
+            self._used -= size
+            path = self.root / key
+            path.unlink(missing_ok=True)
+            self.evictions += 1
+            # 删除淘汰后留下的空目录
+            parent = path.parent
+            while parent != self.root:
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+                parent = parent.parent
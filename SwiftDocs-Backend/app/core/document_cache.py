@@ -0,0 +1,102 @@
+import os
+import fitz
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Tuple, Iterator
+from .config import settings
+
+# 文档键：(绝对路径, 修改时间, 文件大小)，文件被替换后旧句柄自然失效
+DocumentKey = Tuple[str, int, int]
+
+class DocumentCache:
+    """已打开的fitz文档句柄池，按路径和修改时间复用，避免重复打开和解析xref表
+
+    句柄使用期间由调用方独占，归还后进入空闲LRU；同一文档被并发使用时各自打开句柄，
+    互不阻塞。空闲句柄数量和按文件大小估算的内存占用超出上限时关闭最久未使用的句柄。
+    """
+
+    def __init__(self, max_documents: Optional[int] = None, max_bytes: Optional[int] = None):
+        """初始化句柄池"""
+        self.max_documents = max_documents if max_documents is not None else settings.DOCUMENT_CACHE_SIZE
+        self.max_bytes = max_bytes if max_bytes is not None else settings.DOCUMENT_CACHE_MAX_BYTES
+        # 空闲句柄：id(doc) -> (文档键, 文档, 估算字节数)，按最近归还排序
+        self._idle: "OrderedDict[int, Tuple[DocumentKey, fitz.Document, int]]" = OrderedDict()
+        self._idle_bytes = 0
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(file_path: str) -> Tuple[DocumentKey, int]:
+        """计算文档键与估算的内存占用"""
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size), stat.st_size
+
+    def _take(self, key: DocumentKey) -> Optional[fitz.Document]:
+        """取出最近归还的同一文档的空闲句柄"""
+        with self._lock:
+            for handle_id in reversed(self._idle):
+                entry_key, doc, size = self._idle[handle_id]
+                if entry_key == key:
+                    del self._idle[handle_id]
+                    self._idle_bytes -= size
+                    return doc
+        return None
+
+    def _release(self, key: DocumentKey, doc: fitz.Document, size: int) -> None:
+        """归还句柄，关闭同一路径的过期句柄，超出上限时淘汰最久未使用的句柄"""
+        if doc.is_closed:
+            return
+        evicted = []
+        with self._lock:
+            for handle_id, (entry_key, entry_doc, entry_size) in list(self._idle.items()):
+                if entry_key[0] == key[0] and entry_key != key:
+                    del self._idle[handle_id]
+                    self._idle_bytes -= entry_size
+                    evicted.append(entry_doc)
+            self._idle[id(doc)] = (key, doc, size)
+            self._idle_bytes += size
+            while self._idle and (len(self._idle) > self.max_documents or self._idle_bytes > self.max_bytes):
+                _, (_, entry_doc, entry_size) = self._idle.popitem(last=False)
+                self._idle_bytes -= entry_size
+                evicted.append(entry_doc)
+            self.metrics["evictions"] += len(evicted)
+        # 在锁外关闭文档，避免阻塞其他线程
+        for entry_doc in evicted:
+            entry_doc.close()
+
+    @contextmanager
+    def open(self, file_path: str) -> Iterator[fitz.Document]:
+        """获取文档句柄，使用结束后归还到句柄池"""
+        key, size = self._key(file_path)
+        doc = self._take(key)
+        if doc is None:
+            doc = fitz.open(file_path)
+            self.metrics["misses"] += 1
+        else:
+            self.metrics["hits"] += 1
+        try:
+            yield doc
+        finally:
+            self._release(key, doc, size)
+
+    def clear(self) -> None:
+        """关闭所有空闲句柄"""
+        with self._lock:
+            docs = [doc for _, doc, _ in self._idle.values()]
+            self.reset()
+        for doc in docs:
+            doc.close()
+
+    def reset(self) -> None:
+        """丢弃所有句柄引用，用于进程fork之后"""
+        self._idle.clear()
+        self._idle_bytes = 0
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取句柄复用统计与空闲句柄占用"""
+        with self._lock:
+            return {**self.metrics, "idle_documents": len(self._idle), "idle_bytes": self._idle_bytes}
+
+# 创建全局文档句柄池实例
+document_cache = DocumentCache()
@@ -44,6 +44,31 @@ class APIError(BaseError):
         self.status_code = status.HTTP_502_BAD_GATEWAY
         self.details = details or {}
 
+class ProviderError(APIError):
+    """翻译服务提供商返回的错误"""
+    def __init__(
+        self,
+        message: str,
+        provider: str,
+        upstream_status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        details: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(message, details)
+        self.provider = provider
+        self.upstream_status = upstream_status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """是否为限流或上游过载导致的可重试错误"""
+        return self.upstream_status is not None and (self.upstream_status == 429 or self.upstream_status >= 500)
+
+class CircuitOpenError(ProviderError):
+    """断路器打开，提供商请求被直接拒绝"""
+    def __init__(self, provider: str, retry_in: Optional[float] = None):
+        super().__init__(f"{provider}暂时不可用，断路器已打开", provider, details={"retry_in": retry_in})
+
 class TaskError(BaseError):
     """任务处理错误"""
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
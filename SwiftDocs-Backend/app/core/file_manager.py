@@ -1,4 +1,5 @@
 import os
+import re
 import shutil
 from typing import Optional, List, Tuple
 from datetime import datetime
@@ -38,6 +39,13 @@ class FileManager:
             
         return str(file_path), filename
         
+    def get_upload_path(self, file_id: str, extension: str = ".pdf") -> Optional[str]:
+        """根据文件ID获取已上传文件的路径，ID不合法或文件不存在时返回None"""
+        if not re.fullmatch(r"[\w-]+", file_id):
+            return None
+        file_path = self.upload_dir / f"{file_id}{extension}"
+        return str(file_path) if file_path.is_file() else None
+        
     def delete_file(self, file_path: str) -> bool:
         """删除文件"""
         try:
@@ -0,0 +1,225 @@
+import zlib
+import hashlib
+import redis
+import numpy as np
+from typing import Optional, Dict, List, Tuple, NamedTuple, Set
+from .config import settings
+from .redis_client import redis_client as default_redis_client
+from .segment_dedup import normalize_segment, shape_key, adapt_translation
+from .logger import translation_logger
+
+# MinHash使用的梅森素数以上的素数，哈希值限制在32位
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+class FuzzyCandidate(NamedTuple):
+    """模糊匹配到的历史翻译"""
+    source: str
+    translation: str
+    similarity: float
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """将文本拆成字符n元组，数字统一替换为占位符，仅数字不同的片段特征相同"""
+    text = shape_key(normalize_segment(text)).lower()
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """计算两个集合的Jaccard相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class FuzzyMemory:
+    """模糊翻译记忆：以字符n元组的MinHash签名建立LSH索引，查找相似的历史翻译
+
+    签名按band分段，每段的哈希作为Redis集合的键，查询时只比较落入相同桶的候选，
+    查询代价与已存储的片段数量无关。
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, num_perm: Optional[int] = None, bands: Optional[int] = None):
+        """初始化MinHash参数"""
+        self.redis_client = redis_client if redis_client is not None else default_redis_client
+        self.num_perm = num_perm if num_perm is not None else settings.FUZZY_MEMORY_NUM_PERM
+        self.bands = bands if bands is not None else settings.FUZZY_MEMORY_BANDS
+        self.rows = self.num_perm // self.bands
+        # 固定种子，保证所有工作进程的签名一致
+        generator = np.random.RandomState(1)
+        self._a = generator.randint(1, 2 ** 32 - 1, size=self.num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 2 ** 32 - 1, size=self.num_perm, dtype=np.uint64)
+        self.metrics = {"lookups": 0, "candidates": 0, "reused": 0, "referenced": 0, "stored": 0}
+
+    def signature(self, grams: Set[str]) -> np.ndarray:
+        """计算MinHash签名"""
+        hashes = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, namespace: str, signature: np.ndarray) -> List[str]:
+        """计算各band的桶键"""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            keys.append(f"{namespace}:b{band}:{hashlib.blake2b(chunk, digest_size=8).hexdigest()}")
+        return keys
+
+    @staticmethod
+    def _namespace(source_lang: str, target_lang: str, provider: str, model: str, glossary: Optional[str]) -> str:
+        """按提供商、模型、语言对和术语表划分索引，与翻译缓存键一致，不会复用其他提供商或模型的译文"""
+        return f"fm:{provider}:{model}:{source_lang}:{target_lang}:{glossary or ''}"
+
+    @staticmethod
+    def _entry_id(text: str) -> str:
+        """片段的条目ID"""
+        return hashlib.sha256(normalize_segment(text).encode("utf-8")).hexdigest()[:16]
+
+    def _indexable(self, text: str) -> bool:
+        """过短的片段相似度没有意义，不建立索引"""
+        return settings.FUZZY_MEMORY_ENABLED and len(normalize_segment(text)) >= settings.FUZZY_MEMORY_MIN_CHARS
+
+    def lookup_many(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        provider: str,
+        model: str,
+        glossary: Optional[str] = None
+    ) -> List[List[FuzzyCandidate]]:
+        """批量查找相似的历史翻译，按相似度从高到低返回，两次Redis往返完成"""
+        results: List[List[FuzzyCandidate]] = [[] for _ in texts]
+        queries = [(index, shingles(text)) for index, text in enumerate(texts) if self._indexable(text)]
+        if not queries:
+            return results
+        namespace = self._namespace(source_lang, target_lang, provider, model, glossary)
+        sample = settings.FUZZY_MEMORY_BUCKET_SAMPLE
+        try:
+            # 每个桶最多抽取固定数量的成员，热门桶不会拖慢查询
+            pipe = self.redis_client.pipeline(transaction=False)
+            for _, grams in queries:
+                for key in self._band_keys(namespace, self.signature(grams)):
+                    pipe.srandmember(key, sample)
+            members = pipe.execute()
+
+            candidate_ids: List[Set[str]] = []
+            for position in range(len(queries)):
+                ids: Set[str] = set()
+                for bucket in members[position * self.bands:(position + 1) * self.bands]:
+                    ids.update(bucket or [])
+                candidate_ids.append(ids)
+            unique_ids = sorted(set().union(*candidate_ids))
+            if not unique_ids:
+                self.metrics["lookups"] += len(queries)
+                return results
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            for entry_id in unique_ids:
+                pipe.hmget(f"{namespace}:e:{entry_id}", "source", "translation")
+            entries = {
+                entry_id: (source, translation)
+                for entry_id, (source, translation) in zip(unique_ids, pipe.execute())
+                if source is not None and translation is not None
+            }
+        except redis.RedisError as e:
+            translation_logger.warning(f"查询模糊翻译记忆失败: {str(e)}")
+            return results
+
+        self.metrics["lookups"] += len(queries)
+        for (index, grams), ids in zip(queries, candidate_ids):
+            candidates = [
+                FuzzyCandidate(source, translation, jaccard(grams, shingles(source)))
+                for source, translation in (entries[entry_id] for entry_id in ids if entry_id in entries)
+            ]
+            candidates = [candidate for candidate in candidates if candidate.similarity >= settings.FUZZY_MEMORY_REFERENCE_THRESHOLD]
+            candidates.sort(key=lambda candidate: candidate.similarity, reverse=True)
+            results[index] = candidates[:settings.FUZZY_MEMORY_MAX_REFERENCES]
+            self.metrics["candidates"] += len(results[index])
+        return results
+
+    def lookup(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        provider: str,
+        model: str,
+        glossary: Optional[str] = None
+    ) -> List[FuzzyCandidate]:
+        """查找单个片段的相似历史翻译"""
+        return self.lookup_many([text], source_lang, target_lang, provider, model, glossary)[0]
+
+    def reuse(self, text: str, candidates: List[FuzzyCandidate]) -> Optional[str]:
+        """相似度达到复用阈值时直接套用历史译文，数字按顺序替换为当前片段的数字
+
+        默认阈值为1.0，只复用仅数字不同的片段。
+        """
+        normalized = normalize_segment(text)
+        for candidate in candidates:
+            if candidate.similarity < settings.FUZZY_MEMORY_REUSE_THRESHOLD:
+                break
+            if settings.FUZZY_MEMORY_REUSE_THRESHOLD >= 1.0 and shape_key(candidate.source) != shape_key(normalized):
+                continue
+            translation = adapt_translation(normalized, candidate.source, candidate.translation)
+            if translation is not None:
+                self.metrics["reused"] += 1
+                return translation
+        return None
+
+    def add_many(
+        self,
+        pairs: List[Tuple[str, str]],
+        source_lang: str,
+        target_lang: str,
+        provider: str,
+        model: str,
+        glossary: Optional[str] = None
+    ) -> None:
+        """写入新的翻译并建立索引"""
+        pairs = [(source, translation) for source, translation in pairs if self._indexable(source) and translation]
+        if not pairs:
+            return
+        namespace = self._namespace(source_lang, target_lang, provider, model, glossary)
+        ttl = settings.TRANSLATION_CACHE_TTL
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for source, translation in pairs:
+                entry_id = self._entry_id(source)
+                entry_key = f"{namespace}:e:{entry_id}"
+                pipe.hset(entry_key, mapping={"source": normalize_segment(source), "translation": translation})
+                pipe.expire(entry_key, ttl)
+                for key in self._band_keys(namespace, self.signature(shingles(source))):
+                    pipe.sadd(key, entry_id)
+                    pipe.expire(key, ttl)
+            pipe.execute()
+            self.metrics["stored"] += len(pairs)
+        except redis.RedisError as e:
+            translation_logger.warning(f"写入模糊翻译记忆失败: {str(e)}")
+
+    def add(
+        self,
+        source: str,
+        translation: str,
+        source_lang: str,
+        target_lang: str,
+        provider: str,
+        model: str,
+        glossary: Optional[str] = None
+    ) -> None:
+        """写入单条翻译"""
+        self.add_many([(source, translation)], source_lang, target_lang, provider, model, glossary)
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取模糊翻译记忆统计"""
+        return dict(self.metrics)
+
+def build_reference_prompt(candidates: List[FuzzyCandidate]) -> str:
+    """将相似的历史翻译整理为提示词中的参考译文"""
+    lines = ["以下是相似原文的已有译文，请参考其术语和句式，保持一致："]
+    for candidate in candidates:
+        lines.append(f"原文: {candidate.source}")
+        lines.append(f"译文: {candidate.translation}")
+    return "\n".join(lines)
+
+# 创建全局模糊翻译记忆实例
+fuzzy_memory = FuzzyMemory()
@@ -0,0 +1,237 @@
+import os
+import re
+import json
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Union
+from .config import settings
+from .logger import translation_logger
+
+# 占位符使用数学方括号，各提供商通常原样保留
+PLACEHOLDER = "⟦{index}⟧"
+_PLACEHOLDER_RE = re.compile(r"⟦\s*(\d+)\s*⟧")
+
+# 不应翻译的片段：URL、邮箱、行内代码、行内公式与LaTeX命令
+# 公式按TeX约定：开头$后和结尾$前不能是空白，结尾$后不能紧跟数字，避免把两个金额之间的正文当作公式
+# LaTeX命令前不能是字母数字、冒号、点、斜杠或反斜杠，避免匹配C:\Users\foo之类的Windows路径
+_PROTECTED_RE = re.compile(
+    r"https?://[^\s<>\"']+"
+    r"|[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+    r"|`[^`\n]+`"
+    r"|\$[^\s$][^$\n]*?(?<=\S)\$(?!\d)"
+    r"|(?<![\w:./\\])\\[a-zA-Z]+(?:\{[^{}\n]*\})*"
+)
+
+_GLOSSARY_NAME_RE = re.compile(r"^[\w.-]+$")
+
+def _is_word_char(char: str) -> bool:
+    """判断是否为需要检查词边界的字符（ASCII字母数字）"""
+    return char.isascii() and (char.isalnum() or char == "_")
+
+class AhoCorasick:
+    """Aho–Corasick多模式匹配自动机，一次扫描找出所有术语的出现位置"""
+
+    def __init__(self, patterns: List[str]):
+        """构建自动机：字典树、失败指针和输出表"""
+        self.lengths = [len(pattern) for pattern in patterns]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(index)
+
+        # 按层序计算失败指针，并合并失败链上的输出
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, int]]:
+        """返回所有匹配的(起始位置, 结束位置, 模式下标)"""
+        matches: List[Tuple[int, int, int]] = []
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self.lengths
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in output[node]:
+                matches.append((position + 1 - lengths[index], position + 1, index))
+        return matches
+
+class Glossary:
+    """术语表与不翻译保护：翻译前将术语和受保护片段替换为占位符，翻译后还原
+
+    术语的译文按(术语, 目标语言)保存：terms中的值为字符串时适用于所有目标语言，
+    为{"zh-CN": "..."}时只在对应目标语言（或其主语言，如zh）下替换，没有对应译文的术语照常翻译。
+    译文为None的术语（以及protected列表）在所有语言下原样保留。
+    """
+
+    def __init__(
+        self,
+        terms: Optional[Dict[str, Union[None, str, Dict[str, str]]]] = None,
+        protected: Optional[List[str]] = None,
+        case_sensitive: bool = False,
+        protect_patterns: bool = True
+    ):
+        """编译术语表"""
+        entries = dict(terms or {})
+        for term in protected or []:
+            entries.setdefault(term, None)
+        self.case_sensitive = case_sensitive
+        self.protect_patterns = protect_patterns
+        self._terms = list(entries.keys())
+        self._protected = {term for term, target in entries.items() if target is None}
+        # (术语, 目标语言) -> 译文，目标语言为None表示适用于所有语言
+        self._targets: Dict[Tuple[str, Optional[str]], str] = {}
+        for term, target in entries.items():
+            if isinstance(target, str):
+                self._targets[(term, None)] = target
+            elif isinstance(target, dict):
+                for lang, text in target.items():
+                    self._targets[(term, lang)] = text
+        patterns = self._terms if case_sensitive else [term.lower() for term in self._terms]
+        self._matcher = AhoCorasick(patterns) if patterns else None
+
+    def __len__(self) -> int:
+        """术语数量"""
+        return len(self._terms)
+
+    def _resolve(self, term: str, target_lang: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """术语在目标语言下的处理：(是否遮蔽, 还原译文)，译文为None表示原样保留"""
+        if term in self._protected:
+            return True, None
+        langs = [target_lang, target_lang.split("-")[0]] if target_lang else []
+        for lang in langs + [None]:
+            target = self._targets.get((term, lang))
+            if target is not None:
+                return True, target
+        return False, None
+
+    def _find_spans(self, text: str, target_lang: Optional[str] = None) -> List[Tuple[int, int, Optional[str]]]:
+        """找出需要保护的片段，返回(起始位置, 结束位置, 还原文本)，重叠时取最靠前且最长者"""
+        candidates: List[Tuple[int, int, Optional[str]]] = []
+        if self.protect_patterns:
+            candidates.extend((match.start(), match.end(), None) for match in _PROTECTED_RE.finditer(text))
+
+        if self._matcher is not None:
+            haystack = text
+            if not self.case_sensitive:
+                lowered = text.lower()
+                # 个别字符小写后长度改变时退回区分大小写匹配，保证位置对应
+                haystack = lowered if len(lowered) == len(text) else text
+            for start, end, index in self._matcher.find_all(haystack):
+                term = self._terms[index]
+                # 英文术语要求完整单词，避免匹配到其他单词内部
+                if _is_word_char(term[0]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(term[-1]) and end < len(text) and _is_word_char(text[end]):
+                    continue
+                masked, target = self._resolve(term, target_lang)
+                if masked:
+                    candidates.append((start, end, target))
+
+        candidates.sort(key=lambda span: (span[0], span[0] - span[1]))
+        spans: List[Tuple[int, int, Optional[str]]] = []
+        last_end = 0
+        for start, end, target in candidates:
+            if start >= last_end:
+                spans.append((start, end, target))
+                last_end = end
+        return spans
+
+    def mask(self, text: str, target_lang: Optional[str] = None) -> Tuple[str, List[str]]:
+        """将术语和受保护片段替换为占位符，返回遮蔽后的文本和各占位符的还原文本
+
+        target_lang决定术语还原为哪种语言的译文，未指定时只使用适用于所有语言的译文。
+        """
+        spans = self._find_spans(text, target_lang)
+        if not spans:
+            return text, []
+        parts: List[str] = []
+        replacements: List[str] = []
+        position = 0
+        for start, end, target in spans:
+            parts.append(text[position:start])
+            parts.append(PLACEHOLDER.format(index=len(replacements)))
+            replacements.append(text[start:end] if target is None else target)
+            position = end
+        parts.append(text[position:])
+        return "".join(parts), replacements
+
+    @staticmethod
+    def restore(text: str, replacements: List[str]) -> str:
+        """将译文中的占位符还原，一次扫描完成"""
+        if not replacements:
+            return text
+
+        def replace(match: re.Match) -> str:
+            index = int(match.group(1))
+            return replacements[index] if index < len(replacements) else match.group(0)
+
+        restored, count = _PLACEHOLDER_RE.subn(replace, text)
+        if count < len(replacements):
+            translation_logger.warning(f"译文中缺少{len(replacements) - count}个占位符")
+        return restored
+
+class GlossaryRegistry:
+    """从GLOSSARY_DIR加载JSON术语表并缓存编译结果，文件修改后自动重新编译
+
+    文件格式: {"terms": {"原文": "译文", "术语": {"zh-CN": "中文译文", "ja": "日文译文"}},
+              "protected": ["不翻译的词"], "case_sensitive": false}
+    """
+
+    def __init__(self, glossary_dir: Optional[str] = None):
+        """初始化术语表注册表"""
+        self.glossary_dir = glossary_dir if glossary_dir is not None else settings.GLOSSARY_DIR
+        self._glossaries: Dict[str, Tuple[float, Glossary]] = {}
+        self.default = Glossary(protect_patterns=settings.TRANSLATION_PROTECT_PATTERNS)
+
+    def get(self, name: Optional[str] = None) -> Glossary:
+        """获取术语表，未指定名称时只做URL、代码、公式等模式保护"""
+        if not name:
+            return self.default
+        if not _GLOSSARY_NAME_RE.match(name):
+            raise ValueError(f"无效的术语表名称: {name}")
+        path = os.path.join(self.glossary_dir, f"{name}.json")
+        if not os.path.exists(path):
+            raise ValueError(f"术语表不存在: {name}")
+
+        mtime = os.path.getmtime(path)
+        cached = self._glossaries.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, "r", encoding="utf-8") as f:
+            data: Dict[str, Any] = json.load(f)
+        glossary = Glossary(
+            terms=data.get("terms"),
+            protected=data.get("protected"),
+            case_sensitive=bool(data.get("case_sensitive", False)),
+            protect_patterns=settings.TRANSLATION_PROTECT_PATTERNS
+        )
+        self._glossaries[name] = (mtime, glossary)
+        translation_logger.info(f"已加载术语表{name}: {len(glossary)}条")
+        return glossary
+
+# 创建全局术语表注册表实例
+glossary_registry = GlossaryRegistry()
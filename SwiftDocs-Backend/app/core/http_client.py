@@ -0,0 +1,148 @@
+import asyncio
+import httpx
+from typing import Optional, Dict, Any, List, Awaitable, TypeVar
+from .config import settings
+from .logger import translation_logger
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 各翻译服务提供商的上游地址，以及上游是否支持HTTP/2
+PROVIDER_ENDPOINTS: Dict[str, Dict[str, Any]] = {
+    "openai": {"base_url": settings.OPENAI_BASE_URL, "http2": True},
+    "deepseek": {"base_url": settings.DEEPSEEK_BASE_URL, "http2": True},
+    "baidu": {"base_url": settings.BAIDU_BASE_URL, "http2": False},
+    "google": {"base_url": settings.GOOGLE_BASE_URL, "http2": True},
+}
+
+T = TypeVar("T")
+
+class HTTPClientPool:
+    """HTTP客户端池，为每个翻译服务提供商维护一个长连接的AsyncClient
+
+    httpx的连接绑定创建它的事件循环。Web进程只有一个事件循环；Celery工作进程通过run()
+    在常驻的工作循环中执行任务，连接在任务之间复用。其他临时事件循环（例如asyncio.run）
+    中创建的客户端在该循环结束时由守护任务关闭，不会泄漏连接。
+    """
+
+    def __init__(self):
+        """初始化客户端池"""
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        # 记录每个客户端所属的事件循环，httpx的连接不能跨事件循环复用
+        self._loops: Dict[str, asyncio.AbstractEventLoop] = {}
+        # 各事件循环中创建的客户端及负责在循环结束时关闭它们的守护任务
+        self._owned: Dict[asyncio.AbstractEventLoop, List[httpx.AsyncClient]] = {}
+        self._watchers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self._worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        """创建指定提供商的客户端"""
+        endpoint = PROVIDER_ENDPOINTS[provider]
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        return httpx.AsyncClient(
+            base_url=endpoint["base_url"],
+            http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE and endpoint["http2"],
+            limits=limits,
+            timeout=httpx.Timeout(30.0, connect=settings.HTTP_CONNECT_TIMEOUT)
+        )
+
+    def get_client(self, provider: str) -> httpx.AsyncClient:
+        """获取指定提供商的客户端，必须在事件循环中调用"""
+        if provider not in PROVIDER_ENDPOINTS:
+            raise ValueError(f"不支持的翻译提供商: {provider}")
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(provider)
+        if client is None or client.is_closed or self._loops.get(provider) is not loop:
+            if client is not None and not client.is_closed:
+                self._close_stale(self._loops[provider], client)
+            client = self._create_client(provider)
+            self._clients[provider] = client
+            self._loops[provider] = loop
+            self._owned.setdefault(loop, []).append(client)
+            if loop not in self._watchers:
+                self._watchers[loop] = loop.create_task(self._close_on_shutdown(loop))
+        return client
+
+    def _close_stale(self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+        """事件循环变化时关闭旧循环的客户端，连接只能在其所属的循环中关闭"""
+        if loop.is_running():
+            # 旧循环在其他线程中运行
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        elif loop.is_closed():
+            # 循环结束时守护任务会关闭客户端，未关闭说明循环退出时没有取消任务
+            translation_logger.warning("事件循环已关闭，无法关闭其中的HTTP客户端")
+            self._owned.pop(loop, None)
+        # 旧循环仍可运行时，由其结束时的守护任务关闭
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop) -> None:
+        """守护任务：asyncio.run等在结束时取消所有任务，此时在本循环内关闭其客户端"""
+        try:
+            await loop.create_future()
+        except asyncio.CancelledError:
+            for client in self._owned.pop(loop, []):
+                if not client.is_closed:
+                    await client.aclose()
+            raise
+        finally:
+            self._watchers.pop(loop, None)
+
+    def run(self, coro: Awaitable[T]) -> T:
+        """在工作进程的常驻事件循环中运行协程，供Celery任务使用，连接在任务之间复用"""
+        if self._worker_loop is None or self._worker_loop.is_closed():
+            self.start_worker_loop()
+        return self._worker_loop.run_until_complete(coro)
+
+    def start_worker_loop(self) -> None:
+        """创建工作进程的常驻事件循环，在Celery工作进程初始化时调用"""
+        self._worker_loop = asyncio.new_event_loop()
+
+    async def start(self) -> None:
+        """预先创建所有提供商的客户端"""
+        for provider in PROVIDER_ENDPOINTS:
+            self.get_client(provider)
+        translation_logger.info(f"HTTP客户端池已启动 (HTTP/2: {settings.HTTP2_ENABLED and HTTP2_AVAILABLE})")
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环中的所有客户端"""
+        loop = asyncio.get_running_loop()
+        for client in self._owned.pop(loop, []):
+            if not client.is_closed:
+                await client.aclose()
+        watcher = self._watchers.pop(loop, None)
+        if watcher is not None:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+        for provider in [provider for provider, owner in self._loops.items() if owner is loop]:
+            del self._clients[provider]
+            del self._loops[provider]
+
+    def close(self) -> None:
+        """在事件循环之外关闭客户端，用于Celery工作进程退出"""
+        for loop in list(self._owned):
+            if not loop.is_closed() and not loop.is_running():
+                try:
+                    loop.run_until_complete(self.aclose())
+                except Exception as e:
+                    translation_logger.warning(f"关闭HTTP客户端失败: {str(e)}")
+        if self._worker_loop is not None and not self._worker_loop.is_closed():
+            self._worker_loop.close()
+        self.reset()
+
+    def reset(self) -> None:
+        """丢弃所有客户端引用，用于进程fork之后"""
+        self._clients.clear()
+        self._loops.clear()
+        self._owned.clear()
+        self._watchers.clear()
+        self._worker_loop = None
+
+# 创建全局HTTP客户端池实例
+http_client_pool = HTTPClientPool()
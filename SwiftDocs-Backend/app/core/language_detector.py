@@ -0,0 +1,166 @@
+import re
+import math
+import unicodedata
+from collections import Counter
+from typing import Optional, Dict, List, Tuple
+from .config import settings
+
+# 拉丁字母语言的样本文本，用于构建字符三元组特征
+_LATIN_SAMPLES: Dict[str, str] = {
+    "en": (
+        "The results of the study show that the new method is more efficient than the previous one. "
+        "This document describes how the system works and what you should do when something goes wrong. "
+        "We would like to thank all of the people who have contributed to this report and their support. "
+        "It is important to note that these findings are based on the data which was collected last year."
+    ),
+    "fr": (
+        "Les résultats de l'étude montrent que la nouvelle méthode est plus efficace que la précédente. "
+        "Ce document décrit le fonctionnement du système et ce que vous devez faire en cas de problème. "
+        "Nous tenons à remercier toutes les personnes qui ont contribué à ce rapport pour leur soutien. "
+        "Il est important de noter que ces conclusions sont fondées sur les données recueillies l'année dernière."
+    ),
+    "de": (
+        "Die Ergebnisse der Studie zeigen, dass die neue Methode effizienter ist als die vorherige. "
+        "Dieses Dokument beschreibt, wie das System funktioniert und was Sie tun sollten, wenn etwas schiefgeht. "
+        "Wir möchten uns bei allen Personen bedanken, die zu diesem Bericht beigetragen haben. "
+        "Es ist wichtig zu beachten, dass diese Ergebnisse auf den Daten beruhen, die im letzten Jahr erhoben wurden."
+    ),
+    "es": (
+        "Los resultados del estudio muestran que el nuevo método es más eficiente que el anterior. "
+        "Este documento describe cómo funciona el sistema y lo que usted debe hacer cuando algo sale mal. "
+        "Queremos agradecer a todas las personas que han contribuido a este informe por su apoyo. "
+        "Es importante señalar que estos resultados se basan en los datos que se recogieron el año pasado."
+    ),
+    "it": (
+        "I risultati dello studio mostrano che il nuovo metodo è più efficiente del precedente. "
+        "Questo documento descrive come funziona il sistema e cosa si deve fare quando qualcosa va storto. "
+        "Vogliamo ringraziare tutte le persone che hanno contribuito a questo rapporto per il loro sostegno. "
+        "È importante notare che questi risultati si basano sui dati che sono stati raccolti l'anno scorso."
+    ),
+    "pt": (
+        "Os resultados do estudo mostram que o novo método é mais eficiente do que o anterior. "
+        "Este documento descreve como o sistema funciona e o que você deve fazer quando algo dá errado. "
+        "Gostaríamos de agradecer a todas as pessoas que contribuíram para este relatório pelo seu apoio. "
+        "É importante notar que estas conclusões se baseiam nos dados que foram recolhidos no ano passado."
+    ),
+}
+
+# 繁体中文特有的常用字，用于区分简体和繁体
+_TRADITIONAL_CHARS = set("這們說個來時對會學國與為後還開關點問題經過體實現發務機動員種應產業區經濟當從給進讓麼嗎見話雖樣頭議處")
+_SIMPLIFIED_CHARS = set("这们说个来时对会学国与为后还开关点问题经过体实现发务机动员种应产业区经济当从给进让么吗见话虽样头议处")
+
+_NON_LETTER_RE = re.compile(r"[^\w]+|[\d_]+")
+
+def _trigrams(text: str) -> Counter:
+    """统计文本中以空格补齐词边界的字符三元组"""
+    counts: Counter = Counter()
+    for word in _NON_LETTER_RE.sub(" ", text.lower()).split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            counts[padded[i:i + 3]] += 1
+    return counts
+
+def _build_profile(counts: Counter, vocabulary: int) -> Tuple[Dict[str, float], float]:
+    """由三元组计数构建平滑后的对数概率表，返回(概率表, 未见三元组的对数概率)"""
+    total = sum(counts.values()) + 0.5 * vocabulary
+    return {gram: math.log((value + 0.5) / total) for gram, value in counts.items()}, math.log(0.5 / total)
+
+_SAMPLE_TRIGRAMS = {language: _trigrams(sample) for language, sample in _LATIN_SAMPLES.items()}
+_VOCABULARY = len(set().union(*_SAMPLE_TRIGRAMS.values()))
+_PROFILES: Dict[str, Tuple[Dict[str, float], float]] = {
+    language: _build_profile(counts, _VOCABULARY) for language, counts in _SAMPLE_TRIGRAMS.items()
+}
+
+def _script(char: str) -> Optional[str]:
+    """判断字母所属的文字系统"""
+    code = ord(char)
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+        return "han"
+    if 0x3040 <= code <= 0x30FF:
+        return "kana"
+    if 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF:
+        return "hangul"
+    if 0x0400 <= code <= 0x04FF:
+        return "cyrillic"
+    if char.isascii() or 0x00C0 <= code <= 0x024F:
+        return "latin"
+    return "other"
+
+def script_stats(text: str) -> Counter:
+    """按文字系统逐个统计字母
+
+    拉丁字母同样逐字母计数而非按词计数，夹在中文里的英文句子按其全部字母计入，
+    混合文本达不到单一文字系统的比例要求，不会被误判为已是目标语言。
+    """
+    counts: Counter = Counter()
+    for char in text:
+        if unicodedata.category(char).startswith("L"):
+            counts[_script(char)] += 1
+    return counts
+
+def has_letters(text: str) -> bool:
+    """判断文本是否包含字母，纯数字和符号无需翻译"""
+    return any(unicodedata.category(char).startswith("L") for char in text)
+
+def detect_latin_language(text: str) -> Tuple[Optional[str], float]:
+    """用字符三元组朴素贝叶斯识别拉丁字母语言，返回(语言, 每个三元组平均对数似然领先次优语言的差值)"""
+    counts = _trigrams(text)
+    total = sum(counts.values())
+    if not total:
+        return None, 0.0
+    scores = sorted(
+        (
+            (sum(count * profile.get(gram, unseen) for gram, count in counts.items()) / total, language)
+            for language, (profile, unseen) in _PROFILES.items()
+        ),
+        reverse=True
+    )
+    return scores[0][1], scores[0][0] - scores[1][0]
+
+def detect_language(text: str) -> Optional[str]:
+    """识别文本的语言，返回语言代码（zh-CN、zh-TW、ja、ko、ru、en等），无法可靠判断时返回None"""
+    stats = script_stats(text)
+    total = sum(stats.values())
+    if not total:
+        return None
+    script, count = stats.most_common(1)[0]
+    if stats["kana"] and stats["kana"] + stats["han"] >= total * settings.LANGUAGE_SKIP_MIN_RATIO:
+        return "ja"
+    if count < total * settings.LANGUAGE_SKIP_MIN_RATIO:
+        return None
+    if script == "han":
+        traditional = sum(1 for char in text if char in _TRADITIONAL_CHARS)
+        simplified = sum(1 for char in text if char in _SIMPLIFIED_CHARS)
+        if traditional > simplified:
+            return "zh-TW"
+        return "zh-CN" if simplified > traditional else "zh"
+    if script == "hangul":
+        return "ko"
+    if script == "cyrillic":
+        return "ru"
+    if script == "latin":
+        letters = sum(1 for char in text if char.isalpha())
+        if letters < settings.LANGUAGE_DETECT_MIN_LETTERS:
+            return None
+        language, margin = detect_latin_language(text)
+        return language if margin >= settings.LANGUAGE_DETECT_MIN_MARGIN else None
+    return None
+
+def needs_translation(text: str, target_lang: str) -> bool:
+    """判断片段是否需要翻译：纯数字、符号以及已是目标语言的片段无需翻译"""
+    if not has_letters(text):
+        return False
+    detected = detect_language(text)
+    if detected is None:
+        return True
+    target = target_lang.split("-")[0]
+    if detected.startswith("zh"):
+        # 简繁无法区分时视为已是目标语言，否则需要简繁转换
+        return target != "zh" or detected not in ("zh", target_lang)
+    return detected != target
+
+def filter_segments(segments: List[str], target_lang: str) -> List[bool]:
+    """逐个判断片段是否需要翻译"""
+    if not settings.LANGUAGE_SKIP_ENABLED:
+        return [True] * len(segments)
+    return [needs_translation(segment, target_lang) if segment.strip() else False for segment in segments]
@@ -5,8 +5,8 @@ from logging.handlers import RotatingFileHandler
 from .config import settings
 
 # 创建日志目录
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
+log_dir = Path(settings.LOG_DIR)
+log_dir.mkdir(parents=True, exist_ok=True)
 
 # 创建格式化器
 formatter = logging.Formatter(
@@ -1,68 +1,303 @@
+import math
 import fitz
 import io
 import base64
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Callable
 from pathlib import Path
 from PIL import Image
+from .config import settings
 from .task_manager import task_manager
+from .render_cache import render_cache
+from .document_cache import document_cache
+from .spatial_index import spatial_index_store, PageIndex
+from .search_index import search_index
+from .logger import pdf_logger
+
+# 支持输出的图像格式及其媒体类型，按内容协商时同等权重下靠前的优先
+IMAGE_FORMATS = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+}
+
+def negotiate_image_format(accept: Optional[str]) -> str:
+    """根据Accept请求头选择图像格式，未声明或只接受通配类型时返回无损的PNG"""
+    best, best_q = "png", 0.0
+    for item in (accept or "").split(","):
+        media_type, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        for fmt, fmt_type in IMAGE_FORMATS.items():
+            if media_type.strip().lower() == fmt_type and q > best_q:
+                best, best_q = fmt, q
+    return best
+
+def encode_pixmap(pix: fitz.Pixmap, fmt: str, quality: Optional[int] = None) -> bytes:
+    """将渲染结果编码为指定格式，quality只对有损格式生效"""
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"不支持的图像格式: {fmt}")
+    if fmt == "png":
+        return pix.tobytes("png")
+    quality = quality or settings.PDF_IMAGE_QUALITY
+    if fmt == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=quality)
+    # MuPDF不支持WebP编码，通过Pillow编码
+    image = Image.frombytes("RGBA" if pix.alpha else "RGB", (pix.width, pix.height), pix.samples)
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=quality)
+    return output.getvalue()
 
 class PDFProcessor:
     """PDF处理器类，用于处理PDF文件的各种操作"""
     
     def __init__(self, file_path: str):
-        """初始化PDF文档"""
+        """初始化PDF文档，启用句柄池时复用已打开的文档"""
         self.file_path = file_path
-        self.doc = fitz.open(file_path)
+        self._handle = None
+        if settings.DOCUMENT_CACHE_ENABLED:
+            self._handle = document_cache.open(file_path)
+            self.doc = self._handle.__enter__()
+        else:
+            self.doc = fitz.open(file_path)
         
     def __enter__(self):
         """上下文管理器入口"""
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """上下文管理器出口，确保文档关闭"""
-        self.doc.close()
+        """上下文管理器出口，将文档归还句柄池或关闭"""
+        if self._handle is not None:
+            self._handle.__exit__(exc_type, exc_val, exc_tb)
+        else:
+            self.doc.close()
         
     def get_page_count(self) -> int:
         """获取PDF页数"""
         return len(self.doc)
         
-    def extract_text(self, page_numbers: Optional[List[int]] = None) -> Dict[int, str]:
-        """提取文本内容"""
+    def plan_shards(self, page_numbers: Optional[List[int]] = None) -> List[List[int]]:
+        """将待处理页面按连续区间分片，页数不足PDF_PARALLEL_MIN_PAGES时只有一个分片
+        
+        每片至少PDF_EXTRACT_SHARD_PAGES页；PDF_EXTRACT_WORKERS大于0时分片数不超过该值。
+        """
+        pages = [
+            page_num for page_num in (page_numbers if page_numbers else range(self.get_page_count()))
+            if 0 <= page_num < self.get_page_count()
+        ]
+        if len(pages) < settings.PDF_PARALLEL_MIN_PAGES:
+            return [pages] if pages else []
+        size = settings.PDF_EXTRACT_SHARD_PAGES
+        if settings.PDF_EXTRACT_WORKERS > 0:
+            size = max(size, math.ceil(len(pages) / settings.PDF_EXTRACT_WORKERS))
+        return [pages[start:start + size] for start in range(0, len(pages), size)]
+        
+    def extract_text(self, page_numbers: Optional[List[int]] = None, index: bool = True) -> Dict[int, str]:
+        """提取文本内容，index为False时不写入全文检索索引，由调用方另行建立"""
+        result = {}
+        pages = page_numbers if page_numbers else range(self.get_page_count())
+        
+        for page_num in pages:
+            if 0 <= page_num < self.get_page_count():
+                result[page_num] = self.doc[page_num].get_text()
+                if index:
+                    self._index_page(page_num, result[page_num])
+                
+        return result
+        
+    def index_pages(self, page_numbers: Optional[List[int]] = None) -> None:
+        """为页面建立全文检索索引，用于在提取完成后单独建立索引"""
+        pages = page_numbers if page_numbers else range(self.get_page_count())
+        
+        for page_num in pages:
+            if 0 <= page_num < self.get_page_count():
+                self._index_page(page_num, self.doc[page_num].get_text())
+        
+    def _index_page(self, page_num: int, text: str) -> None:
+        """将提取的页面文本写入全文检索索引，文档内容未变的页面不重复写入"""
+        if not settings.SEARCH_INDEX_ENABLED:
+            return
+        document_id = Path(self.file_path).stem
+        try:
+            content_hash = render_cache.content_hash(self.file_path)
+            if not search_index.is_indexed(document_id, page_num, content_hash):
+                search_index.add_page(document_id, page_num, content_hash, text, self.get_page_index(page_num).words)
+        except Exception as e:
+            # 索引失败不影响提取结果
+            pdf_logger.warning(f"写入全文检索索引失败: {str(e)}")
+        
+    def iter_pages(
+        self,
+        page_numbers: Optional[List[int]] = None,
+        layout: bool = True,
+        image_url: Optional[Callable[[int], str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """逐页提取文本和布局，每处理完一页即产出，内存占用与页数无关
+        
+        image_url根据页码生成页面图像的地址，记录中只包含图像引用而不包含图像数据。
+        """
+        pages = page_numbers if page_numbers else range(self.get_page_count())
+        
+        for page_num in pages:
+            if 0 <= page_num < self.get_page_count():
+                page = self.doc[page_num]
+                record: Dict[str, Any] = {"page": page_num, "text": page.get_text()}
+                self._index_page(page_num, record["text"])
+                if layout:
+                    record["layout"] = self._page_layout(page)
+                if image_url:
+                    record["image"] = image_url(page_num)
+                yield record
+        
+    def extract_segments(self, page_numbers: Optional[List[int]] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """按文本块提取各页的片段及其边界框，作为翻译的最小单元"""
         result = {}
         pages = page_numbers if page_numbers else range(self.get_page_count())
         
         for page_num in pages:
             if 0 <= page_num < self.get_page_count():
                 page = self.doc[page_num]
-                result[page_num] = page.get_text()
+                # 每个块为 (x0, y0, x1, y1, 文本, 块序号, 块类型)，类型0为文本块
+                result[page_num] = [
+                    {"text": block[4], "bbox": list(block[:4])}
+                    for block in page.get_text("blocks")
+                    if block[6] == 0 and block[4].strip()
+                ]
                 
         return result
         
+    def get_page_index(self, page_num: int) -> Optional[PageIndex]:
+        """获取页面单词的空间索引，每页只解析一次并按文档内容持久化"""
+        if not 0 <= page_num < self.get_page_count():
+            return None
+        return spatial_index_store.get(
+            render_cache.content_hash(self.file_path),
+            page_num,
+            lambda: self.doc[page_num].get_text("words")
+        )
+        
     def extract_text_from_bbox(self, page_num: int, bbox: Tuple[float, float, float, float]) -> str:
         """从指定区域提取文本"""
         if 0 <= page_num < self.get_page_count():
+            if settings.SPATIAL_INDEX_ENABLED:
+                return self.get_page_index(page_num).text_in(bbox)
             page = self.doc[page_num]
             return page.get_text("text", clip=bbox)
         return ""
         
-    def get_page_image(self, page_num: int, zoom: float = 2.0) -> Optional[str]:
-        """获取页面图像"""
-        if 0 <= page_num < self.get_page_count():
+    def hit_test(self, page_num: int, x: float, y: float) -> Optional[Dict[str, Any]]:
+        """获取指定坐标下的单词及其所在行"""
+        index = self.get_page_index(page_num)
+        return index.hit_test(x, y) if index else None
+        
+    def render_page(
+        self,
+        page_num: int,
+        zoom: float = 2.0,
+        clip: Optional[Tuple[float, float, float, float]] = None,
+        fmt: str = "png",
+        quality: Optional[int] = None
+    ) -> Optional[bytes]:
+        """渲染页面或页面区域为PNG、WebP或JPEG图像数据，结果按文档内容缓存"""
+        if not 0 <= page_num < self.get_page_count():
+            return None
+        # PNG为无损格式，质量参数不参与缓存键
+        quality = (quality or settings.PDF_IMAGE_QUALITY) if fmt != "png" else None
+            
+        def render() -> bytes:
             page = self.doc[page_num]
-            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=fitz.Rect(clip) if clip else None)
+            return encode_pixmap(pix, fmt, quality)
             
-            img_data = pix.tobytes("png")
+        key = render_cache.make_key(render_cache.content_hash(self.file_path), page_num, zoom, clip, fmt, quality)
+        return render_cache.get_or_render(key, render)
+        
+    def image_reference(
+        self,
+        page_num: int,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        zoom: float = 2.0
+    ) -> Optional[Dict[str, Any]]:
+        """预先渲染页面或区域图像并返回其二进制接口地址，任务结果中只保存引用而不内嵌base64
+        
+        地址按上传文件ID生成，客户端通过Accept请求头协商PNG、WebP或JPEG格式。
+        """
+        if self.render_page(page_num, zoom, clip=bbox) is None:
+            return None
+        file_id = Path(self.file_path).stem
+        base_url = f"{settings.API_V1_STR}/pdf/{file_id}/pages/{page_num}"
+        if bbox:
+            x0, y0, x1, y1 = bbox
+            url = f"{base_url}/region?x0={x0}&y0={y0}&x1={x1}&y1={y1}&zoom={zoom}"
+        else:
+            url = f"{base_url}/image?zoom={zoom}"
+        return {"page": page_num, "url": url, "media_types": list(IMAGE_FORMATS.values())}
+        
+    def get_tile_grid(self, page_num: int, level: int) -> Optional[Dict[str, Any]]:
+        """计算指定缩放级别下页面的瓦片网格，级别L的缩放倍数为2^L，最后一行和一列的瓦片可能较小"""
+        if not (0 <= page_num < self.get_page_count() and 0 <= level <= settings.PDF_TILE_MAX_LEVEL):
+            return None
+        rect = self.doc[page_num].rect
+        zoom = float(2 ** level)
+        tile_size = settings.PDF_TILE_SIZE
+        width = math.ceil(rect.width * zoom)
+        height = math.ceil(rect.height * zoom)
+        return {
+            "level": level,
+            "zoom": zoom,
+            "tile_size": tile_size,
+            "width": width,
+            "height": height,
+            "columns": math.ceil(width / tile_size),
+            "rows": math.ceil(height / tile_size)
+        }
+        
+    def get_tile_pyramid(self, page_num: int) -> Optional[List[Dict[str, Any]]]:
+        """获取页面所有缩放级别的瓦片网格"""
+        if not 0 <= page_num < self.get_page_count():
+            return None
+        return [self.get_tile_grid(page_num, level) for level in range(settings.PDF_TILE_MAX_LEVEL + 1)]
+        
+    def render_tile(
+        self,
+        page_num: int,
+        level: int,
+        x: int,
+        y: int,
+        fmt: str = "png",
+        quality: Optional[int] = None
+    ) -> Optional[bytes]:
+        """按需渲染单个瓦片，只光栅化瓦片覆盖的页面区域"""
+        grid = self.get_tile_grid(page_num, level)
+        if grid is None or not (0 <= x < grid["columns"] and 0 <= y < grid["rows"]):
+            return None
+        rect = self.doc[page_num].rect
+        zoom = grid["zoom"]
+        span = grid["tile_size"] / zoom
+        clip = (
+            rect.x0 + x * span,
+            rect.y0 + y * span,
+            min(rect.x1, rect.x0 + (x + 1) * span),
+            min(rect.y1, rect.y0 + (y + 1) * span)
+        )
+        return self.render_page(page_num, zoom, clip=clip, fmt=fmt, quality=quality)
+        
+    def get_page_image(self, page_num: int, zoom: float = 2.0) -> Optional[str]:
+        """获取页面图像"""
+        img_data = self.render_page(page_num, zoom)
+        if img_data is not None:
             return base64.b64encode(img_data).decode()
         return None
         
     def get_image_from_bbox(self, page_num: int, bbox: Tuple[float, float, float, float], zoom: float = 2.0) -> Optional[str]:
         """获取指定区域的图像"""
-        if 0 <= page_num < self.get_page_count():
-            page = self.doc[page_num]
-            clip = fitz.Rect(bbox)
-            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
-            
-            img_data = pix.tobytes("png")
+        img_data = self.render_page(page_num, zoom, clip=tuple(bbox))
+        if img_data is not None:
             return base64.b64encode(img_data).decode()
         return None
         
@@ -73,29 +308,33 @@ class PDFProcessor:
         
         for page_num in pages:
             if 0 <= page_num < self.get_page_count():
-                page = self.doc[page_num]
-                blocks = page.get_text("dict")["blocks"]
-                
-                layout_info = []
-                for block in blocks:
-                    if block.get("type") == 0:  # 文本块
-                        layout_info.append({
-                            "type": "text",
-                            "bbox": block["bbox"],
-                            "text": block.get("text", ""),
-                            "font": block.get("font", ""),
-                            "size": block.get("size", 0)
-                        })
-                    elif block.get("type") == 1:  # 图像块
-                        layout_info.append({
-                            "type": "image",
-                            "bbox": block["bbox"]
-                        })
-                        
-                result[page_num] = layout_info
+                result[page_num] = self._page_layout(self.doc[page_num])
                 
         return result
         
+    @staticmethod
+    def _page_layout(page: fitz.Page) -> List[Dict[str, Any]]:
+        """分析单页的文本块和图像块"""
+        blocks = page.get_text("dict")["blocks"]
+        
+        layout_info = []
+        for block in blocks:
+            if block.get("type") == 0:  # 文本块
+                layout_info.append({
+                    "type": "text",
+                    "bbox": block["bbox"],
+                    "text": block.get("text", ""),
+                    "font": block.get("font", ""),
+                    "size": block.get("size", 0)
+                })
+            elif block.get("type") == 1:  # 图像块
+                layout_info.append({
+                    "type": "image",
+                    "bbox": block["bbox"]
+                })
+                
+        return layout_info
+        
     def process_task(self, task_id: str, mode: str, pages: Optional[List[int]] = None, bbox: Optional[Dict[str, float]] = None) -> None:
         """处理PDF任务"""
         try:
@@ -114,14 +353,15 @@ class PDFProcessor:
                 result = self.analyze_layout(pages)
                 
             elif mode == "image":
+                # 图像已写入渲染缓存，结果只保存二进制接口的引用
                 if bbox:
-                    result = self.get_image_from_bbox(
+                    result = self.image_reference(
                         bbox["page"],
                         (bbox["x"], bbox["y"], bbox["x"] + bbox["width"], bbox["y"] + bbox["height"])
                     )
                 else:
                     result = {
-                        page_num: self.get_page_image(page_num)
+                        page_num: self.image_reference(page_num)
                         for page_num in (pages or range(self.get_page_count()))
                     }
                     
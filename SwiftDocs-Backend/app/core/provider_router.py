@@ -0,0 +1,134 @@
+import time
+import asyncio
+from collections import deque
+from typing import Optional, Dict, Any, List, Deque, Tuple, Callable, Awaitable, TypeVar
+from .config import settings
+from .logger import translation_logger
+
+T = TypeVar("T")
+
+class LatencyTracker:
+    """记录各提供商最近的请求延迟，用于计算延迟分位数"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """初始化延迟窗口"""
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, provider: str, seconds: float) -> None:
+        """记录一次成功请求的延迟"""
+        samples = self._samples.get(provider)
+        if samples is None:
+            samples = self._samples[provider] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, provider: str, p: float) -> Optional[float]:
+        """计算延迟分位数，样本不足时返回None"""
+        samples = self._samples.get(provider)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+class ProviderRouter:
+    """翻译请求路由：按请求模式决定是否对冲请求和故障转移"""
+
+    def __init__(self):
+        """初始化路由器"""
+        self.latency = LatencyTracker()
+
+    def get_policy(self, mode: str) -> Dict[str, bool]:
+        """获取请求模式对应的路由策略"""
+        policy = settings.TRANSLATION_ROUTING_POLICIES.get(mode, {})
+        return {"hedge": bool(policy.get("hedge", False)), "failover": bool(policy.get("failover", False))}
+
+    def get_alternates(self, provider: str, available: List[str]) -> List[str]:
+        """按配置的顺序返回可用的备选提供商"""
+        return [
+            candidate for candidate in settings.TRANSLATION_FALLBACK_PROVIDERS
+            if candidate != provider and candidate in available
+        ]
+
+    def get_hedge_delay(self, provider: str) -> float:
+        """对冲延迟：主提供商最近延迟的分位数，样本不足时使用默认值"""
+        delay = self.latency.percentile(provider, settings.TRANSLATION_HEDGE_PERCENTILE)
+        if delay is None:
+            delay = settings.TRANSLATION_HEDGE_DEFAULT_DELAY
+        return max(settings.TRANSLATION_HEDGE_MIN_DELAY, delay)
+
+    async def _timed(self, provider: str, call: Callable[[str], Awaitable[T]]) -> T:
+        """执行请求并记录延迟"""
+        start = time.monotonic()
+        result = await call(provider)
+        self.latency.record(provider, time.monotonic() - start)
+        return result
+
+    async def run(
+        self,
+        candidates: List[str],
+        call: Callable[[str], Awaitable[T]],
+        hedge: bool = False,
+        failover: bool = False
+    ) -> Tuple[T, str]:
+        """按候选顺序执行请求，返回结果及实际提供服务的提供商
+
+        hedge: 主请求超过延迟分位数仍未返回时，向下一个候选并行发出请求，取先返回者
+        failover: 请求失败时立即改用下一个候选
+        """
+        remaining = list(candidates[1:])
+        primary = candidates[0]
+        running: Dict[asyncio.Task, str] = {}
+        errors: List[Exception] = []
+        hedged = False
+
+        def start(provider: str) -> None:
+            running[asyncio.ensure_future(self._timed(provider, call))] = provider
+
+        start(primary)
+        try:
+            while running:
+                timeout = None
+                if hedge and not hedged and remaining:
+                    timeout = self.get_hedge_delay(primary)
+                done, _ = await asyncio.wait(running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedged = True
+                    alternate = remaining.pop(0)
+                    translation_logger.info(f"{primary}响应超过{timeout:.2f}秒，向{alternate}发出对冲请求")
+                    start(alternate)
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result(), provider
+                    translation_logger.warning(f"{provider}翻译失败: {str(error)}")
+                    errors.append(error)
+
+                if not running and failover and remaining:
+                    alternate = remaining.pop(0)
+                    translation_logger.info(f"故障转移到{alternate}")
+                    start(alternate)
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise errors[0]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取各提供商的延迟分位数"""
+        return {
+            provider: {
+                "samples": len(samples),
+                "p50": self.latency.percentile(provider, 0.5),
+                "p90": self.latency.percentile(provider, 0.9),
+                "hedge_delay": self.get_hedge_delay(provider)
+            }
+            for provider, samples in self.latency._samples.items()
+        }
+
+# 创建全局路由器实例
+provider_router = ProviderRouter()
@@ -0,0 +1,197 @@
+import time
+import redis
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+from .config import settings
+from .redis_client import redis_client as default_redis_client, BackgroundFlusher
+from .rate_limiter import RateLimiterRegistry
+from .logger import translation_logger
+
+# 在Redis端原子更新EWMA，所有工作进程基于同一份统计路由
+# 失败请求只计入错误率，不影响延迟和吞吐
+_UPDATE_SCRIPT = """
+local alpha = tonumber(ARGV[1])
+local failed = tonumber(ARGV[2])
+local current = redis.call("HMGET", KEYS[1], "latency", "error_rate", "throughput", "samples")
+local function ewma(old, value)
+    if not old then
+        return value
+    end
+    return tonumber(old) + alpha * (value - tonumber(old))
+end
+redis.call("HSET", KEYS[1], "error_rate", tostring(ewma(current[2], failed)))
+if failed == 0 then
+    redis.call("HSET", KEYS[1], "latency", tostring(ewma(current[1], tonumber(ARGV[3]))))
+    redis.call("HSET", KEYS[1], "throughput", tostring(ewma(current[3], tonumber(ARGV[4]))))
+end
+redis.call("HSET", KEYS[1], "samples", (tonumber(current[4]) or 0) + 1, "updated_at", ARGV[5])
+redis.call("PEXPIRE", KEYS[1], ARGV[6])
+return 1
+"""
+
+def _ewma(old: Optional[float], value: float, alpha: float) -> float:
+    """计算指数加权移动平均"""
+    return value if old is None else old + alpha * (value - old)
+
+class ProviderStats:
+    """各(提供商, API密钥)的实时统计：延迟、错误率和吞吐量的指数加权移动平均
+
+    请求路径只读写进程内统计，样本由后台线程批量写入Redis，同时刷新所有工作进程共享的统计，
+    事件循环不等待Redis。Redis不可用时只使用进程内统计。
+    长时间没有请求的统计会过期，被判定为不健康的提供商过期后会重新获得流量。
+    """
+
+    KEY_PREFIX = "provider_stats:"
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        """初始化统计"""
+        self.redis_client = redis_client if redis_client is not None else default_redis_client
+        self.alpha = settings.PROVIDER_STATS_ALPHA
+        self.ttl = settings.PROVIDER_STATS_TTL
+        self._update_script = self.redis_client.register_script(_UPDATE_SCRIPT)
+        self._local: Dict[str, Dict[str, Any]] = {}
+        # 待写入Redis的样本，以及最近被查询、需要刷新共享统计的键
+        self._pending: List[Tuple[str, List[Any]]] = []
+        self._wanted: Dict[str, float] = {}
+        # 后台线程从Redis读取的共享统计，Redis不可用时为空
+        self._snapshot: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._flusher = BackgroundFlusher(self.flush, settings.PROVIDER_STATS_REFRESH_INTERVAL)
+
+    def make_key(self, provider: str, api_key: str) -> str:
+        """生成统计键，不保存明文密钥"""
+        return self.KEY_PREFIX + RateLimiterRegistry.make_key(provider, api_key)
+
+    def record(self, provider: str, api_key: str, seconds: float, failed: bool = False, chars: int = 0) -> None:
+        """记录一次请求的结果，更新进程内统计并排队等待批量写入Redis"""
+        key = self.make_key(provider, api_key)
+        throughput = chars / seconds if seconds > 0 else 0.0
+        now = time.time()
+
+        with self._lock:
+            stats = self._local.get(key)
+            if stats is None or now - stats["updated_at"] > self.ttl:
+                stats = self._local[key] = {"latency": None, "error_rate": None, "throughput": None, "samples": 0}
+            stats["error_rate"] = _ewma(stats["error_rate"], 1.0 if failed else 0.0, self.alpha)
+            if not failed:
+                stats["latency"] = _ewma(stats["latency"], seconds, self.alpha)
+                stats["throughput"] = _ewma(stats["throughput"], throughput, self.alpha)
+            stats["samples"] += 1
+            stats["updated_at"] = now
+            self._pending.append((key, [self.alpha, 1 if failed else 0, seconds, throughput, now, int(self.ttl * 1000)]))
+        self._flusher.start()
+
+    def flush(self) -> None:
+        """将排队的样本批量写入Redis，并刷新最近被查询的共享统计，由后台线程调用"""
+        now = time.time()
+        with self._lock:
+            pending, self._pending = self._pending, []
+            for key in [key for key, requested_at in self._wanted.items() if now - requested_at > self.ttl]:
+                del self._wanted[key]
+                self._snapshot.pop(key, None)
+            wanted = list(self._wanted)
+        if not pending and not wanted:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, args in pending:
+                self._update_script(keys=[key], args=args, client=pipe)
+            for key in wanted:
+                pipe.hgetall(key)
+            results = pipe.execute()
+        except redis.RedisError as e:
+            translation_logger.warning(f"同步提供商统计失败: {str(e)}")
+            with self._lock:
+                self._snapshot.clear()
+            return
+        snapshot = {key: self._parse(raw) for key, raw in zip(wanted, results[len(pending):])}
+        with self._lock:
+            self._snapshot.update(snapshot)
+
+    @staticmethod
+    def _parse(raw: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """解析Redis中保存的统计"""
+        if not raw:
+            return None
+
+        def number(name: str) -> Optional[float]:
+            return float(raw[name]) if name in raw else None
+
+        return {
+            "latency": number("latency"),
+            "error_rate": number("error_rate"),
+            "throughput": number("throughput"),
+            "samples": int(raw.get("samples", 0)),
+            "updated_at": number("updated_at")
+        }
+
+    def get_many(self, keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批量获取统计，优先使用后台刷新的共享统计，尚未刷新时使用进程内统计"""
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                self._wanted[key] = now
+            snapshot = {key: self._snapshot.get(key) for key in keys}
+        self._flusher.start()
+        return {key: snapshot[key] if snapshot[key] is not None else self._get_local(key) for key in keys}
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取进程内统计，过期的视为没有统计"""
+        stats = self._local.get(key)
+        if stats is None or time.time() - stats["updated_at"] > self.ttl:
+            return None
+        return stats
+
+    @staticmethod
+    def is_healthy(stats: Optional[Dict[str, Any]]) -> bool:
+        """错误率不超过阈值即视为健康，样本不足时不做判断"""
+        if not stats or stats["samples"] < settings.PROVIDER_STATS_MIN_SAMPLES:
+            return True
+        return (stats["error_rate"] or 0.0) <= settings.PROVIDER_MAX_ERROR_RATE
+
+    @staticmethod
+    def score(stats: Optional[Dict[str, Any]]) -> float:
+        """期望的成功请求耗时：平均延迟按错误率折算重试次数，越小越好
+
+        没有延迟样本的提供商得分为0，优先尝试以便尽快获得统计。
+        """
+        if not stats or stats["latency"] is None:
+            return 0.0
+        success_rate = max(1.0 - (stats["error_rate"] or 0.0), 0.05)
+        return stats["latency"] / success_rate
+
+    def select(self, candidates: List[Tuple[str, str]]) -> str:
+        """从(提供商, API密钥)候选中选出最优的健康提供商
+
+        得分相同时吞吐量高者优先，没有健康提供商时选择错误率最低者。
+        """
+        keys = [self.make_key(provider, api_key) for provider, api_key in candidates]
+        stats = self.get_many(keys)
+        ranked = [(provider, stats[key]) for (provider, _), key in zip(candidates, keys)]
+        healthy = [item for item in ranked if self.is_healthy(item[1])]
+        if healthy:
+            provider, _ = min(
+                healthy,
+                key=lambda item: (self.score(item[1]), -((item[1] or {}).get("throughput") or 0.0))
+            )
+        else:
+            provider, _ = min(ranked, key=lambda item: item[1]["error_rate"] or 0.0)
+        return provider
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有提供商的共享统计，会同步访问Redis，异步调用方应在线程池中执行"""
+        try:
+            keys = list(self.redis_client.scan_iter(match=f"{self.KEY_PREFIX}*"))
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
+            stats = {key: self._parse(raw) for key, raw in zip(keys, pipe.execute())}
+        except redis.RedisError:
+            stats = {key: self._get_local(key) for key in list(self._local)}
+        return {
+            key[len(self.KEY_PREFIX):]: {**value, "healthy": self.is_healthy(value), "score": round(self.score(value), 4)}
+            for key, value in stats.items() if value
+        }
+
+# 创建全局提供商统计实例
+provider_stats = ProviderStats()
@@ -0,0 +1,188 @@
+import time
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, AsyncIterator
+from .config import settings
+
+class TokenBucket:
+    """令牌桶限速器，控制每秒请求数"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """初始化令牌桶"""
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        # 上游返回Retry-After时，在此时间之前暂停发放令牌
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        """按流逝时间补充令牌"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """获取令牌，不足时等待"""
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self._refill(now)
+            # 检查与扣减之间没有await，单个事件循环内是原子的
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌，用于遵守Retry-After"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD自适应并发限制：成功时加性增大，过载时乘性减小"""
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 1.0
+    ):
+        """初始化并发限制"""
+        self.limit = float(initial)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        # 同一拥塞窗口内的多次失败只减小一次，避免并发失败时限制骤降
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self) -> None:
+        """获取并发槽位，已满时排队等待"""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self) -> None:
+        """释放并发槽位"""
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def on_success(self) -> None:
+        """请求成功，每个窗口约增加一个槽位"""
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        self._wake_waiters()
+
+    def on_overload(self) -> None:
+        """上游限流或过载，按比例减小并发限制"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+
+    def _wake_waiters(self) -> None:
+        """唤醒可以获得槽位的等待者"""
+        available = int(self.limit) - self.in_flight
+        while available > 0 and self._waiters:
+            waiter = self._waiters.pop(0)
+            if waiter.done():
+                continue
+            try:
+                waiter.set_result(None)
+                available -= 1
+            except RuntimeError:
+                # 等待者所属的事件循环已关闭
+                continue
+
+class ProviderLimiter:
+    """单个(提供商, API密钥)的限速与并发控制"""
+
+    def __init__(self, provider: str, rate: float):
+        """初始化限制器"""
+        self.provider = provider
+        self.bucket = TokenBucket(rate)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=settings.PROVIDER_INITIAL_CONCURRENCY,
+            min_limit=settings.PROVIDER_MIN_CONCURRENCY,
+            max_limit=settings.PROVIDER_MAX_CONCURRENCY
+        )
+        self.requests = 0
+        self.throttled = 0
+
+    def on_overload(self, retry_after: Optional[float] = None) -> None:
+        """记录一次限流或过载"""
+        self.throttled += 1
+        self.concurrency.on_overload()
+        if retry_after:
+            self.bucket.pause(retry_after)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取当前限制与统计"""
+        return {
+            "provider": self.provider,
+            "rate_per_second": self.bucket.rate,
+            "available_tokens": round(self.bucket.tokens, 2),
+            "paused_seconds": round(max(0.0, self.bucket.blocked_until - time.monotonic()), 2),
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "queued": len(self.concurrency._waiters),
+            "requests": self.requests,
+            "throttled": self.throttled
+        }
+
+class RateLimiterRegistry:
+    """按(提供商, API密钥)维护限制器"""
+
+    def __init__(self):
+        """初始化注册表"""
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    @staticmethod
+    def make_key(provider: str, api_key: str) -> str:
+        """生成限制器键，不保存明文密钥"""
+        digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+        return f"{provider}:{digest}"
+
+    def get(self, provider: str, api_key: str) -> ProviderLimiter:
+        """获取或创建限制器"""
+        key = self.make_key(provider, api_key)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            rate = settings.PROVIDER_RATE_LIMITS.get(provider, settings.PROVIDER_DEFAULT_RATE_LIMIT)
+            limiter = ProviderLimiter(provider, rate)
+            self._limiters[key] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def limit(self, provider: str, api_key: str) -> AsyncIterator[ProviderLimiter]:
+        """在限速和并发限制内执行一次请求"""
+        limiter = self.get(provider, api_key)
+        await limiter.concurrency.acquire()
+        try:
+            await limiter.bucket.acquire()
+            limiter.requests += 1
+            yield limiter
+        finally:
+            limiter.concurrency.release()
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有限制器的指标"""
+        return {key: limiter.get_metrics() for key, limiter in self._limiters.items()}
+
+# 创建全局限速器实例
+rate_limiter = RateLimiterRegistry()
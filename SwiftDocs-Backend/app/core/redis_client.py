@@ -0,0 +1,46 @@
+import os
+import time
+import redis
+import threading
+from typing import Callable, Optional
+from .config import settings
+from .logger import logger
+
+# 全局共享的Redis客户端，各模块共用同一个连接池
+redis_client = redis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+    decode_responses=True
+)
+
+class BackgroundFlusher:
+    """后台线程按固定间隔调用同步函数，与Redis的读写不在事件循环中等待
+
+    线程在首次使用时启动，进程fork后在子进程中重新启动。
+    """
+
+    def __init__(self, flush: Callable[[], None], interval: float):
+        """初始化后台同步"""
+        self.flush = flush
+        self.interval = interval
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """确保当前进程的后台线程已启动"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, name="redis-flusher", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self) -> None:
+        """按间隔执行同步，单次失败不影响后续同步"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"后台同步Redis失败: {str(e)}")
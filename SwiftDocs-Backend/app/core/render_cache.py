@@ -0,0 +1,135 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Tuple, Callable
+from .config import settings
+from .disk_lru import DiskLRU
+
+class RenderCache:
+    """页面渲染缓存，包含进程内LRU层和按总大小淘汰的磁盘LRU层
+
+    键由文档内容哈希、页码、缩放、裁剪区域和图像格式组成，文档内容不变时渲染结果可跨进程复用。
+    磁盘层以文件修改时间记录最近使用时间，各工作进程共享同一目录，总大小由DiskLRU约束。
+    """
+
+    # 按路径缓存的文档内容哈希最多保留的条目数
+    HASH_CACHE_SIZE = 1024
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        memory_bytes: Optional[int] = None,
+        disk_bytes: Optional[int] = None
+    ):
+        """初始化缓存"""
+        self.cache_dir = Path(cache_dir if cache_dir is not None else settings.RENDER_CACHE_DIR)
+        self.memory_bytes = memory_bytes if memory_bytes is not None else settings.RENDER_CACHE_MEMORY_BYTES
+        self.disk_bytes = disk_bytes if disk_bytes is not None else settings.RENDER_CACHE_DISK_BYTES
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk = DiskLRU(self.cache_dir, self.disk_bytes, "*/*")
+        self._hashes: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def content_hash(self, file_path: str) -> str:
+        """计算文档内容哈希，按路径、大小和修改时间缓存，避免每次渲染都读取整个文件"""
+        stat = os.stat(file_path)
+        with self._lock:
+            cached = self._hashes.get(file_path)
+            if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+                self._hashes.move_to_end(file_path)
+                return cached[2]
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._hashes[file_path] = (stat.st_size, stat.st_mtime_ns, value)
+            self._hashes.move_to_end(file_path)
+            while len(self._hashes) > self.HASH_CACHE_SIZE:
+                self._hashes.popitem(last=False)
+        return value
+
+    @staticmethod
+    def make_key(
+        content_hash: str,
+        page_num: int,
+        zoom: float,
+        clip: Optional[Tuple[float, float, float, float]] = None,
+        fmt: str = "png",
+        quality: Optional[int] = None
+    ) -> str:
+        """生成缓存键"""
+        clip_part = ",".join(f"{value:.2f}" for value in clip) if clip else "page"
+        raw = f"{content_hash}:{page_num}:{zoom:.4f}:{clip_part}:{fmt}:{quality or ''}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        """磁盘缓存文件路径，按键前缀分目录"""
+        return self.cache_dir / key[:2] / key
+
+    def _set_memory(self, key: str, data: bytes) -> None:
+        """写入进程内LRU，超出容量时淘汰最久未使用的条目"""
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_used -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存，磁盘层命中时提升到进程内LRU"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.metrics["memory_hits"] += 1
+                return data
+
+            # 文件可能已被其他进程淘汰
+            data = self._disk.read(self._path(key))
+            if data is None:
+                self.metrics["misses"] += 1
+                return None
+            self._set_memory(key, data)
+            self.metrics["disk_hits"] += 1
+            return data
+
+    def set(self, key: str, data: bytes) -> None:
+        """写入两层缓存"""
+        with self._lock:
+            self._set_memory(key, data)
+            self._disk.write(self._path(key), data)
+
+    def get_or_render(self, key: str, render: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """读取缓存，未命中时渲染并写入"""
+        if not settings.RENDER_CACHE_ENABLED:
+            return render()
+        data = self.get(key)
+        if data is None:
+            data = render()
+            if data is not None:
+                self.set(key, data)
+        return data
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取缓存命中统计与各层占用"""
+        with self._lock:
+            return {
+                **self.metrics,
+                "evictions": self._disk.evictions,
+                "memory_bytes": self._memory_used,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk.used,
+                "disk_entries": len(self._disk.entries())
+            }
+
+# 创建全局渲染缓存实例
+render_cache = RenderCache()
@@ -0,0 +1,167 @@
+import json
+import hashlib
+import redis
+from collections import Counter
+from typing import Optional, Dict, List, Iterable, NamedTuple
+from .config import settings
+from .redis_client import redis_client as default_redis_client
+from .segment_dedup import normalize_segment
+from .logger import translation_logger
+
+class RevisionMatch(NamedTuple):
+    """匹配到的旧版本文档"""
+    document_id: str
+    similarity: float
+
+def segment_hash(text: str) -> Optional[str]:
+    """片段指纹：规范化文本的哈希，空白片段返回None"""
+    normalized = normalize_segment(text)
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+def document_id(file_path: str) -> str:
+    """文档ID：文件内容的哈希，重复上传同一文件得到相同ID"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+class RevisionTracker:
+    """文档修订跟踪器：以片段指纹的bottom-k草图识别修订版文档，并保存每个文档的片段译文
+
+    每个文档只索引草图中的k个最小指纹，查询时只比较共享草图指纹的文档，
+    草图的重合比例是两个文档片段集合Jaccard相似度的无偏估计。
+    """
+
+    KEY_PREFIX = "revision:"
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, sketch_size: Optional[int] = None):
+        """初始化修订跟踪器"""
+        self.redis_client = redis_client if redis_client is not None else default_redis_client
+        self.sketch_size = sketch_size if sketch_size is not None else settings.REVISION_SKETCH_SIZE
+        self.metrics = {"lookups": 0, "matched": 0, "reused": 0, "translated": 0}
+
+    def sketch(self, hashes: Iterable[str]) -> List[str]:
+        """计算片段指纹集合的bottom-k草图"""
+        return sorted(set(hashes))[:self.sketch_size]
+
+    def similarity(self, a: List[str], b: List[str]) -> float:
+        """由两个草图估计Jaccard相似度"""
+        union = sorted(set(a) | set(b))[:self.sketch_size]
+        if not union:
+            return 0.0
+        both = set(a) & set(b)
+        return sum(1 for value in union if value in both) / len(union)
+
+    def _translations_key(
+        self,
+        document: str,
+        provider: str,
+        model: str,
+        target_lang: str,
+        glossary: Optional[str]
+    ) -> str:
+        """文档译文的键，提供商、模型或术语表不同的译文分开保存，与翻译缓存键一致"""
+        return f"{self.KEY_PREFIX}tm:{document}:{provider}:{model}:{target_lang}:{glossary or ''}"
+
+    def find_previous(self, document: str, hashes: Iterable[str]) -> Optional[RevisionMatch]:
+        """查找与当前文档最相似的已处理文档，相似度低于阈值时返回None"""
+        sketch = self.sketch(hashes)
+        if not sketch:
+            return None
+        self.metrics["lookups"] += 1
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for value in sketch:
+                pipe.smembers(f"{self.KEY_PREFIX}idx:{value}")
+            shared: Counter = Counter()
+            for members in pipe.execute():
+                shared.update(members)
+            # 共享草图指纹最多的文档优先比较，同一文件重复上传时包含自身
+            candidates = [candidate for candidate, _ in shared.most_common(settings.REVISION_MAX_CANDIDATES)]
+            if not candidates:
+                return None
+            pipe = self.redis_client.pipeline(transaction=False)
+            for candidate in candidates:
+                pipe.get(f"{self.KEY_PREFIX}sketch:{candidate}")
+            sketches = pipe.execute()
+        except redis.RedisError as e:
+            translation_logger.warning(f"查询文档修订记录失败: {str(e)}")
+            return None
+
+        best: Optional[RevisionMatch] = None
+        for candidate, stored in zip(candidates, sketches):
+            if stored is None:
+                continue
+            similarity = 1.0 if candidate == document else self.similarity(sketch, json.loads(stored))
+            if best is None or similarity > best.similarity:
+                best = RevisionMatch(candidate, similarity)
+        if best is None or best.similarity < settings.REVISION_MIN_SIMILARITY:
+            return None
+        self.metrics["matched"] += 1
+        return best
+
+    def get_translations(
+        self,
+        documents: List[str],
+        provider: str,
+        model: str,
+        target_lang: str,
+        glossary: Optional[str],
+        hashes: Iterable[str]
+    ) -> Dict[str, str]:
+        """按片段指纹读取文档由同一提供商和模型产生的已有译文，靠前的文档优先"""
+        wanted = sorted(set(hashes))
+        if not wanted or not documents:
+            return {}
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for document in documents:
+                pipe.hmget(self._translations_key(document, provider, model, target_lang, glossary), wanted)
+            rows = pipe.execute()
+        except redis.RedisError as e:
+            translation_logger.warning(f"读取文档修订译文失败: {str(e)}")
+            return {}
+        translations: Dict[str, str] = {}
+        for row in rows:
+            for value, translation in zip(wanted, row):
+                if translation is not None:
+                    translations.setdefault(value, translation)
+        return translations
+
+    def register(
+        self,
+        document: str,
+        provider: str,
+        model: str,
+        target_lang: str,
+        glossary: Optional[str],
+        translations: Dict[str, str],
+        hashes: Optional[Iterable[str]] = None
+    ) -> None:
+        """保存文档的片段译文；提供完整文档的片段指纹时同时建立修订索引"""
+        ttl = settings.TRANSLATION_CACHE_TTL
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            if translations:
+                key = self._translations_key(document, provider, model, target_lang, glossary)
+                pipe.hset(key, mapping=translations)
+                pipe.expire(key, ttl)
+            if hashes is not None:
+                sketch = self.sketch(hashes)
+                pipe.set(f"{self.KEY_PREFIX}sketch:{document}", json.dumps(sketch), ex=ttl)
+                for value in sketch:
+                    pipe.sadd(f"{self.KEY_PREFIX}idx:{value}", document)
+                    pipe.expire(f"{self.KEY_PREFIX}idx:{value}", ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            translation_logger.warning(f"保存文档修订记录失败: {str(e)}")
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取修订复用统计"""
+        return dict(self.metrics)
+
+# 创建全局文档修订跟踪器实例
+revision_tracker = RevisionTracker()
@@ -0,0 +1,188 @@
+import re
+import json
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Tuple
+from .config import settings
+from .logger import pdf_logger
+
+# 中日韩文字按相邻两字切分为二元词并另外索引单字，其余文字交给FTS5的unicode61分词器
+_CJK = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK_RE = re.compile(f"[{_CJK}]+")
+_WORD_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    text TEXT NOT NULL,
+    words TEXT NOT NULL,
+    UNIQUE (document_id, page)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_fts USING fts5(tokens, tokenize="unicode61 remove_diacritics 2");
+"""
+
+def _bigrams(run: str) -> List[str]:
+    """将连续的中日韩文字切分为重叠的二元词，单字保留为一元词"""
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+def tokenize(text: str) -> List[List[str]]:
+    """将文本切分为词组：拉丁等文字每个单词一组，中日韩文字每段连续文字的二元词一组"""
+    groups = []
+    for match in _WORD_RE.finditer(unicodedata.normalize("NFKC", text).lower()):
+        word = match.group(0)
+        groups.append(_bigrams(word) if _CJK_RE.fullmatch(word) else [word])
+    return groups
+
+def _group_text(group: List[str]) -> str:
+    """由一组词还原原文片段，二元词相邻重叠一个字"""
+    return group[0] + "".join(token[-1] for token in group[1:])
+
+def index_tokens(text: str) -> str:
+    """写入索引的词序列：各组的词之后追加中日韩文字的单字，单字查询也能命中
+
+    单字都排在二元词之后，由二元词组成的查询短语不会跨越到单字上。
+    """
+    groups = tokenize(text)
+    tokens = [token for group in groups for token in group]
+    tokens += [
+        char for group in groups
+        if len(group[0]) == 2 and _CJK_RE.fullmatch(group[0])
+        for char in _group_text(group)
+    ]
+    return " ".join(tokens)
+
+def build_match_query(query: str) -> Optional[str]:
+    """构造FTS5查询：每组词作为短语，连续的二元词必须相邻出现，各组之间为AND"""
+    phrases = ['"' + " ".join(group).replace('"', '""') + '"' for group in tokenize(query)]
+    return " AND ".join(phrases) if phrases else None
+
+class SearchIndex:
+    """基于SQLite FTS5的全文检索索引，按页增量写入，支持中日韩文字
+
+    中日韩文字在写入和查询时都切分为二元词，写入时另外索引单字，无需额外的分词器；
+    每页同时保存原文和单词边界框，用于生成摘要和高亮区域。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """初始化索引，数据库连接按线程创建"""
+        self.db_path = db_path if db_path is not None else settings.SEARCH_INDEX_PATH
+        self._local = threading.local()
+        self.metrics = {"indexed_pages": 0, "searches": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10.0)
+            # WAL模式下读取不阻塞写入，多个工作进程可以同时写入不同文档
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def is_indexed(self, document_id: str, page: int, content_hash: str) -> bool:
+        """判断页面是否已按当前文档内容建立索引"""
+        row = self._connection().execute(
+            "SELECT content_hash FROM pages WHERE document_id = ? AND page = ?",
+            (document_id, page)
+        ).fetchone()
+        return row is not None and row[0] == content_hash
+
+    def add_page(
+        self,
+        document_id: str,
+        page: int,
+        content_hash: str,
+        text: str,
+        words: List[Tuple[float, float, float, float, str]]
+    ) -> None:
+        """写入或替换一页的索引"""
+        tokens = index_tokens(text)
+        words_json = json.dumps([list(word[:5]) for word in words], ensure_ascii=False)
+        conn = self._connection()
+        with conn:
+            row = conn.execute(
+                "SELECT id FROM pages WHERE document_id = ? AND page = ?",
+                (document_id, page)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM page_fts WHERE rowid = ?", (row[0],))
+                conn.execute("DELETE FROM pages WHERE id = ?", (row[0],))
+            cursor = conn.execute(
+                "INSERT INTO pages (document_id, page, content_hash, text, words) VALUES (?, ?, ?, ?, ?)",
+                (document_id, page, content_hash, text, words_json)
+            )
+            conn.execute("INSERT INTO page_fts (rowid, tokens) VALUES (?, ?)", (cursor.lastrowid, tokens))
+        self.metrics["indexed_pages"] += 1
+
+    def remove_document(self, document_id: str) -> None:
+        """删除文档的所有页面索引"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM page_fts WHERE rowid IN (SELECT id FROM pages WHERE document_id = ?)",
+                (document_id,)
+            )
+            conn.execute("DELETE FROM pages WHERE document_id = ?", (document_id,))
+
+    @staticmethod
+    def _snippet(text: str, terms: List[str]) -> str:
+        """截取首个命中词附近的原文作为摘要"""
+        lowered = unicodedata.normalize("NFKC", text).lower()
+        positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+        start = max(0, min(positions) - settings.SEARCH_SNIPPET_CHARS // 2) if positions else 0
+        snippet = " ".join(text[start:start + settings.SEARCH_SNIPPET_CHARS].split())
+        return ("…" if start > 0 else "") + snippet + ("…" if start + settings.SEARCH_SNIPPET_CHARS < len(text) else "")
+
+    def search(self, query: str, limit: int = 20, document_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """检索包含所有查询词的页面，按BM25相关度排序，返回文档、页码、摘要和高亮边界框"""
+        match = build_match_query(query)
+        if match is None:
+            return []
+        sql = (
+            "SELECT p.document_id, p.page, p.text, p.words, bm25(page_fts) AS score "
+            "FROM page_fts JOIN pages p ON p.id = page_fts.rowid WHERE page_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if document_id:
+            sql += " AND p.document_id = ?"
+            params.append(document_id)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        try:
+            rows = self._connection().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            pdf_logger.warning(f"全文检索失败: {str(e)}")
+            return []
+        self.metrics["searches"] += 1
+
+        terms = [_group_text(group) for group in tokenize(query)]
+        hits = []
+        for doc_id, page, text, words_json, score in rows:
+            highlights = [
+                word[:4] for word in json.loads(words_json)
+                if any(term in unicodedata.normalize("NFKC", word[4]).lower() for term in terms)
+            ]
+            hits.append({
+                "document_id": doc_id,
+                "page": page,
+                "score": round(-score, 4),
+                "snippet": self._snippet(text, terms),
+                "highlights": highlights
+            })
+        return hits
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取索引写入与检索统计"""
+        return dict(self.metrics)
+
+# 创建全局全文检索索引实例
+search_index = SearchIndex()
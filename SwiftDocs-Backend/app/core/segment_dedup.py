@@ -0,0 +1,77 @@
+import re
+import unicodedata
+from typing import List, Optional, NamedTuple, Dict
+
+# 行末连字符换行，例如 "trans-\nlation"，第三组为下一段单词后紧跟的连字符
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-[ \t]*\n\s*(\w+)(-?)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\d+")
+
+class DedupPlan(NamedTuple):
+    """去重结果：需要翻译的代表片段，以及每个原片段对应的代表下标（空白片段为-1）"""
+    unique: List[str]
+    groups: List[int]
+
+def _join_hyphen_break(match: "re.Match[str]") -> str:
+    """下一段以小写字母开头且不是复合词的一部分时视为断词并去掉连字符，否则只去掉换行"""
+    head, word, trailing = match.groups()
+    if word[0].islower() and not trailing:
+        return head + word
+    return f"{head}-{word}{trailing}"
+
+def normalize_segment(text: str) -> str:
+    """规范化片段：NFKC、合并连字符断词、折叠空白"""
+    text = unicodedata.normalize("NFKC", text)
+    text = _HYPHEN_BREAK_RE.sub(_join_hyphen_break, text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+def shape_key(normalized: str) -> str:
+    """近似重复键：数字替换为占位符，页码、图号不同的页眉页脚视为同一片段"""
+    return _NUMBER_RE.sub("#", normalized)
+
+def plan_segments(segments: List[str]) -> DedupPlan:
+    """找出完全相同及仅数字不同的片段，每组只保留首次出现的规范化文本作为代表"""
+    unique: List[str] = []
+    groups: List[int] = []
+    index: Dict[str, int] = {}
+    for segment in segments:
+        normalized = normalize_segment(segment)
+        if not normalized:
+            groups.append(-1)
+            continue
+        key = shape_key(normalized)
+        if key not in index:
+            index[key] = len(unique)
+            unique.append(normalized)
+        groups.append(index[key])
+    return DedupPlan(unique, groups)
+
+def adapt_translation(source: str, representative: str, translation: str) -> Optional[str]:
+    """将代表片段的译文套用到同组片段，译文中的数字按数值替换为当前片段对应位置的数字
+
+    译文语序可以与原文不同；数字无法一一对应时返回None，由调用方单独翻译。
+    """
+    if source == representative:
+        return translation
+    representative_numbers = _NUMBER_RE.findall(representative)
+    source_numbers = _NUMBER_RE.findall(source)
+    if len(source_numbers) != len(representative_numbers):
+        return None
+    mapping: Dict[str, str] = {}
+    for old, new in zip(representative_numbers, source_numbers):
+        # 同一个数字在当前片段中对应不同数值时无法替换
+        if mapping.setdefault(old, new) != new:
+            return None
+    if sorted(_NUMBER_RE.findall(translation)) != sorted(representative_numbers):
+        return None
+    return _NUMBER_RE.sub(lambda match: mapping[match.group(0)], translation)
+
+def expand_translations(segments: List[str], plan: DedupPlan, translations: List[str]) -> List[Optional[str]]:
+    """将代表片段的译文回填到每处出现，空白片段原样保留"""
+    results: List[Optional[str]] = []
+    for segment, group in zip(segments, plan.groups):
+        if group < 0:
+            results.append(segment)
+        else:
+            results.append(adapt_translation(normalize_segment(segment), plan.unique[group], translations[group]))
+    return results
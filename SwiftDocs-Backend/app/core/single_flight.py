@@ -0,0 +1,103 @@
+import time
+import uuid
+import asyncio
+import redis
+from typing import Optional, Dict, Tuple, Callable, Awaitable, TypeVar
+from .config import settings
+from .redis_client import redis_client as default_redis_client
+from .logger import translation_logger
+
+T = TypeVar("T")
+
+# 仅当锁仍由自己持有时才删除，避免误删其他进程在锁过期后获得的锁
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """请求合并：相同键的并发请求只执行一次上游调用
+
+    进程内通过共享的asyncio任务合并；跨工作进程通过Redis锁合并，
+    未抢到锁的进程轮询共享缓存等待持锁进程写入结果。Redis调用和lookup在线程池中执行，不阻塞事件循环。
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        lock_ttl: Optional[float] = None,
+        wait_timeout: Optional[float] = None
+    ):
+        """初始化请求合并器"""
+        self.redis_client = redis_client if redis_client is not None else default_redis_client
+        self.lock_ttl = lock_ttl if lock_ttl is not None else settings.SINGLE_FLIGHT_LOCK_TTL
+        self.wait_timeout = wait_timeout if wait_timeout is not None else settings.SINGLE_FLIGHT_WAIT_TIMEOUT
+        self._flights: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._release_script = self.redis_client.register_script(_RELEASE_SCRIPT)
+        self.metrics = {"leaders": 0, "local_coalesced": 0, "remote_coalesced": 0}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]], lookup: Callable[[], Optional[T]]) -> T:
+        """执行func，相同key的并发调用共享同一结果
+
+        func负责调用上游并写入共享缓存，lookup用于读取其他进程写入的结果，可以是同步阻塞的调用。
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        task = self._flights.get(flight_key)
+        if task is None:
+            # 共享调用在独立任务中执行，单个调用方取消不会影响其他等待者
+            task = loop.create_task(self._do_shared(key, func, lookup))
+            self._flights[flight_key] = task
+            task.add_done_callback(lambda _: self._flights.pop(flight_key, None))
+        else:
+            self.metrics["local_coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _do_shared(self, key: str, func: Callable[[], Awaitable[T]], lookup: Callable[[], Optional[T]]) -> T:
+        """跨工作进程合并调用"""
+        lock_key = f"singleflight:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await asyncio.to_thread(
+                self.redis_client.set, lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+            )
+        except redis.RedisError as e:
+            translation_logger.warning(f"获取请求合并锁失败: {str(e)}")
+            return await func()
+
+        if acquired:
+            self.metrics["leaders"] += 1
+            try:
+                return await func()
+            finally:
+                try:
+                    await asyncio.to_thread(self._release_script, keys=[lock_key], args=[token])
+                except redis.RedisError as e:
+                    translation_logger.warning(f"释放请求合并锁失败: {str(e)}")
+
+        # 其他工作进程正在请求，等待其结果写入共享缓存
+        deadline = time.monotonic() + self.wait_timeout
+        interval = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 0.5)
+            result = await asyncio.to_thread(lookup)
+            if result is not None:
+                self.metrics["remote_coalesced"] += 1
+                return result
+            try:
+                if not await asyncio.to_thread(self.redis_client.exists, lock_key):
+                    # 持锁进程已结束但没有结果（例如请求失败），自行请求
+                    break
+            except redis.RedisError:
+                break
+        return await func()
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取请求合并统计"""
+        return {**self.metrics, "in_flight": len(self._flights)}
+
+# 创建全局请求合并实例
+single_flight = SingleFlight()
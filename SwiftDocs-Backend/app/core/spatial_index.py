@@ -0,0 +1,167 @@
+import json
+import math
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Callable, Any
+from .config import settings
+from .disk_lru import DiskLRU
+
+# 单词记录：(x0, y0, x1, y1, 文本, 块序号, 行序号, 词序号)，与page.get_text("words")一致
+Word = Tuple[float, float, float, float, str, int, int, int]
+
+class PageIndex:
+    """单页的网格空间索引，记录每个单词和每行的边界框
+
+    页面按固定边长划分网格，每个单词登记到其边界框覆盖的网格中，
+    区域查询和点击测试只检查相关网格内的单词，无需再次解析页面。
+    """
+
+    def __init__(self, words: List[Word], cell_size: Optional[float] = None):
+        """按阅读顺序建立单词、行和网格索引"""
+        self.words = sorted((tuple(word) for word in words), key=lambda word: (word[5], word[6], word[7]))
+        self.cell_size = cell_size if cell_size is not None else settings.SPATIAL_INDEX_CELL_SIZE
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for index, word in enumerate(self.words):
+            for cell in self._cells(word[:4]):
+                self.grid[cell].append(index)
+
+        # 同一块同一行的单词合并为一行
+        lines: "OrderedDict[Tuple[int, int], List[float]]" = OrderedDict()
+        self.line_of: List[Tuple[int, int]] = []
+        self.line_words: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        for x0, y0, x1, y1, text, block, line, _ in self.words:
+            key = (block, line)
+            self.line_of.append(key)
+            self.line_words[key].append(text)
+            if key not in lines:
+                lines[key] = [x0, y0, x1, y1]
+            else:
+                bbox = lines[key]
+                bbox[0], bbox[1] = min(bbox[0], x0), min(bbox[1], y0)
+                bbox[2], bbox[3] = max(bbox[2], x1), max(bbox[3], y1)
+        self.lines = lines
+
+    def _cells(self, bbox: Tuple[float, float, float, float]):
+        """边界框覆盖的网格坐标"""
+        x0, y0, x1, y1 = bbox
+        for cx in range(math.floor(x0 / self.cell_size), math.floor(x1 / self.cell_size) + 1):
+            for cy in range(math.floor(y0 / self.cell_size), math.floor(y1 / self.cell_size) + 1):
+                yield cx, cy
+
+    def query(self, bbox: Tuple[float, float, float, float]) -> List[int]:
+        """查询中心点落在区域内的单词，按阅读顺序返回下标"""
+        x0, y0, x1, y1 = bbox
+        found = set()
+        for cell in self._cells(bbox):
+            for index in self.grid.get(cell, ()):
+                word = self.words[index]
+                cx, cy = (word[0] + word[2]) / 2, (word[1] + word[3]) / 2
+                if x0 <= cx <= x1 and y0 <= cy <= y1:
+                    found.add(index)
+        return sorted(found)
+
+    def text_in(self, bbox: Tuple[float, float, float, float]) -> str:
+        """提取区域内的文本，同一行的单词以空格连接，每行以换行结尾"""
+        lines: "OrderedDict[Tuple[int, int], List[str]]" = OrderedDict()
+        for index in self.query(bbox):
+            lines.setdefault(self.line_of[index], []).append(self.words[index][4])
+        return "".join(" ".join(words) + "\n" for words in lines.values())
+
+    def hit_test(self, x: float, y: float) -> Optional[Dict[str, Any]]:
+        """查找包含指定坐标的单词及其所在行，用于光标下取词"""
+        cell = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        for index in self.grid.get(cell, ()):
+            x0, y0, x1, y1, text = self.words[index][:5]
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                line = self.line_of[index]
+                return {
+                    "word": text,
+                    "bbox": [x0, y0, x1, y1],
+                    "line": " ".join(self.line_words[line]),
+                    "line_bbox": list(self.lines[line])
+                }
+        return None
+
+    def to_json(self) -> str:
+        """序列化单词列表，网格在加载时重建"""
+        return json.dumps(self.words, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: str) -> "PageIndex":
+        """从序列化的单词列表恢复索引"""
+        return cls([tuple(word) for word in json.loads(data)])
+
+class SpatialIndexStore:
+    """空间索引存储：进程内LRU缓存已加载的页面索引，磁盘上按文档内容哈希持久化
+
+    每页索引在首次查询时构建并写入磁盘，之后的选区和点击测试不再调用MuPDF。
+    磁盘层与渲染缓存一样由DiskLRU按总大小淘汰最久未使用的文件。
+    """
+
+    def __init__(
+        self,
+        index_dir: Optional[str] = None,
+        memory_pages: Optional[int] = None,
+        disk_bytes: Optional[int] = None
+    ):
+        """初始化存储"""
+        self.index_dir = Path(index_dir if index_dir is not None else settings.SPATIAL_INDEX_DIR)
+        self.memory_pages = memory_pages if memory_pages is not None else settings.SPATIAL_INDEX_MEMORY_PAGES
+        self.disk_bytes = disk_bytes if disk_bytes is not None else settings.SPATIAL_INDEX_DISK_BYTES
+        self._memory: "OrderedDict[Tuple[str, int], PageIndex]" = OrderedDict()
+        self._disk = DiskLRU(self.index_dir, self.disk_bytes, "*/*/*.json")
+        self._lock = threading.Lock()
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "builds": 0}
+
+    def _path(self, content_hash: str, page_num: int) -> Path:
+        """页面索引文件路径"""
+        return self.index_dir / content_hash[:2] / content_hash / f"{page_num}.json"
+
+    def get(self, content_hash: str, page_num: int, load_words: Callable[[], List[Word]]) -> PageIndex:
+        """获取页面索引，依次查找内存和磁盘，都未命中时调用load_words构建"""
+        key = (content_hash, page_num)
+        path = self._path(content_hash, page_num)
+        with self._lock:
+            index = self._memory.get(key)
+            if index is not None:
+                self._memory.move_to_end(key)
+                self.metrics["memory_hits"] += 1
+                return index
+            data = self._disk.read(path)
+
+        index = None
+        if data is not None:
+            try:
+                index = PageIndex.from_json(data.decode("utf-8"))
+                self.metrics["disk_hits"] += 1
+            except ValueError:
+                pass
+        built = index is None
+        if built:
+            # 构建索引需要解析页面，不持有锁
+            index = PageIndex(load_words())
+            self.metrics["builds"] += 1
+
+        with self._lock:
+            if built:
+                self._disk.write(path, index.to_json().encode("utf-8"))
+            self._memory[key] = index
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_pages:
+                self._memory.popitem(last=False)
+        return index
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取索引命中统计与磁盘层占用"""
+        with self._lock:
+            return {
+                **self.metrics,
+                "evictions": self._disk.evictions,
+                "memory_pages": len(self._memory),
+                "disk_bytes": self._disk.used,
+                "disk_entries": len(self._disk.entries())
+            }
+
+# 创建全局空间索引存储实例
+spatial_index_store = SpatialIndexStore()
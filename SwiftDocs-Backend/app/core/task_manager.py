@@ -1,20 +1,14 @@
-import redis
 import json
 from typing import Optional, Dict, Any
 from datetime import datetime
-from .config import settings
+from .redis_client import redis_client
 
 class TaskManager:
     """任务管理器类，用于管理任务状态和进度"""
     
     def __init__(self):
         """初始化Redis连接"""
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=0,
-            decode_responses=True
-        )
+        self.redis_client = redis_client
         
     def create_task(self, task_id: str, task_type: str, initial_status: str = "pending") -> None:
         """创建新任务"""
@@ -0,0 +1,77 @@
+import re
+from typing import List, NamedTuple, Tuple
+from .translation_batcher import estimate_tokens
+
+_PARAGRAPH_RE = re.compile(r"(\n[ \t]*\n\s*)")
+# 句末标点（含其后的右引号/括号），英文句点需后接空白才视为句末，避免拆开小数和缩写
+_SENTENCE_END_RE = re.compile(r"([。！？!?；;…]+[”’」』）)\]\"']*|\.(?=\s))(\s*)")
+
+class TextChunk(NamedTuple):
+    """文本块及其与下一块之间的原始分隔符"""
+    text: str
+    separator: str
+
+def split_sentences(paragraph: str) -> List[Tuple[str, str]]:
+    """按句末标点拆分段落，返回(句子, 句后空白)列表"""
+    sentences: List[Tuple[str, str]] = []
+    pos = 0
+    for match in _SENTENCE_END_RE.finditer(paragraph):
+        sentences.append((paragraph[pos:match.end(1)], match.group(2)))
+        pos = match.end()
+    if pos < len(paragraph):
+        sentences.append((paragraph[pos:], ""))
+    return sentences
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    """在没有可用边界时按长度强制拆分"""
+    step = max(1, len(text) * max_tokens // max(estimate_tokens(text), 1))
+    return [text[i:i + step] for i in range(0, len(text), step)]
+
+def _split_units(text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """将文本拆成不超过预算的最小单元：优先段落，其次句子，最后强制拆分"""
+    parts = _PARAGRAPH_RE.split(text)
+    units: List[Tuple[str, str]] = []
+    for i in range(0, len(parts), 2):
+        paragraph = parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else ""
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append((paragraph, separator))
+            continue
+
+        sentences = split_sentences(paragraph)
+        for j, (sentence, sentence_sep) in enumerate(sentences):
+            if j == len(sentences) - 1:
+                sentence_sep += separator
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append((sentence, sentence_sep))
+                continue
+            pieces = _hard_split(sentence, max_tokens)
+            units.extend((piece, "") for piece in pieces[:-1])
+            units.append((pieces[-1], sentence_sep))
+    return units
+
+def split_text(text: str, max_tokens: int) -> List[TextChunk]:
+    """按token预算将长文本拆分为多个块，尽量在段落和句子边界处断开"""
+    chunks: List[TextChunk] = []
+    current = ""
+    current_tokens = 0
+    pending_sep = ""
+
+    for unit, separator in _split_units(text, max_tokens):
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append(TextChunk(current, pending_sep))
+            current, current_tokens = "", 0
+        else:
+            current += pending_sep
+        current += unit
+        current_tokens += unit_tokens
+        pending_sep = separator
+
+    if current or not chunks:
+        chunks.append(TextChunk(current, pending_sep))
+    return chunks
+
+def join_chunks(translated: List[str], chunks: List[TextChunk]) -> str:
+    """按原始分隔符将译文块重新拼接"""
+    return "".join(text + chunk.separator for text, chunk in zip(translated, chunks))
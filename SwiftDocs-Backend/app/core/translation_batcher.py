@@ -0,0 +1,89 @@
+import re
+import json
+from typing import List, Optional, Dict
+from .config import settings
+
+# CJK字符（汉字、假名、韩文）大致按每字一个token估算
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+# 各提供商接口自身的批量上限，与全局配置取较小值
+PROVIDER_BATCH_LIMITS: Dict[str, Dict[str, int]] = {
+    "google": {"max_segments": 128, "max_chars": 30000},
+    "baidu": {"max_chars": 2000},
+}
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数量"""
+    cjk_count = len(_CJK_RE.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+def get_batch_limits(provider: str) -> Dict[str, int]:
+    """获取指定提供商的批量限制"""
+    limits = {
+        "max_chars": settings.TRANSLATION_BATCH_MAX_CHARS,
+        "max_tokens": settings.TRANSLATION_BATCH_MAX_TOKENS,
+        "max_segments": settings.TRANSLATION_BATCH_MAX_SEGMENTS,
+    }
+    for name, value in PROVIDER_BATCH_LIMITS.get(provider, {}).items():
+        limits[name] = min(limits[name], value)
+    return limits
+
+def pack_batches(
+    texts: List[str],
+    max_chars: int,
+    max_tokens: Optional[int] = None,
+    max_segments: Optional[int] = None
+) -> List[List[int]]:
+    """按顺序将文本打包成批次，返回每个批次中文本的下标
+
+    超出预算的单个文本单独成批，由调用方决定如何处理。
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    chars = 0
+    tokens = 0
+
+    for index, text in enumerate(texts):
+        text_chars = len(text)
+        text_tokens = estimate_tokens(text) if max_tokens else 0
+        exceeds = (
+            chars + text_chars > max_chars
+            or (max_tokens and tokens + text_tokens > max_tokens)
+            or (max_segments and len(current) >= max_segments)
+        )
+        if current and exceeds:
+            batches.append(current)
+            current, chars, tokens = [], 0, 0
+        current.append(index)
+        chars += text_chars
+        tokens += text_tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+class BatchSplitError(ValueError):
+    """批量翻译结果无法与原文逐条对应"""
+
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+def build_llm_batch_payload(texts: List[str]) -> str:
+    """将多个文本编码为JSON数组，作为大模型的输入"""
+    return json.dumps(texts, ensure_ascii=False)
+
+def split_llm_batch_response(content: str, expected: int) -> List[str]:
+    """解析大模型返回的JSON数组，并校验条数"""
+    content = _CODE_FENCE_RE.sub("", content.strip())
+    start = content.find("[")
+    end = content.rfind("]")
+    if start == -1 or end == -1:
+        raise BatchSplitError("批量翻译结果不是JSON数组")
+    try:
+        items = json.loads(content[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise BatchSplitError(f"批量翻译结果解析失败: {str(e)}")
+    if not isinstance(items, list) or len(items) != expected:
+        raise BatchSplitError(f"批量翻译结果条数不匹配: 期望{expected}条")
+    if not all(isinstance(item, str) for item in items):
+        raise BatchSplitError("批量翻译结果包含非字符串元素")
+    return [item.strip() for item in items]
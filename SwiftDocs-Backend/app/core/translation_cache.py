@@ -0,0 +1,143 @@
+import time
+import hashlib
+import threading
+import unicodedata
+import re
+import redis
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+from .config import settings
+from .redis_client import redis_client as default_redis_client
+from .logger import translation_logger
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+class TranslationCache:
+    """翻译记忆缓存，包含进程内LRU层和Redis共享层"""
+
+    INDEX_KEY = "tm:index"
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        local_size: Optional[int] = None,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None
+    ):
+        """初始化缓存"""
+        self.redis_client = redis_client if redis_client is not None else default_redis_client
+        self.local_size = local_size if local_size is not None else settings.TRANSLATION_CACHE_LOCAL_SIZE
+        self.ttl = ttl if ttl is not None else settings.TRANSLATION_CACHE_TTL
+        self.max_entries = max_entries if max_entries is not None else settings.TRANSLATION_CACHE_MAX_ENTRIES
+        self._local: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """规范化源文本：统一Unicode形式并折叠空白"""
+        text = unicodedata.normalize("NFKC", text)
+        return _WHITESPACE_RE.sub(" ", text).strip()
+
+    def make_key(self, text: str, source_lang: str, target_lang: str, provider: str, model: str) -> str:
+        """生成缓存键"""
+        digest = hashlib.sha256(self.normalize_text(text).encode("utf-8")).hexdigest()
+        return f"tm:{provider}:{model}:{source_lang}:{target_lang}:{digest}"
+
+    def _get_local(self, key: str) -> Optional[str]:
+        """从进程内LRU读取"""
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: str) -> None:
+        """写入进程内LRU，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._local[key] = (value, time.time() + self.ttl)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """批量读取缓存，返回命中的键值"""
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        for key in keys:
+            value = self._get_local(key)
+            if value is not None:
+                found[key] = value
+                self.metrics["local_hits"] += 1
+            else:
+                missing.append(key)
+
+        if missing:
+            try:
+                values = self.redis_client.mget(missing)
+                now = time.time()
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, value in zip(missing, values):
+                    if value is not None:
+                        found[key] = value
+                        self._set_local(key, value)
+                        # 刷新访问时间，供基于容量的LRU淘汰使用
+                        pipe.zadd(self.INDEX_KEY, {key: now})
+                        self.metrics["shared_hits"] += 1
+                pipe.execute()
+            except redis.RedisError as e:
+                translation_logger.warning(f"读取共享翻译缓存失败: {str(e)}")
+
+        self.metrics["misses"] += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        """读取单条缓存"""
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        """批量写入缓存"""
+        if not items:
+            return
+        for key, value in items.items():
+            self._set_local(key, value)
+
+        try:
+            now = time.time()
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, value, ex=self.ttl)
+                pipe.zadd(self.INDEX_KEY, {key: now})
+            pipe.zcard(self.INDEX_KEY)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                self._evict(size - self.max_entries)
+        except redis.RedisError as e:
+            translation_logger.warning(f"写入共享翻译缓存失败: {str(e)}")
+
+    def set(self, key: str, value: str) -> None:
+        """写入单条缓存"""
+        self.set_many({key: value})
+
+    def _evict(self, count: int) -> None:
+        """按最久未访问顺序淘汰共享层中的条目"""
+        evicted = self.redis_client.zpopmin(self.INDEX_KEY, count)
+        if evicted:
+            self.redis_client.delete(*[key for key, _ in evicted])
+
+    def clear_local(self) -> None:
+        """清空进程内缓存"""
+        with self._lock:
+            self._local.clear()
+
+    def get_metrics(self) -> Dict[str, int]:
+        """获取缓存命中统计"""
+        return {**self.metrics, "local_size": len(self._local)}
+
+# 创建全局翻译缓存实例
+translation_cache = TranslationCache()
@@ -1,11 +1,85 @@
 import json
-import httpx
+import asyncio
 import hashlib
 import time
 import random
-from typing import Optional, Dict, Any
+import httpx
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple, List, Set, Callable, Awaitable, TypeVar, AsyncIterator, AsyncIterable
 from .config import settings
 from .task_manager import task_manager
+from .http_client import http_client_pool
+from .translation_cache import translation_cache
+from .translation_batcher import (
+    BatchSplitError,
+    build_llm_batch_payload,
+    split_llm_batch_response,
+    get_batch_limits,
+    pack_batches,
+    estimate_tokens
+)
+from .text_chunker import split_text, join_chunks
+from .segment_dedup import plan_segments, expand_translations, normalize_segment
+from .pdf_processor import PDFProcessor
+from .glossary import glossary_registry
+from .language_detector import has_letters, filter_segments
+from .fuzzy_memory import fuzzy_memory, build_reference_prompt, FuzzyCandidate
+from .revision_tracker import revision_tracker, segment_hash, document_id
+from .rate_limiter import rate_limiter
+from .single_flight import single_flight
+from .provider_router import provider_router
+from .provider_stats import provider_stats
+from .circuit_breaker import circuit_breaker, OPEN
+from .exceptions import ProviderError, CircuitOpenError
+from .logger import translation_logger
+
+# 各翻译服务提供商使用的模型，同时作为翻译缓存键的一部分
+PROVIDER_MODELS = {
+    "openai": "gpt-3.5-turbo",
+    "deepseek": "deepseek-chat",
+    "baidu": "baidu-vip",
+    "google": "google-v2"
+}
+
+PROVIDER_NAMES = {
+    "openai": "OpenAI",
+    "deepseek": "DeepSeek",
+    "baidu": "百度翻译",
+    "google": "Google翻译"
+}
+
+# 百度翻译以HTTP 200返回的错误码中，属于限流或上游过载的部分
+BAIDU_RETRYABLE_ERRORS = {
+    "54003": 429,  # 访问频率受限
+    "52001": 503,  # 请求超时
+    "52002": 503,  # 系统错误
+}
+
+T = TypeVar("T")
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头，支持秒数和HTTP日期两种格式"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+TRANSLATE_PROMPT = (
+    "你是一个专业的翻译助手。请将以下文本翻译成{target_lang}，保持原文的格式和语气。"
+    "文本中形如⟦0⟧的占位符必须原样保留。只返回翻译结果，不要包含任何解释或其他内容。"
+)
+
+BATCH_TRANSLATE_PROMPT = (
+    "你是一个专业的翻译助手。用户会提供一个JSON字符串数组，请将数组中的每个元素分别翻译成{target_lang}，"
+    "保持原文的格式和语气，形如⟦0⟧的占位符必须原样保留。返回一个长度相同、顺序一一对应的JSON字符串数组，"
+    "只返回JSON数组，不要包含任何解释或其他内容。"
+)
 
 class TranslationProcessor:
     """翻译处理器类，用于处理文本翻译"""
@@ -19,60 +93,51 @@ class TranslationProcessor:
             "google": self._translate_with_google
         }
         
+    def _provider_error(self, provider: str, response: httpx.Response) -> ProviderError:
+        """根据HTTP响应构造提供商错误"""
+        return ProviderError(
+            f"{PROVIDER_NAMES[provider]} API请求失败: {response.text}",
+            provider,
+            upstream_status=response.status_code,
+            retry_after=parse_retry_after(response.headers.get("Retry-After"))
+        )
+        
+    async def _chat_completion(self, provider: str, api_key: str, system_prompt: str, content: str) -> str:
+        """调用OpenAI兼容的对话补全接口"""
+        client = http_client_pool.get_client(provider)
+        response = await client.post(
+            "/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": PROVIDER_MODELS[provider],
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content}
+                ],
+                "temperature": 0.3
+            },
+            timeout=30.0
+        )
+        
+        if response.status_code != 200:
+            raise self._provider_error(provider, response)
+            
+        result = response.json()
+        return result["choices"][0]["message"]["content"].strip()
+        
     async def _translate_with_openai(self, text: str, target_lang: str, api_key: str) -> str:
         """使用OpenAI进行翻译"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": [
-                        {"role": "system", "content": f"你是一个专业的翻译助手。请将以下文本翻译成{target_lang}，保持原文的格式和语气。只返回翻译结果，不要包含任何解释或其他内容。"},
-                        {"role": "user", "content": text}
-                    ],
-                    "temperature": 0.3
-                },
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                raise ValueError(f"OpenAI API请求失败: {response.text}")
-                
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
-            
+        return await self._chat_completion("openai", api_key, TRANSLATE_PROMPT.format(target_lang=target_lang), text)
+        
     async def _translate_with_deepseek(self, text: str, target_lang: str, api_key: str) -> str:
         """使用DeepSeek进行翻译"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [
-                        {"role": "system", "content": f"你是一个专业的翻译助手。请将以下文本翻译成{target_lang}，保持原文的格式和语气。只返回翻译结果，不要包含任何解释或其他内容。"},
-                        {"role": "user", "content": text}
-                    ],
-                    "temperature": 0.3
-                },
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                raise ValueError(f"DeepSeek API请求失败: {response.text}")
-                
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
-            
-    async def _translate_with_baidu(self, text: str, target_lang: str, app_id: str, app_key: str) -> str:
-        """使用百度翻译API进行翻译"""
+        return await self._chat_completion("deepseek", api_key, TRANSLATE_PROMPT.format(target_lang=target_lang), text)
+        
+    async def _baidu_request(self, text: str, target_lang: str, app_id: str, app_key: str) -> List[str]:
+        """请求百度翻译API，返回按行对应的译文"""
         # 准备请求参数
         salt = str(random.randint(32768, 65536))
         sign = hashlib.md5(f"{app_id}{text}{salt}{app_key}".encode()).hexdigest()
@@ -86,41 +151,902 @@ class TranslationProcessor:
             "sign": sign
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.fanyi.baidu.com/api/trans/vip/translate",
-                params=params,
-                timeout=10.0
+        # 使用表单POST，避免批量文本超出URL长度限制
+        client = http_client_pool.get_client("baidu")
+        response = await client.post(
+            "/api/trans/vip/translate",
+            data=params,
+            timeout=10.0
+        )
+        
+        if response.status_code != 200:
+            raise self._provider_error("baidu", response)
+            
+        result = response.json()
+        if "error_code" in result:
+            raise ProviderError(
+                f"百度翻译API错误: {result['error_msg']}",
+                "baidu",
+                upstream_status=BAIDU_RETRYABLE_ERRORS.get(str(result["error_code"]))
             )
             
-            if response.status_code != 200:
-                raise ValueError(f"百度翻译API请求失败: {response.text}")
-                
-            result = response.json()
-            if "error_code" in result:
-                raise ValueError(f"百度翻译API错误: {result['error_msg']}")
-                
-            return "\n".join(item["dst"] for item in result["trans_result"])
+        return [item["dst"] for item in result["trans_result"]]
+        
+    async def _translate_with_baidu(self, text: str, target_lang: str, app_id: str, app_key: str) -> str:
+        """使用百度翻译API进行翻译"""
+        return "\n".join(await self._baidu_request(text, target_lang, app_id, app_key))
+        
+    async def _google_request(self, texts: List[str], target_lang: str, api_key: str) -> List[str]:
+        """请求Google Cloud Translation API，q数组与译文一一对应"""
+        client = http_client_pool.get_client("google")
+        response = await client.post(
+            "/language/translate/v2",
+            params={"key": api_key},
+            json={
+                "q": texts,
+                "target": target_lang,
+                "format": "text"
+            },
+            timeout=10.0
+        )
+        
+        if response.status_code != 200:
+            raise self._provider_error("google", response)
             
+        result = response.json()
+        return [item["translatedText"] for item in result["data"]["translations"]]
+        
     async def _translate_with_google(self, text: str, target_lang: str, api_key: str) -> str:
         """使用Google Cloud Translation API进行翻译"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"https://translation.googleapis.com/language/translate/v2?key={api_key}",
-                json={
-                    "q": text,
-                    "target": target_lang,
-                    "format": "text"
-                },
-                timeout=10.0
+        return (await self._google_request([text], target_lang, api_key))[0]
+        
+    @staticmethod
+    def _with_references(prompt: str, references: Optional[List[FuzzyCandidate]]) -> str:
+        """在系统提示词后附加相似片段的历史译文"""
+        if not references:
+            return prompt
+        fuzzy_memory.metrics["referenced"] += 1
+        return f"{prompt}\n\n{build_reference_prompt(references)}"
+        
+    async def _translate_batch_with_llm(
+        self,
+        provider: str,
+        texts: List[str],
+        target_lang: str,
+        api_key: str,
+        references: Optional[List[FuzzyCandidate]] = None
+    ) -> List[str]:
+        """使用大模型批量翻译，输入输出均为JSON字符串数组"""
+        content = await self._chat_completion(
+            provider,
+            api_key,
+            self._with_references(BATCH_TRANSLATE_PROMPT.format(target_lang=target_lang), references),
+            build_llm_batch_payload(texts)
+        )
+        return split_llm_batch_response(content, len(texts))
+        
+    async def _translate_batch_with_baidu(self, texts: List[str], target_lang: str, app_id: str, app_key: str) -> List[str]:
+        """使用百度翻译批量翻译，多段文本按换行拼接后通过trans_result逐行对应"""
+        # 段内换行会被百度拆成多条结果，需先折叠为空格
+        lines = [" ".join(text.split()) for text in texts]
+        results = await self._baidu_request("\n".join(lines), target_lang, app_id, app_key)
+        if len(results) != len(texts):
+            raise BatchSplitError(f"百度翻译结果条数不匹配: 期望{len(texts)}条，实际{len(results)}条")
+        return results
+        
+    @staticmethod
+    def _get_api_key(provider: str, api_keys: Dict[str, str]) -> str:
+        """获取用于限速和统计的API密钥"""
+        return api_keys["baidu_app_id"] if provider == "baidu" else api_keys[provider]
+        
+    async def _call_with_limits(
+        self,
+        provider: str,
+        api_keys: Dict[str, str],
+        request: Callable[[], Awaitable[T]],
+        chars: int = 0
+    ) -> T:
+        """在限速与自适应并发控制下调用提供商，限流或过载时遵守Retry-After重试"""
+        api_key = self._get_api_key(provider, api_keys)
+        for attempt in range(settings.PROVIDER_MAX_RETRIES + 1):
+            # 断路器打开时不再等待超时，直接失败以便调用方故障转移
+            if not circuit_breaker.allow(provider):
+                raise CircuitOpenError(provider, circuit_breaker.get_status(provider)["retry_in"])
+            async with rate_limiter.limit(provider, api_key) as limiter:
+                start = time.monotonic()
+                try:
+                    result = await request()
+                except (httpx.HTTPError, ProviderError) as e:
+                    self._record_call(provider, api_key, limiter, time.monotonic() - start, error=e)
+                    if not isinstance(e, ProviderError) or not e.retryable or attempt >= settings.PROVIDER_MAX_RETRIES:
+                        raise
+                    retry_after = e.retry_after
+                else:
+                    self._record_call(provider, api_key, limiter, time.monotonic() - start, chars=chars)
+                    return result
+            # 有Retry-After时令牌桶已暂停，否则指数退避
+            if not retry_after:
+                await asyncio.sleep(0.5 * 2 ** attempt + random.random() * 0.1)
+                
+    @staticmethod
+    def _record_call(
+        provider: str,
+        api_key: str,
+        limiter: Any,
+        seconds: float,
+        chars: int = 0,
+        error: Optional[Exception] = None
+    ) -> None:
+        """记录一次上游调用的结果，更新自适应并发、断路器和提供商统计
+        
+        超时和限流降低并发与速率；网络错误和5xx计为断路器失败，4xx等客户端错误只计入错误率。
+        """
+        if error is None:
+            limiter.concurrency.on_success()
+            circuit_breaker.record_success(provider)
+            provider_stats.record(provider, api_key, seconds, chars=chars)
+            return
+        if isinstance(error, httpx.TimeoutException):
+            limiter.on_overload()
+        elif isinstance(error, ProviderError) and error.retryable:
+            limiter.on_overload(error.retry_after)
+        if isinstance(error, httpx.HTTPError) or (
+            isinstance(error, ProviderError) and error.upstream_status is not None and error.upstream_status >= 500
+        ):
+            circuit_breaker.record_failure(provider)
+        provider_stats.record(provider, api_key, seconds, failed=True)
+                
+    async def _call_routed(
+        self,
+        provider: str,
+        api_keys: Dict[str, str],
+        mode: str,
+        call: Callable[[str], Awaitable[T]]
+    ) -> Tuple[T, str]:
+        """按请求模式的路由策略调用提供商，返回结果及实际提供服务的提供商"""
+        policy = provider_router.get_policy(mode)
+        candidates = [provider]
+        if policy["hedge"] or policy["failover"]:
+            # 断路器打开的提供商不作为对冲或故障转移目标
+            available = [
+                candidate for candidate in self.get_available_providers(api_keys)
+                if circuit_breaker.get_state(candidate) != OPEN
+            ]
+            candidates += provider_router.get_alternates(provider, available)
+        return await provider_router.run(candidates, call, hedge=policy["hedge"], failover=policy["failover"])
+        
+    async def _call_provider(
+        self,
+        provider: str,
+        text: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        references: Optional[List[FuzzyCandidate]] = None
+    ) -> str:
+        """调用翻译服务提供商"""
+        return await self._call_with_limits(
+            provider,
+            api_keys,
+            lambda: self._invoke_provider(provider, text, target_lang, api_keys, references),
+            chars=len(text)
+        )
+        
+    async def _invoke_provider(
+        self,
+        provider: str,
+        text: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        references: Optional[List[FuzzyCandidate]] = None
+    ) -> str:
+        """直接请求翻译服务提供商，大模型可附带相似片段的历史译文作为参考"""
+        if references and provider in ("openai", "deepseek"):
+            return await self._chat_completion(
+                provider,
+                api_keys[provider],
+                self._with_references(TRANSLATE_PROMPT.format(target_lang=target_lang), references),
+                text
+            )
+        if provider == "baidu":
+            return await self._translate_with_baidu(
+                text,
+                target_lang,
+                api_keys["baidu_app_id"],
+                api_keys["baidu_app_key"]
             )
+        return await self.providers[provider](
+            text,
+            target_lang,
+            api_keys[provider]
+        )
+        
+    async def _call_provider_batch(
+        self,
+        provider: str,
+        texts: List[str],
+        target_lang: str,
+        api_keys: Dict[str, str],
+        references: Optional[List[FuzzyCandidate]] = None
+    ) -> List[str]:
+        """批量调用翻译服务提供商，结果无法逐条对应时退回逐条翻译"""
+        if len(texts) == 1:
+            return [await self._call_provider(provider, texts[0], target_lang, api_keys, references)]
+            
+        async def request() -> List[str]:
+            if provider == "google":
+                return await self._google_request(texts, target_lang, api_keys["google"])
+            if provider == "baidu":
+                return await self._translate_batch_with_baidu(
+                    texts,
+                    target_lang,
+                    api_keys["baidu_app_id"],
+                    api_keys["baidu_app_key"]
+                )
+            return await self._translate_batch_with_llm(provider, texts, target_lang, api_keys[provider], references)
             
-            if response.status_code != 200:
-                raise ValueError(f"Google翻译API请求失败: {response.text}")
+        try:
+            return await self._call_with_limits(provider, api_keys, request, chars=sum(len(text) for text in texts))
+        except BatchSplitError as e:
+            translation_logger.warning(f"{provider}批量翻译结果无法拆分，改为逐条翻译: {str(e)}")
+            return [await self._call_provider(provider, text, target_lang, api_keys, references) for text in texts]
+        
+    async def translate(
+        self,
+        text: str,
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "full",
+        glossary: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """翻译文本，返回译文及是否命中缓存
+        
+        不含字母的文本（纯数字、符号）直接返回原文；是否已是目标语言只在translate_segments中逐片段判断，
+        整段文本可能混有需要翻译的句子，不在此跳过。
+        术语和受保护片段在翻译前替换为占位符，缓存按遮蔽后的文本保存，翻译后再还原。
+        """
+        if settings.LANGUAGE_SKIP_ENABLED and not has_letters(text):
+            return text, False
+        protector = glossary_registry.get(glossary)
+        masked_text, replacements = protector.mask(text, target_lang)
+        translated_text, cached = await self._translate_text(masked_text, provider, target_lang, api_keys, source_lang, mode, glossary)
+        return protector.restore(translated_text, replacements), cached
+        
+    async def _translate_text(
+        self,
+        text: str,
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "full",
+        glossary: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """翻译文本，优先使用翻译记忆缓存，返回译文及是否命中缓存
+        
+        glossary只用于划分模糊翻译记忆，术语已在调用前遮蔽。
+        """
+        provider = self.resolve_provider(provider, api_keys)
+        references: List[FuzzyCandidate] = []
+        
+        async def call(candidate: str) -> str:
+            return await self._call_provider(candidate, text, target_lang, api_keys, references)
+            
+        if not settings.TRANSLATION_CACHE_ENABLED or not text.strip():
+            translated_text, _ = await self._call_routed(provider, api_keys, mode, call)
+            return translated_text, False
+            
+        cache_key = translation_cache.make_key(text, source_lang, target_lang, provider, PROVIDER_MODELS[provider])
+        cached = await asyncio.to_thread(translation_cache.get, cache_key)
+        if cached is not None:
+            return cached, True
+            
+        # 模糊翻译记忆：仅数字不同的历史译文直接复用，其余相似译文作为大模型的参考
+        references.extend(await asyncio.to_thread(
+            fuzzy_memory.lookup, text, source_lang, target_lang, provider, PROVIDER_MODELS[provider], glossary
+        ))
+        reused = fuzzy_memory.reuse(text, references)
+        if reused is not None:
+            return reused, True
+            
+        async def request() -> str:
+            translated_text, served_by = await self._call_routed(provider, api_keys, mode, call)
+            # 对冲或故障转移时按实际提供服务的提供商写入缓存，同时写入请求的键，
+            # 其他工作进程中等待合并结果的请求按请求的键读取
+            served_key = translation_cache.make_key(text, source_lang, target_lang, served_by, PROVIDER_MODELS[served_by])
+            await asyncio.to_thread(translation_cache.set_many, {cache_key: translated_text, served_key: translated_text})
+            await asyncio.to_thread(
+                fuzzy_memory.add, text, translated_text, source_lang, target_lang, served_by, PROVIDER_MODELS[served_by], glossary
+            )
+            return translated_text
+            
+        # 相同文本的并发请求合并为一次上游调用
+        if settings.SINGLE_FLIGHT_ENABLED:
+            translated_text = await single_flight.do(cache_key, request, lambda: translation_cache.get(cache_key))
+        else:
+            translated_text = await request()
+        return translated_text, False
+        
+    async def _stream_chat_completion(
+        self,
+        provider: str,
+        api_key: str,
+        system_prompt: str,
+        content: str
+    ) -> AsyncIterator[str]:
+        """以流式方式调用OpenAI兼容的对话补全接口，逐段产出增量文本
+        
+        与非流式调用共用限速、断路器和提供商统计，流式流量同样影响provider=auto的选择和对冲延迟。
+        """
+        if not circuit_breaker.allow(provider):
+            raise CircuitOpenError(provider, circuit_breaker.get_status(provider)["retry_in"])
+        client = http_client_pool.get_client(provider)
+        async with rate_limiter.limit(provider, api_key) as limiter:
+            start = time.monotonic()
+            try:
+                async with client.stream(
+                    "POST",
+                    "/v1/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json={
+                        "model": PROVIDER_MODELS[provider],
+                        "messages": [
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": content}
+                        ],
+                        "temperature": 0.3,
+                        "stream": True
+                    },
+                    timeout=30.0
+                ) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise self._provider_error(provider, response)
+                        
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                        if delta:
+                            yield delta
+            except (httpx.HTTPError, ProviderError) as e:
+                self._record_call(provider, api_key, limiter, time.monotonic() - start, error=e)
+                raise
+            elapsed = time.monotonic() - start
+            self._record_call(provider, api_key, limiter, elapsed, chars=len(content))
+            provider_router.latency.record(provider, elapsed)
+            
+    async def stream_translation(
+        self,
+        text: str,
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "selection",
+        glossary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """流式翻译文本，逐段产出译文
+        
+        OpenAI/DeepSeek使用流式接口逐token产出，其他提供商按分块逐块产出。
+        包含术语或受保护片段的分块需要还原占位符，按整块产出。
+        """
+        protector = glossary_registry.get(glossary)
+        provider = self.resolve_provider(provider, api_keys)
+        if provider not in self.providers:
+            raise ValueError(f"不支持的翻译提供商: {provider}")
+        if not self.validate_api_keys(provider, api_keys):
+            raise ValueError(f"未配置{provider}的API密钥")
+            
+        for chunk in split_text(text, settings.TRANSLATION_CHUNK_MAX_TOKENS):
+            if not chunk.text.strip():
+                yield chunk.text
+            elif provider in ("openai", "deepseek") and not protector.mask(chunk.text, target_lang)[1]:
+                cache_key = translation_cache.make_key(chunk.text, source_lang, target_lang, provider, PROVIDER_MODELS[provider])
+                cached = await asyncio.to_thread(translation_cache.get, cache_key) if settings.TRANSLATION_CACHE_ENABLED else None
+                if cached is not None:
+                    yield cached
+                else:
+                    parts: List[str] = []
+                    try:
+                        async for delta in self._stream_chat_completion(
+                            provider,
+                            api_keys[provider],
+                            TRANSLATE_PROMPT.format(target_lang=target_lang),
+                            chunk.text
+                        ):
+                            parts.append(delta)
+                            yield delta
+                    except (httpx.HTTPError, ProviderError) as e:
+                        if parts:
+                            raise
+                        # 尚未产出译文时按路由策略重试或故障转移，整块产出
+                        translation_logger.warning(f"{provider}流式翻译失败，改为路由翻译: {str(e)}")
+                        translated_text, _ = await self.translate(chunk.text, provider, target_lang, api_keys, source_lang, mode, glossary)
+                        yield translated_text
+                    else:
+                        if settings.TRANSLATION_CACHE_ENABLED:
+                            await asyncio.to_thread(translation_cache.set, cache_key, "".join(parts).strip())
+            else:
+                translated_text, _ = await self.translate(chunk.text, provider, target_lang, api_keys, source_lang, mode, glossary)
+                yield translated_text
+            if chunk.separator:
+                yield chunk.separator
                 
-            result = response.json()
-            return result["data"]["translations"][0]["translatedText"]
+    async def translate_segments(
+        self,
+        segments: List[str],
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "full",
+        glossary: Optional[str] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> List[str]:
+        """批量翻译多个文本片段
+        
+        纯数字、符号以及已是目标语言的片段不发给提供商，原样返回，跳过的数量累加到stats["skipped"]。
+        术语和受保护片段在翻译前遮蔽、翻译后还原。
+        """
+        needed = filter_segments(segments, target_lang)
+        if stats is not None:
+            stats["skipped"] = stats.get("skipped", 0) + sum(
+                1 for segment, need in zip(segments, needed) if segment.strip() and not need
+            )
+        pending = [index for index, need in enumerate(needed) if need]
+        results = list(segments)
+        if not pending:
+            return results
+            
+        protector = glossary_registry.get(glossary)
+        masked = [protector.mask(segments[index], target_lang) for index in pending]
+        translations = await self._translate_segments(
+            [masked_text for masked_text, _ in masked],
+            provider,
+            target_lang,
+            api_keys,
+            source_lang,
+            mode,
+            glossary
+        )
+        for index, translation, (_, replacements) in zip(pending, translations, masked):
+            results[index] = protector.restore(translation, replacements)
+        return results
+        
+    async def _translate_segments(
+        self,
+        segments: List[str],
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "full",
+        glossary: Optional[str] = None
+    ) -> List[str]:
+        """批量翻译多个文本片段，未命中缓存的片段按预算打包后一次请求翻译
+        
+        glossary只用于划分模糊翻译记忆，术语已在调用前遮蔽。
+        """
+        results: List[Optional[str]] = [segment if not segment.strip() else None for segment in segments]
+        pending = [index for index, segment in enumerate(segments) if results[index] is None]
+        
+        # 自动选择时每个批次分别选择提供商，任一提供商缓存的译文均可复用
+        candidates = self.get_available_providers(api_keys) if provider == "auto" else [provider]
+        
+        # 查询翻译记忆缓存
+        if settings.TRANSLATION_CACHE_ENABLED:
+            for candidate in candidates:
+                if not pending:
+                    break
+                model = PROVIDER_MODELS[candidate]
+                keys = {
+                    index: translation_cache.make_key(segments[index], source_lang, target_lang, candidate, model)
+                    for index in pending
+                }
+                cached = await asyncio.to_thread(translation_cache.get_many, list(set(keys.values())))
+                for index in pending:
+                    if keys[index] in cached:
+                        results[index] = cached[keys[index]]
+                pending = [index for index in pending if results[index] is None]
+            
+        # 相同文本只翻译一次
+        unique_texts: List[str] = []
+        positions: Dict[str, List[int]] = {}
+        for index in pending:
+            text = segments[index]
+            if text not in positions:
+                positions[text] = []
+                unique_texts.append(text)
+            positions[text].append(index)
+            
+        # 模糊翻译记忆：仅数字不同的历史译文直接复用，其余相似译文作为大模型的参考
+        # 与翻译缓存一样只复用同一提供商和模型的历史译文，自动选择时依次查询各候选提供商
+        references: Dict[str, List[FuzzyCandidate]] = {}
+        for candidate in candidates:
+            if not unique_texts:
+                break
+            found_many = await asyncio.to_thread(
+                fuzzy_memory.lookup_many,
+                unique_texts, source_lang, target_lang, candidate, PROVIDER_MODELS[candidate], glossary
+            )
+            for text, found in zip(unique_texts, found_many):
+                reused = fuzzy_memory.reuse(text, found)
+                if reused is not None:
+                    for index in positions.pop(text):
+                        results[index] = reused
+                elif found:
+                    references.setdefault(text, found)
+            unique_texts = [text for text in unique_texts if text in positions]
             
+        # 各批次在并发上限内同时请求
+        limits = {
+            name: min(get_batch_limits(candidate)[name] for candidate in candidates)
+            for name in get_batch_limits(provider)
+        } if candidates else get_batch_limits(provider)
+        semaphore = asyncio.Semaphore(settings.TRANSLATION_MAX_CONCURRENCY)
+        
+        async def run_batch(texts: List[str]) -> None:
+            batch_provider = self.resolve_provider(provider, api_keys)
+            batch_keys = [
+                translation_cache.make_key(text, source_lang, target_lang, batch_provider, PROVIDER_MODELS[batch_provider])
+                for text in texts
+            ] if settings.TRANSLATION_CACHE_ENABLED else []
+            batch_references = sorted(
+                {candidate.source: candidate for text in texts for candidate in references.get(text, [])}.values(),
+                key=lambda candidate: candidate.similarity,
+                reverse=True
+            )[:settings.FUZZY_MEMORY_MAX_REFERENCES]
+            
+            async def call(candidate: str) -> List[str]:
+                return await self._call_provider_batch(candidate, texts, target_lang, api_keys, batch_references)
+                
+            async def request() -> List[str]:
+                async with semaphore:
+                    translations, served_by = await self._call_routed(batch_provider, api_keys, mode, call)
+                if batch_keys:
+                    items = dict(zip(batch_keys, translations))
+                    if served_by != batch_provider:
+                        # 同时按实际提供服务的提供商写入，请求的键供其他工作进程中等待合并结果的批次读取
+                        items.update(
+                            (translation_cache.make_key(text, source_lang, target_lang, served_by, PROVIDER_MODELS[served_by]), translation)
+                            for text, translation in zip(texts, translations)
+                        )
+                    await asyncio.to_thread(translation_cache.set_many, items)
+                await asyncio.to_thread(
+                    fuzzy_memory.add_many,
+                    list(zip(texts, translations)), source_lang, target_lang, served_by, PROVIDER_MODELS[served_by], glossary
+                )
+                return translations
+                
+            def lookup() -> Optional[List[str]]:
+                cached = translation_cache.get_many(batch_keys)
+                return [cached[key] for key in batch_keys] if all(key in cached for key in batch_keys) else None
+                
+            # 内容相同的批次（例如多人同时打开同一文档）合并为一次上游调用
+            if batch_keys and settings.SINGLE_FLIGHT_ENABLED:
+                flight_key = hashlib.sha256("|".join(batch_keys).encode()).hexdigest()
+                translations = await single_flight.do(f"batch:{flight_key}", request, lookup)
+            else:
+                translations = await request()
+            for text, translation in zip(texts, translations):
+                for index in positions[text]:
+                    results[index] = translation
+                        
+        batches = pack_batches(unique_texts, limits["max_chars"], limits["max_tokens"], limits["max_segments"])
+        await asyncio.gather(*(run_batch([unique_texts[i] for i in batch]) for batch in batches))
+        return results
+        
+    async def translate_pages(
+        self,
+        pages: Dict[int, List[str]],
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "full",
+        glossary: Optional[str] = None
+    ) -> Tuple[Dict[int, List[str]], Dict[str, int]]:
+        """跨页去重后翻译各页片段，返回各页译文及去重统计
+        
+        页眉、页脚、图注等在各页重复出现的片段只翻译一次，译文回填到每处出现。
+        """
+        located = [(page_num, text) for page_num, texts in pages.items() for text in texts]
+        segments = [text for _, text in located]
+        plan = plan_segments(segments)
+        stats: Dict[str, int] = {"skipped": 0}
+        translations = await self.translate_segments(
+            plan.unique,
+            provider,
+            target_lang,
+            api_keys,
+            source_lang,
+            mode,
+            glossary,
+            stats
+        )
+        results = expand_translations(segments, plan, translations)
+        
+        # 数字无法与译文对应的近似重复片段单独翻译
+        fallback = [index for index, result in enumerate(results) if result is None]
+        if fallback:
+            retranslated = await self.translate_segments(
+                [normalize_segment(segments[index]) for index in fallback],
+                provider,
+                target_lang,
+                api_keys,
+                source_lang,
+                mode,
+                glossary,
+                stats
+            )
+            for index, translation in zip(fallback, retranslated):
+                results[index] = translation
+                
+        translated_pages: Dict[int, List[str]] = {page_num: [] for page_num in pages}
+        for (page_num, _), translation in zip(located, results):
+            translated_pages[page_num].append(translation)
+        total = sum(1 for group in plan.groups if group >= 0)
+        return translated_pages, {
+            "segments": total,
+            "translated": len(plan.unique) + len(fallback) - stats["skipped"],
+            "deduplicated": total - len(plan.unique) - len(fallback),
+            "skipped": stats["skipped"]
+        }
+        
+    async def translate_revision(
+        self,
+        document: str,
+        pages: Dict[int, List[str]],
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "full",
+        glossary: Optional[str] = None,
+        full_document: bool = True
+    ) -> Tuple[Dict[int, List[str]], Dict[str, int], Dict[str, Any]]:
+        """翻译文档各页片段，文档是旧文档的修订版时只翻译新增或改动的片段
+        
+        以片段指纹识别最相似的已处理文档，未改动片段直接复用其译文，翻译代价与改动量成正比。
+        返回各页译文、去重统计以及修订复用信息。
+        """
+        # 先确定提供商，只复用同一提供商和模型产生的译文
+        provider = self.resolve_provider(provider, api_keys)
+        model = PROVIDER_MODELS[provider]
+        hashes = {page_num: [segment_hash(text) for text in texts] for page_num, texts in pages.items()}
+        all_hashes = [value for values in hashes.values() for value in values if value is not None]
+        match = await asyncio.to_thread(revision_tracker.find_previous, document, all_hashes) if full_document else None
+        sources = [document] + ([match.document_id] if match and match.document_id != document else [])
+        prior = await asyncio.to_thread(
+            revision_tracker.get_translations, sources, provider, model, target_lang, glossary, all_hashes
+        )
+        
+        remaining = {
+            page_num: [text for text, value in zip(texts, hashes[page_num]) if value not in prior]
+            for page_num, texts in pages.items()
+        }
+        translated_remaining, stats = await self.translate_pages(
+            remaining,
+            provider,
+            target_lang,
+            api_keys,
+            source_lang,
+            mode,
+            glossary
+        )
+        
+        translated_pages: Dict[int, List[str]] = {}
+        new_translations: Dict[str, str] = {}
+        reused = 0
+        for page_num, texts in pages.items():
+            translated = iter(translated_remaining[page_num])
+            translated_pages[page_num] = []
+            for value in hashes[page_num]:
+                if value in prior:
+                    translated_pages[page_num].append(prior[value])
+                    reused += 1
+                    continue
+                translation = next(translated)
+                translated_pages[page_num].append(translation)
+                if value is not None:
+                    new_translations[value] = translation
+                    
+        await asyncio.to_thread(
+            revision_tracker.register,
+            document,
+            provider,
+            model,
+            target_lang,
+            glossary,
+            new_translations,
+            all_hashes if full_document else None
+        )
+        revision_tracker.metrics["reused"] += reused
+        revision_tracker.metrics["translated"] += len(all_hashes) - reused
+        return translated_pages, stats, {
+            "document_id": document,
+            "previous_document": match.document_id if match else None,
+            "similarity": round(match.similarity, 3) if match else 0.0,
+            "reused": reused,
+            "translated": len(all_hashes) - reused
+        }
+        
+    async def translate_stream(
+        self,
+        segments: AsyncIterable[Dict[str, Any]],
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        source_lang: str = "auto",
+        mode: str = "full",
+        glossary: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """流式翻译片段序列，每个片段翻译完成即产出
+        
+        segments为异步可迭代的{"id", "text"}，产出{"id", "translated_text"}，失败的片段产出{"id", "error"}。
+        输入按批量预算或刷新间隔分批，每批经过缓存、批量请求和限速，产出顺序为完成顺序。
+        同时进行的批次达到并发上限时暂停读取输入，上游提取速度快于翻译时不会无限堆积。
+        """
+        loop = asyncio.get_running_loop()
+        results: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(settings.TRANSLATION_MAX_CONCURRENCY)
+        running: Set[asyncio.Task] = set()
+        finished = object()
+        
+        async def run_batch(batch: List[Dict[str, Any]]) -> None:
+            try:
+                translations = await self.translate_segments(
+                    [segment["text"] for segment in batch],
+                    provider,
+                    target_lang,
+                    api_keys,
+                    source_lang,
+                    mode,
+                    glossary
+                )
+                for segment, translation in zip(batch, translations):
+                    results.put_nowait({"id": segment["id"], "translated_text": translation})
+            except Exception as e:
+                translation_logger.error(f"流式批次翻译失败: {str(e)}")
+                for segment in batch:
+                    results.put_nowait({"id": segment["id"], "error": str(e)})
+            finally:
+                slots.release()
+                
+        async def flush(batch: List[Dict[str, Any]]) -> None:
+            await slots.acquire()
+            task = asyncio.ensure_future(run_batch(batch))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            
+        async def read() -> None:
+            iterator = segments.__aiter__()
+            batch: List[Dict[str, Any]] = []
+            chars = 0
+            deadline = 0.0
+            next_item: Optional[asyncio.Future] = None
+            error: Optional[Exception] = None
+            try:
+                while True:
+                    # 不能取消__anext__，否则会终止输入的异步生成器，超时后保留等待下一轮继续
+                    if next_item is None:
+                        next_item = asyncio.ensure_future(iterator.__anext__())
+                    timeout = max(0.0, deadline - loop.time()) if batch else None
+                    done, _ = await asyncio.wait({next_item}, timeout=timeout)
+                    if not done:
+                        await flush(batch)
+                        batch, chars = [], 0
+                        continue
+                    try:
+                        segment = next_item.result()
+                    except StopAsyncIteration:
+                        next_item = None
+                        break
+                    next_item = None
+                    if not batch:
+                        deadline = loop.time() + settings.TRANSLATION_STREAM_FLUSH_INTERVAL
+                    batch.append(segment)
+                    chars += len(segment["text"])
+                    if len(batch) >= settings.TRANSLATION_BATCH_MAX_SEGMENTS or chars >= settings.TRANSLATION_BATCH_MAX_CHARS:
+                        await flush(batch)
+                        batch, chars = [], 0
+            except Exception as e:
+                # 输入出错时先产出已读取片段的译文，再抛出错误
+                error = e
+            finally:
+                if next_item is not None:
+                    next_item.cancel()
+            if batch:
+                await flush(batch)
+            await asyncio.gather(*running)
+            results.put_nowait(error if error is not None else finished)
+            
+        reader = asyncio.ensure_future(read())
+        try:
+            while True:
+                item = await results.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            reader.cancel()
+            for task in list(running):
+                task.cancel()
+                
+    async def _translate_chunked(
+        self,
+        task_id: str,
+        text: str,
+        provider: str,
+        target_lang: str,
+        api_keys: Dict[str, str],
+        mode: str = "full",
+        glossary: Optional[str] = None
+    ) -> str:
+        """将长文本分块后并发翻译，每完成一块即保存部分结果，最后按原顺序拼接"""
+        chunks = split_text(text, settings.TRANSLATION_CHUNK_MAX_TOKENS)
+        translated: List[Optional[str]] = [None] * len(chunks)
+        semaphore = asyncio.Semaphore(settings.TRANSLATION_MAX_CONCURRENCY)
+        
+        async def run_chunk(index: int) -> None:
+            async with semaphore:
+                translated[index], _ = await self.translate(
+                    chunks[index].text,
+                    provider,
+                    target_lang,
+                    api_keys,
+                    mode=mode,
+                    glossary=glossary
+                )
+                
+        tasks = [asyncio.ensure_future(run_chunk(index)) for index in range(len(chunks))]
+        try:
+            completed = 0
+            for future in asyncio.as_completed(tasks):
+                await future
+                completed += 1
+                task_manager.update_task(
+                    task_id,
+                    progress=10 + 80 * completed // len(chunks),
+                    result={
+                        "partial": True,
+                        "completed_chunks": completed,
+                        "total_chunks": len(chunks),
+                        "translated_chunks": translated
+                    }
+                )
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+            
+        return join_chunks(translated, chunks)
+        
+    def get_available_providers(self, api_keys: Dict[str, str]) -> List[str]:
+        """获取已配置API密钥的提供商"""
+        return [provider for provider in self.providers if self.validate_api_keys(provider, api_keys)]
+        
+    def resolve_provider(self, provider: str, api_keys: Dict[str, str]) -> str:
+        """provider为auto时按实时统计选择最优的健康提供商"""
+        if provider != "auto":
+            return provider
+        available = self.get_available_providers(api_keys)
+        if not available:
+            raise ValueError("未配置任何翻译提供商的API密钥")
+        # 优先在断路器未打开的提供商中选择
+        available = [candidate for candidate in available if circuit_breaker.get_state(candidate) != OPEN] or available
+        return provider_stats.select([(candidate, self._get_api_key(candidate, api_keys)) for candidate in available])
+        
     def validate_api_keys(self, provider: str, api_keys: Dict[str, str]) -> bool:
         """验证API密钥配置"""
         if provider == "openai":
@@ -133,40 +1059,119 @@ class TranslationProcessor:
             return bool(api_keys.get("google"))
         return False
         
+    @staticmethod
+    def _extract_blocks(file_path: str, pages: Optional[List[int]]) -> Dict[int, List[Dict[str, Any]]]:
+        """按文本块提取PDF各页的片段"""
+        with PDFProcessor(file_path) as pdf_processor:
+            return pdf_processor.extract_segments(pages)
+            
     async def process_task(
         self,
         task_id: str,
         text: str,
         provider: str,
         target_lang: str,
-        api_keys: Dict[str, str]
+        api_keys: Dict[str, str],
+        segments: Optional[List[str]] = None,
+        mode: str = "full",
+        file_path: Optional[str] = None,
+        pages: Optional[List[int]] = None,
+        glossary: Optional[str] = None
     ) -> None:
-        """处理翻译任务"""
+        """处理翻译任务，mode决定对冲请求和故障转移策略
+        
+        提供segments时按片段批量翻译；提供file_path时按文本块翻译PDF文档，跨页重复的片段只翻译一次，
+        文档是旧文档的修订版时复用未改动片段的译文。
+        glossary为术语表名称，术语按指定译文翻译，受保护的术语原样保留。
+        """
         try:
-            # 验证API密钥
-            if not self.validate_api_keys(provider, api_keys):
+            # 验证API密钥，自动选择时至少需要一个提供商的密钥
+            if provider == "auto":
+                if not self.get_available_providers(api_keys):
+                    raise ValueError("未配置任何翻译提供商的API密钥")
+            elif not self.validate_api_keys(provider, api_keys):
                 raise ValueError(f"未配置{provider}的API密钥")
                 
             # 验证翻译提供商
-            if provider not in self.providers:
+            if provider != "auto" and provider not in self.providers:
                 raise ValueError(f"不支持的翻译提供商: {provider}")
                 
             task_manager.set_task_progress(task_id, 10)
             
             # 执行翻译
-            if provider == "baidu":
-                translated_text = await self._translate_with_baidu(
-                    text,
+            if file_path:
+                # 解析PDF和计算文件哈希都是同步操作，在线程中执行，不阻塞事件循环上的其他请求
+                blocks = await asyncio.to_thread(self._extract_blocks, file_path, pages)
+                page_texts = {page_num: [block["text"] for block in page_blocks] for page_num, page_blocks in blocks.items()}
+                revision = None
+                if settings.REVISION_TRACKING_ENABLED:
+                    translated_pages, dedup, revision = await self.translate_revision(
+                        await asyncio.to_thread(document_id, file_path),
+                        page_texts,
+                        provider,
+                        target_lang,
+                        api_keys,
+                        mode=mode,
+                        glossary=glossary,
+                        full_document=pages is None
+                    )
+                else:
+                    translated_pages, dedup = await self.translate_pages(
+                        page_texts,
+                        provider,
+                        target_lang,
+                        api_keys,
+                        mode=mode,
+                        glossary=glossary
+                    )
+                task_manager.set_task_progress(task_id, 90)
+                task_manager.set_task_result(task_id, {
+                    "pages": {
+                        page_num: [
+                            {**block, "translated_text": translation}
+                            for block, translation in zip(blocks[page_num], translated_pages[page_num])
+                        ]
+                        for page_num in blocks
+                    },
+                    "dedup": dedup,
+                    "revision": revision,
+                    "skipped_segments": dedup["skipped"],
+                    "target_language": target_lang,
+                    "provider": provider
+                })
+                return
+                
+            if segments:
+                stats: Dict[str, int] = {"skipped": 0}
+                translated_segments = await self.translate_segments(
+                    segments,
+                    provider,
                     target_lang,
-                    api_keys["baidu_app_id"],
-                    api_keys["baidu_app_key"]
+                    api_keys,
+                    mode=mode,
+                    glossary=glossary,
+                    stats=stats
                 )
+                task_manager.set_task_progress(task_id, 90)
+                task_manager.set_task_result(task_id, {
+                    "translated_segments": translated_segments,
+                    "source_segments": segments,
+                    "skipped_segments": stats["skipped"],
+                    "target_language": target_lang,
+                    "provider": provider
+                })
+                return
+                
+            # 不含字母的文本直接返回原文，语言判断只按片段进行，不跳过整篇文本
+            skipped = settings.LANGUAGE_SKIP_ENABLED and not has_letters(text)
+            if skipped:
+                translated_text, cached = text, False
+            # 超出单次请求预算的长文本分块并发翻译
+            elif estimate_tokens(text) > settings.TRANSLATION_CHUNK_MAX_TOKENS:
+                translated_text = await self._translate_chunked(task_id, text, provider, target_lang, api_keys, mode, glossary)
+                cached = False
             else:
-                translated_text = await self.providers[provider](
-                    text,
-                    target_lang,
-                    api_keys[provider]
-                )
+                translated_text, cached = await self.translate(text, provider, target_lang, api_keys, mode=mode, glossary=glossary)
                 
             task_manager.set_task_progress(task_id, 90)
             
@@ -175,7 +1180,9 @@ class TranslationProcessor:
                 "translated_text": translated_text,
                 "source_text": text,
                 "target_language": target_lang,
-                "provider": provider
+                "provider": provider,
+                "cached": cached,
+                "skipped_segments": int(skipped)
             })
             
         except Exception as e:
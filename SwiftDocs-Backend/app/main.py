@@ -8,7 +8,8 @@ from typing import Callable
 import uvicorn
 
 from .core.config import settings
-from .routers import document
+from .core.http_client import http_client_pool
+from .routers import document, translation, pdf
 
 # 配置日志
 logging.basicConfig(
@@ -35,6 +36,15 @@ app.add_middleware(
 )
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# 应用生命周期：启动时建立翻译服务连接池，关闭时释放连接
+@app.on_event("startup")
+async def startup_event():
+    await http_client_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await http_client_pool.aclose()
+
 # 请求计时中间件
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next: Callable):
@@ -66,6 +76,16 @@ app.include_router(
     prefix=f"{settings.API_V1_STR}/documents",
     tags=["documents"]
 )
+app.include_router(
+    translation.router,
+    prefix=f"{settings.API_V1_STR}/translate",
+    tags=["translation"]
+)
+app.include_router(
+    pdf.router,
+    prefix=f"{settings.API_V1_STR}/pdf",
+    tags=["pdf"]
+)
 
 # 健康检查端点
 @app.get("/health")
@@ -0,0 +1,230 @@
+"""
+本地模拟翻译服务 - 用于压测和基准测试，无需访问真实提供商
+
+兼容OpenAI/DeepSeek对话补全（含流式）、Google Cloud Translation v2和百度翻译的接口格式，
+支持可配置的延迟分布、错误和429注入，译文由原文确定性生成。
+
+用法:
+    python -m app.mock_providers --port 9000 --latency lognormal:0.3,0.5 --error-rate 0.01 --rate-limit-rate 0.02
+
+然后在.env中将OPENAI_BASE_URL、DEEPSEEK_BASE_URL、BAIDU_BASE_URL、GOOGLE_BASE_URL指向 http://127.0.0.1:9000
+"""
+import re
+import json
+import math
+import random
+import asyncio
+import argparse
+import itertools
+from collections import Counter
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+# 从系统提示词中提取目标语言，例如"请将以下文本翻译成zh-CN，"
+_TARGET_LANG_RE = re.compile(r"翻译成([^，,。\s]+)")
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """解析延迟分布，返回按随机数发生器采样延迟（秒）的函数
+
+    支持 fixed:0.2、uniform:0.1,0.5、normal:均值,标准差、lognormal:中位数,sigma、exponential:均值。
+    """
+    name, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    samplers: Dict[str, Callable[[random.Random], float]] = {
+        "fixed": lambda rng: values[0],
+        "uniform": lambda rng: rng.uniform(values[0], values[1]),
+        "normal": lambda rng: rng.gauss(values[0], values[1]),
+        "lognormal": lambda rng: rng.lognormvariate(math.log(values[0]), values[1]),
+        "exponential": lambda rng: rng.expovariate(1.0 / values[0]),
+    }
+    arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+    if name not in samplers or len(values) != arity[name]:
+        raise ValueError(f"无效的延迟分布: {spec}")
+    sampler = samplers[name]
+    return lambda rng: max(0.0, sampler(rng))
+
+def mock_translate(text: str, target_lang: str) -> str:
+    """确定性地生成译文：加上目标语言前缀，保留原文中的数字和占位符"""
+    return f"[{target_lang}] {text}" if text.strip() else text
+
+class MockProviderConfig:
+    """模拟服务配置"""
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        token_latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0
+    ):
+        """初始化配置，error_rate和rate_limit_rate为每个请求返回5xx或429的概率"""
+        self.latency = parse_latency(latency)
+        self.token_latency = parse_latency(token_latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.seed = seed
+
+class MockProviderState:
+    """模拟服务的请求计数，每个请求按序号派生独立的随机数发生器，结果可复现"""
+
+    def __init__(self, config: MockProviderConfig):
+        """初始化状态"""
+        self.config = config
+        self._sequence = itertools.count()
+        self.stats: Counter = Counter()
+
+    def next_random(self) -> random.Random:
+        """获取下一个请求的随机数发生器"""
+        return random.Random(f"{self.config.seed}:{next(self._sequence)}")
+
+    async def simulate(self, provider: str) -> Optional[str]:
+        """模拟上游延迟并决定是否注入故障，返回"rate_limit"、"error"或None"""
+        rng = self.next_random()
+        self.stats[f"{provider}_requests"] += 1
+        await asyncio.sleep(self.config.latency(rng))
+        roll = rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats[f"{provider}_rate_limited"] += 1
+            return "rate_limit"
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.stats[f"{provider}_errors"] += 1
+            return "error"
+        return None
+
+def _chat_translation(messages: List[Dict[str, str]]) -> str:
+    """按翻译处理器的提示词约定生成对话补全的回复，JSON数组输入按批量翻译处理"""
+    system = next((message["content"] for message in messages if message["role"] == "system"), "")
+    content = next((message["content"] for message in reversed(messages) if message["role"] == "user"), "")
+    match = _TARGET_LANG_RE.search(system)
+    target_lang = match.group(1) if match else "zh-CN"
+    if "JSON" in system:
+        try:
+            texts = json.loads(content)
+        except json.JSONDecodeError:
+            texts = None
+        if isinstance(texts, list) and all(isinstance(text, str) for text in texts):
+            return json.dumps([mock_translate(text, target_lang) for text in texts], ensure_ascii=False)
+    return mock_translate(content, target_lang)
+
+def create_app(config: Optional[MockProviderConfig] = None) -> FastAPI:
+    """创建模拟服务应用"""
+    state = MockProviderState(config or MockProviderConfig())
+    app = FastAPI(title="SwiftDocs Mock Providers")
+    app.state.mock = state
+
+    def retry_headers() -> Dict[str, str]:
+        return {"Retry-After": str(state.config.retry_after)}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        """OpenAI/DeepSeek兼容的对话补全接口"""
+        body = await request.json()
+        fault = await state.simulate("chat")
+        if fault == "rate_limit":
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "requests"}},
+                headers=retry_headers()
+            )
+        if fault == "error":
+            return JSONResponse(status_code=503, content={"error": {"message": "The server is overloaded", "type": "server_error"}})
+
+        translation = _chat_translation(body.get("messages", []))
+        model = body.get("model", "mock")
+        if not body.get("stream"):
+            return {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": translation}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            }
+
+        rng = state.next_random()
+
+        async def events() -> AsyncIterator[str]:
+            # 按空白切分为增量，每段之间按逐词延迟分布等待
+            for delta in re.findall(r"\S+\s*|\s+", translation):
+                await asyncio.sleep(state.config.token_latency(rng))
+                chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/language/translate/v2")
+    async def google_translate(request: Request):
+        """Google Cloud Translation v2接口"""
+        body = await request.json()
+        fault = await state.simulate("google")
+        if fault == "rate_limit":
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"code": 429, "message": "Rate Limit Exceeded"}},
+                headers=retry_headers()
+            )
+        if fault == "error":
+            return JSONResponse(status_code=500, content={"error": {"code": 500, "message": "Internal error"}})
+        texts = body.get("q", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        target_lang = body.get("target", "zh-CN")
+        return {"data": {"translations": [{"translatedText": mock_translate(text, target_lang)} for text in texts]}}
+
+    @app.post("/api/trans/vip/translate")
+    async def baidu_translate(request: Request):
+        """百度翻译接口，与真实服务一样以HTTP 200返回错误码"""
+        form = await request.form()
+        fault = await state.simulate("baidu")
+        if fault == "rate_limit":
+            return {"error_code": "54003", "error_msg": "Invalid Access Limit"}
+        if fault == "error":
+            return {"error_code": "52002", "error_msg": "System Error"}
+        target_lang = form.get("to", "zh")
+        return {
+            "from": form.get("from", "auto"),
+            "to": target_lang,
+            "trans_result": [
+                {"src": line, "dst": mock_translate(line, target_lang)}
+                for line in str(form.get("q", "")).split("\n")
+            ]
+        }
+
+    @app.get("/mock/stats")
+    async def get_stats() -> Dict[str, Any]:
+        """获取各接口的请求、限流和错误计数"""
+        return dict(state.stats)
+
+    return app
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="SwiftDocs 本地模拟翻译服务")
+    parser.add_argument("--host", default="127.0.0.1", help="主机地址")
+    parser.add_argument("--port", type=int, default=9000, help="端口号")
+    parser.add_argument("--latency", default="fixed:0", help="请求延迟分布，例如 lognormal:0.3,0.5")
+    parser.add_argument("--token-latency", default="fixed:0", help="流式输出中每段增量的延迟分布")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回5xx错误的概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="返回429限流的概率")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="限流响应的Retry-After秒数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，相同种子下请求序列的延迟和故障相同")
+    args = parser.parse_args()
+
+    config = MockProviderConfig(
+        latency=args.latency,
+        token_latency=args.token_latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
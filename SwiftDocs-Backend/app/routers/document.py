@@ -1,13 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse
-from typing import List
+from typing import List, Optional
 import aiofiles
 import os
 from datetime import datetime
 import uuid
+import time
 from ..schemas.document import DocumentCreate, Document, DocumentUpdate
 from ..services.ocr_service import ocr_service
 from ..core.config import settings
+from ..core.search_index import search_index
 
 router = APIRouter()
 
@@ -73,6 +75,28 @@ async def upload_document(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/search")
+def search_documents(
+    q: str = Query(..., min_length=1, description="检索词，多个词之间为AND，支持中日韩文字"),
+    limit: int = Query(20, ge=1, le=100, description="返回的最大结果数"),
+    document_id: Optional[str] = Query(None, description="只在指定文档中检索")
+):
+    """
+    在已提取的文档中全文检索
+    
+    SQLite查询是同步调用，处理函数不声明为async，由线程池执行，不阻塞事件循环
+    
+    - **hits**: 命中的文档、页码、相关度、摘要以及命中词的边界框
+    - **took_ms**: 检索耗时（毫秒）
+    """
+    start = time.perf_counter()
+    hits = search_index.search(q, limit, document_id)
+    return {
+        "query": q,
+        "hits": hits,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
 @router.get("/{document_id}", response_model=Document)
 async def get_document(document_id: str) -> Document:
     """
@@ -93,9 +117,10 @@ async def update_document(
     raise HTTPException(status_code=404, detail="文档不存在")
 
 @router.delete("/{document_id}")
-async def delete_document(document_id: str) -> JSONResponse:
+def delete_document(document_id: str) -> JSONResponse:
     """
     删除文档
     """
     # TODO: 从数据库和文件系统中删除文档
+    search_index.remove_document(document_id)
     return JSONResponse(content={"message": "文档已删除"}) 
\ No newline at end of file
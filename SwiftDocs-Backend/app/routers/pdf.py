@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, File, UploadFile
+from fastapi import APIRouter, HTTPException, File, UploadFile, Query, Request
+from fastapi.responses import StreamingResponse, Response
 from ..schemas.pdf import PDFRequest, PDFResponse, PDFTask
-from ..tasks.pdf import process_pdf
+from ..tasks.pdf_tasks import process_pdf
 from ..core.websocket import ConnectionManager
-from typing import Optional
+from ..core.task_manager import task_manager
+from ..core.pdf_processor import PDFProcessor, IMAGE_FORMATS, negotiate_image_format
+from ..core.file_manager import file_manager
+from ..core.render_cache import render_cache
+from ..core.spatial_index import spatial_index_store
+from ..core.document_cache import document_cache
+from typing import Optional, List, Iterator
+import json
 import uuid
 from datetime import datetime
 import aiofiles
@@ -13,37 +21,32 @@ router = APIRouter()
 manager = ConnectionManager()
 
 @router.post("/process", response_model=PDFResponse)
-async def create_pdf_task(
-    request: PDFRequest,
-    background_tasks: BackgroundTasks,
-):
+async def create_pdf_task(request: PDFRequest):
     """
     创建新的PDF处理任务
     
-    - **mode**: 处理模式 (full/selection)
-    - **bbox**: 选择区域的边界框坐标（仅在selection模式下使用）
-    - **page**: 页码
+    - **file_id**: 上传接口返回的文件ID
+    - **mode**: 处理模式 (text/layout/image)
+    - **bbox**: 选择区域的边界框坐标
+    - **pages**: 页码列表
     """
+    # 只处理上传目录中的文件，不接受客户端提供的路径
+    file_path = _get_upload_path(request.file_id)
+    
     # 创建任务ID
     task_id = str(uuid.uuid4())
     
     # 创建PDF处理任务
-    task = PDFTask(
-        id=task_id,
-        status="pending",
-        mode=request.mode,
-        progress=0,
-        created_at=str(datetime.now()),
-        updated_at=str(datetime.now())
-    )
+    task_manager.create_task(task_id, "pdf")
+    task_manager.update_task(task_id, mode=request.mode, file_id=request.file_id)
     
-    # 启动异步PDF处理任务
-    background_tasks.add_task(
-        process_pdf,
+    # 提交到Celery工作进程处理，不在API进程中解析PDF
+    process_pdf.delay(
         task_id=task_id,
+        file_path=file_path,
         mode=request.mode,
-        bbox=request.bbox,
-        page=request.page
+        pages=request.pages,
+        bbox=request.bbox.model_dump() if request.bbox else None
     )
     
     return PDFResponse(
@@ -53,12 +56,11 @@ async def create_pdf_task(
     )
 
 @router.post("/upload", response_model=PDFResponse)
-async def upload_pdf(
-    file: UploadFile = File(...),
-    background_tasks: BackgroundTasks
-):
+async def upload_pdf(file: UploadFile = File(...)):
     """
     上传PDF文件进行处理
+    
+    返回的fileId用于/process以及逐页提取、图像、瓦片、区域取词和点击测试等接口
     """
     # 验证文件类型
     if not file.content_type == 'application/pdf':
@@ -76,11 +78,11 @@ async def upload_pdf(
         )
     
     # 创建上传目录
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    file_manager.upload_dir.mkdir(parents=True, exist_ok=True)
     
-    # 生成文件路径
+    # 生成文件路径，与按文件ID解析的路径一致
     file_id = str(uuid.uuid4())
-    file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+    file_path = str(file_manager.upload_dir / f"{file_id}.pdf")
     
     # 保存文件
     async with aiofiles.open(file_path, 'wb') as out_file:
@@ -89,29 +91,35 @@ async def upload_pdf(
     # 创建任务ID
     task_id = str(uuid.uuid4())
     
-    # 创建PDF处理任务
-    task = PDFTask(
-        id=task_id,
-        status="pending",
-        mode="full",  # 默认为全文处理模式
-        progress=0,
-        created_at=str(datetime.now()),
-        updated_at=str(datetime.now())
-    )
+    # 创建PDF处理任务，默认提取全文
+    task_manager.create_task(task_id, "pdf")
+    task_manager.update_task(task_id, mode="text", file_id=file_id)
     
-    # 启动异步PDF处理任务
-    background_tasks.add_task(
-        process_pdf,
+    # 提交到Celery工作进程处理，不在API进程中解析PDF
+    process_pdf.delay(
         task_id=task_id,
-        file_path=file_path
+        file_path=file_path,
+        mode="text"
     )
     
     return PDFResponse(
         taskId=task_id,
         status="pending",
-        progress=0
+        progress=0,
+        fileId=file_id
     )
 
+async def get_task_status(task_id: str) -> Optional[PDFTask]:
+    """从任务管理器读取PDF任务状态"""
+    task = task_manager.get_task(task_id)
+    if not task:
+        return None
+    return PDFTask(**{"mode": "text", **task})
+
+async def cancel_task(task_id: str) -> None:
+    """将PDF任务标记为已取消"""
+    task_manager.update_task(task_id, status="cancelled")
+
 @router.get("/task/{task_id}", response_model=PDFResponse)
 async def get_pdf_task(task_id: str):
     """
@@ -130,7 +138,8 @@ async def get_pdf_task(task_id: str):
         status=task.status,
         progress=task.progress,
         result=task.result,
-        error=task.error
+        error=task.error,
+        fileId=task.file_id
     )
 
 @router.delete("/task/{task_id}")
@@ -149,8 +158,218 @@ async def cancel_pdf_task(task_id: str):
     # 取消任务
     await cancel_task(task_id)
     
-    # 清理临时文件
-    if task.file_path and os.path.exists(task.file_path):
-        os.remove(task.file_path)
+    # 清理上传的文件，只删除由文件ID解析出的上传目录中的路径
+    file_path = file_manager.get_upload_path(task.file_id) if task.file_id else None
+    if file_path:
+        os.remove(file_path)
+    
+    return {"message": f"任务 {task_id} 已取消"}
+
+@router.get("/metrics")
+async def get_pdf_metrics():
+    """
+    获取PDF处理运行指标
+    
+    - **render_cache**: 页面渲染缓存各层的命中、淘汰统计与占用
+    - **spatial_index**: 页面空间索引的命中与构建次数
+    - **documents**: 文档句柄池的复用、淘汰统计与空闲句柄占用
+    """
+    return {
+        "render_cache": render_cache.get_metrics(),
+        "spatial_index": spatial_index_store.get_metrics(),
+        "documents": document_cache.get_metrics()
+    }
+
+def _get_upload_path(file_id: str) -> str:
+    """获取已上传的PDF文件路径，不存在时返回404"""
+    file_path = file_manager.get_upload_path(file_id)
+    if not file_path:
+        raise HTTPException(
+            status_code=404,
+            detail=f"未找到文件: {file_id}"
+        )
+    return file_path
+
+@router.get("/{file_id}/pages")
+async def stream_pages(
+    request: Request,
+    file_id: str,
+    pages: Optional[List[int]] = Query(None, description="要提取的页码列表，默认全部"),
+    layout: bool = Query(True, description="是否包含布局信息"),
+    image: bool = Query(False, description="是否包含页面图像地址")
+):
+    """
+    逐页流式提取PDF内容，每页一行JSON（NDJSON）
+    
+    - **page**: 页码
+    - **text**: 页面文本
+    - **layout**: 文本块和图像块的布局信息
+    - **image**: 页面图像地址（仅在image=true时返回）
+    """
+    file_path = _get_upload_path(file_id)
+    
+    def image_url(page_num: int) -> str:
+        return str(request.url_for("get_page_image", file_id=file_id, page_num=page_num))
+        
+    def records() -> Iterator[str]:
+        # 同步生成器由StreamingResponse在线程池中迭代，不阻塞事件循环
+        with PDFProcessor(file_path) as processor:
+            for record in processor.iter_pages(pages, layout=layout, image_url=image_url if image else None):
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+                
+    return StreamingResponse(records(), media_type="application/x-ndjson")
+
+def _image_format(request: Request, image_format: Optional[str]) -> str:
+    """确定输出格式：查询参数优先，否则按Accept请求头协商"""
+    if image_format is None:
+        return negotiate_image_format(request.headers.get("accept"))
+    if image_format not in IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的图像格式: {image_format}，支持: {', '.join(IMAGE_FORMATS)}"
+        )
+    return image_format
+
+def _image_response(image_data: bytes, image_format: str) -> Response:
+    """返回二进制图像，响应随Accept请求头变化"""
+    return Response(
+        content=image_data,
+        media_type=IMAGE_FORMATS[image_format],
+        headers={"Vary": "Accept"}
+    )
+
+@router.get("/{file_id}/pages/{page_num}/image")
+def get_page_image(
+    request: Request,
+    file_id: str,
+    page_num: int,
+    zoom: float = Query(2.0, gt=0, le=8, description="缩放倍数"),
+    image_format: Optional[str] = Query(None, alias="format", description="图像格式 (png/webp/jpeg)，默认按Accept请求头协商"),
+    quality: Optional[int] = Query(None, ge=1, le=100, description="有损格式的编码质量")
+):
+    """
+    获取页面图像，以二进制返回PNG、WebP或JPEG
+    
+    渲染为同步操作，处理函数在线程池中执行，不阻塞事件循环。
+    """
+    fmt = _image_format(request, image_format)
+    file_path = _get_upload_path(file_id)
+    with PDFProcessor(file_path) as processor:
+        image_data = processor.render_page(page_num, zoom, fmt=fmt, quality=quality)
+    if image_data is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"页码超出范围: {page_num}"
+        )
+    return _image_response(image_data, fmt)
+
+@router.get("/{file_id}/pages/{page_num}/region")
+def get_region_image(
+    request: Request,
+    file_id: str,
+    page_num: int,
+    x0: float,
+    y0: float,
+    x1: float,
+    y1: float,
+    zoom: float = Query(2.0, gt=0, le=8, description="缩放倍数"),
+    image_format: Optional[str] = Query(None, alias="format", description="图像格式 (png/webp/jpeg)，默认按Accept请求头协商"),
+    quality: Optional[int] = Query(None, ge=1, le=100, description="有损格式的编码质量")
+):
+    """
+    获取页面指定区域的图像，以二进制返回PNG、WebP或JPEG
+    
+    渲染为同步操作，处理函数在线程池中执行，不阻塞事件循环。
+    """
+    if x1 <= x0 or y1 <= y0:
+        raise HTTPException(
+            status_code=400,
+            detail="区域坐标无效"
+        )
+    fmt = _image_format(request, image_format)
+    file_path = _get_upload_path(file_id)
+    with PDFProcessor(file_path) as processor:
+        image_data = processor.render_page(page_num, zoom, clip=(x0, y0, x1, y1), fmt=fmt, quality=quality)
+    if image_data is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"页码超出范围: {page_num}"
+        )
+    return _image_response(image_data, fmt)
+
+@router.get("/{file_id}/pages/{page_num}/tiles")
+def get_page_tiles(file_id: str, page_num: int):
+    """
+    获取页面的瓦片金字塔信息
+    
+    - **levels**: 各缩放级别的缩放倍数、像素尺寸以及瓦片行列数
+    """
+    file_path = _get_upload_path(file_id)
+    with PDFProcessor(file_path) as processor:
+        levels = processor.get_tile_pyramid(page_num)
+    if levels is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"页码超出范围: {page_num}"
+        )
+    return {"page": page_num, "levels": levels}
+
+@router.get("/{file_id}/pages/{page_num}/tiles/{level}/{x}/{y}")
+def get_page_tile(
+    request: Request,
+    file_id: str,
+    page_num: int,
+    level: int,
+    x: int,
+    y: int,
+    image_format: Optional[str] = Query(None, alias="format", description="图像格式 (png/webp/jpeg)，默认按Accept请求头协商"),
+    quality: Optional[int] = Query(None, ge=1, le=100, description="有损格式的编码质量")
+):
+    """
+    获取单个页面瓦片，按需渲染并缓存
+    
+    渲染为同步操作，处理函数在线程池中执行，不阻塞事件循环。
+    """
+    fmt = _image_format(request, image_format)
+    file_path = _get_upload_path(file_id)
+    with PDFProcessor(file_path) as processor:
+        tile_data = processor.render_tile(page_num, level, x, y, fmt=fmt, quality=quality)
+    if tile_data is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"瓦片不存在: 第{page_num}页 级别{level} ({x}, {y})"
+        )
+    return _image_response(tile_data, fmt)
+
+@router.get("/{file_id}/pages/{page_num}/text")
+def get_region_text(file_id: str, page_num: int, x0: float, y0: float, x1: float, y1: float):
+    """
+    获取页面指定区域内的文本，由空间索引直接返回
+    """
+    file_path = _get_upload_path(file_id)
+    with PDFProcessor(file_path) as processor:
+        if not 0 <= page_num < processor.get_page_count():
+            raise HTTPException(
+                status_code=404,
+                detail=f"页码超出范围: {page_num}"
+            )
+        text = processor.extract_text_from_bbox(page_num, (x0, y0, x1, y1))
+    return {"page": page_num, "bbox": [x0, y0, x1, y1], "text": text}
+
+@router.get("/{file_id}/pages/{page_num}/hit")
+def hit_test(file_id: str, page_num: int, x: float, y: float):
+    """
+    获取光标下的单词及其所在行
     
-    return {"message": f"任务 {task_id} 已取消"} 
\ No newline at end of file
+    - **word**: 单词文本与边界框，坐标处没有文字时为null
+    - **line**: 所在行的文本与边界框
+    """
+    file_path = _get_upload_path(file_id)
+    with PDFProcessor(file_path) as processor:
+        if not 0 <= page_num < processor.get_page_count():
+            raise HTTPException(
+                status_code=404,
+                detail=f"页码超出范围: {page_num}"
+            )
+        hit = processor.hit_test(page_num, x, y)
+    return {"page": page_num, "hit": hit}
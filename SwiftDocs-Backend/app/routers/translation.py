@@ -1,13 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from ..schemas.translation import (
     TranslationRequest,
     TranslationResponse,
     TranslationTask
 )
 from ..core.config import settings, TRANSLATION_PROVIDERS, TARGET_LANGUAGES
-from ..tasks.translation import translate_text
 from ..core.websocket import ConnectionManager
-from typing import Optional
+from ..core.task_manager import task_manager
+from ..core.file_manager import file_manager
+from ..core.translation_processor import translation_processor
+from ..core.rate_limiter import rate_limiter
+from ..core.translation_cache import translation_cache
+from ..core.single_flight import single_flight
+from ..core.provider_router import provider_router
+from ..core.provider_stats import provider_stats
+from ..core.circuit_breaker import circuit_breaker
+from ..core.fuzzy_memory import fuzzy_memory
+from ..core.revision_tracker import revision_tracker
+from typing import Optional, AsyncIterator, Dict, Any
+import json
 import uuid
 from datetime import datetime
 
@@ -23,10 +37,14 @@ async def create_translation(
     创建新的翻译任务
     
     - **text**: 要翻译的文本
-    - **provider**: 翻译服务提供商
+    - **provider**: 翻译服务提供商，auto表示按实时统计自动选择
     - **targetLanguage**: 目标语言
     - **mode**: 翻译模式 (selection/full)
     - **apiKeys**: 可选的API密钥
+    - **segments**: 可选的段落列表，提供时多段合并为一次请求批量翻译
+    - **file_id**: 可选的已上传PDF文件ID，提供时按文本块翻译文档，跨页重复的片段只翻译一次
+    - **pages**: 可选的页码列表，配合file_id使用
+    - **glossary**: 可选的术语表名称，术语按指定译文翻译，受保护的术语原样保留
     """
     # 验证翻译服务提供商
     if request.provider not in TRANSLATION_PROVIDERS:
@@ -42,29 +60,36 @@ async def create_translation(
             detail=f"不支持的目标语言: {request.targetLanguage}"
         )
     
+    # 只翻译上传目录中的文件，不接受客户端提供的路径
+    file_path = None
+    if request.file_id:
+        file_path = file_manager.get_upload_path(request.file_id)
+        if not file_path:
+            raise HTTPException(
+                status_code=404,
+                detail=f"未找到文件: {request.file_id}"
+            )
+    
     # 创建任务ID
     task_id = str(uuid.uuid4())
     
     # 创建翻译任务
-    task = TranslationTask(
-        id=task_id,
-        status="pending",
-        mode=request.mode,
-        progress=0,
-        created_at=str(datetime.now()),
-        updated_at=str(datetime.now())
-    )
+    task_manager.create_task(task_id, "translation")
+    task_manager.update_task(task_id, mode=request.mode)
     
-    # 启动异步翻译任务
+    # 在应用的事件循环中执行翻译，与流式接口共用翻译服务的连接池
     background_tasks.add_task(
-        translate_text,
+        translation_processor.process_task,
         task_id=task_id,
         text=request.text,
         provider=request.provider,
-        target_language=request.targetLanguage,
-        api_keys=request.apiKeys,
+        target_lang=request.targetLanguage,
+        api_keys=request.apiKeys.model_dump(exclude_none=True) if request.apiKeys else {},
+        segments=request.segments,
         mode=request.mode,
-        bbox=request.bbox
+        file_path=file_path,
+        pages=request.pages,
+        glossary=request.glossary
     )
     
     return TranslationResponse(
@@ -73,6 +98,83 @@ async def create_translation(
         progress=0
     )
 
+async def _stream_events(request: TranslationRequest) -> AsyncIterator[Dict[str, Any]]:
+    """将流式翻译结果转换为事件：delta为增量译文，done为完整译文，error为错误信息"""
+    api_keys = request.apiKeys.model_dump(exclude_none=True) if request.apiKeys else {}
+    parts = []
+    try:
+        async for delta in translation_processor.stream_translation(
+            request.text,
+            request.provider,
+            request.targetLanguage,
+            api_keys,
+            mode=request.mode,
+            glossary=request.glossary
+        ):
+            parts.append(delta)
+            yield {"type": "delta", "delta": delta}
+        yield {"type": "done", "translated_text": "".join(parts)}
+    except Exception as e:
+        yield {"type": "error", "error": str(e)}
+
+@router.post("/stream")
+async def stream_translation(request: TranslationRequest):
+    """
+    以Server-Sent Events流式返回翻译结果
+    
+    每个事件的data为JSON，事件类型为delta（增量译文）、done（完整译文）或error。
+    """
+    async def event_stream() -> AsyncIterator[str]:
+        async for event in _stream_events(request):
+            data = json.dumps(event, ensure_ascii=False)
+            yield f"event: {event['type']}\ndata: {data}\n\n"
+            
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            # 避免GZip中间件缓冲事件流
+            "Content-Encoding": "identity"
+        }
+    )
+
+@router.websocket("/ws/{client_id}")
+async def translation_websocket(websocket: WebSocket, client_id: str):
+    """
+    通过WebSocket流式翻译
+    
+    客户端发送与/translate相同格式的JSON请求（可附带requestId），
+    服务端依次推送delta、done或error消息。
+    """
+    await manager.connect(websocket, client_id)
+    try:
+        while True:
+            message = await websocket.receive_json()
+            request_id = message.get("requestId")
+            try:
+                request = TranslationRequest(**message)
+            except ValidationError as e:
+                await manager.send_json({"type": "error", "requestId": request_id, "error": str(e)}, client_id)
+                continue
+                
+            async for event in _stream_events(request):
+                await manager.send_json({**event, "requestId": request_id}, client_id)
+    except WebSocketDisconnect:
+        manager.disconnect(client_id)
+
+async def get_task_status(task_id: str) -> Optional[TranslationTask]:
+    """从任务管理器读取翻译任务状态"""
+    task = task_manager.get_task(task_id)
+    if not task:
+        return None
+    return TranslationTask(**{"mode": "full", **task})
+
+async def cancel_task(task_id: str) -> None:
+    """将翻译任务标记为已取消"""
+    task_manager.update_task(task_id, status="cancelled")
+
 @router.get("/task/{task_id}", response_model=TranslationResponse)
 async def get_translation_task(task_id: str):
     """
@@ -110,4 +212,41 @@ async def cancel_translation_task(task_id: str):
     # 取消任务
     await cancel_task(task_id)
     
-    return {"message": f"任务 {task_id} 已取消"} 
\ No newline at end of file
+    return {"message": f"任务 {task_id} 已取消"}
+
+@router.get("/providers/status")
+async def get_providers_status():
+    """
+    获取各翻译服务提供商的断路器状态
+    
+    - **state**: closed（正常）、open（快速失败）或half_open（放行探测请求）
+    - **failures**: 当前连续失败次数
+    - **retry_in**: 断路器打开时距离半开的剩余秒数
+    """
+    return {
+        provider: circuit_breaker.get_status(provider)
+        for provider in translation_processor.providers
+    }
+
+@router.get("/metrics")
+async def get_translation_metrics():
+    """
+    获取翻译服务运行指标
+    
+    - **rate_limits**: 各(提供商, API密钥)当前的限速、并发限制与限流次数
+    - **cache**: 翻译记忆缓存命中统计
+    - **single_flight**: 请求合并统计
+    - **latency**: 各提供商的延迟分位数与对冲阈值
+    - **providers**: 各(提供商, API密钥)共享的EWMA延迟、错误率与吞吐量
+    - **fuzzy_memory**: 模糊翻译记忆的查询、复用与参考统计
+    - **revisions**: 文档修订识别与片段译文复用统计
+    """
+    return {
+        "rate_limits": rate_limiter.get_metrics(),
+        "cache": translation_cache.get_metrics(),
+        "single_flight": single_flight.get_metrics(),
+        "latency": provider_router.get_metrics(),
+        "providers": await run_in_threadpool(provider_stats.get_metrics),
+        "fuzzy_memory": fuzzy_memory.get_metrics(),
+        "revisions": revision_tracker.get_metrics()
+    }
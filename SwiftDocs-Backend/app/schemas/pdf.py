@@ -4,7 +4,7 @@ from .base import TaskBase, ResponseBase, BoundingBox
 
 class PDFRequest(BaseModel):
     """PDF处理请求模型"""
-    file_path: str = Field(..., description="PDF文件路径")
+    file_id: str = Field(..., description="上传接口返回的文件ID")
     pages: Optional[List[int]] = Field(None, description="要处理的页码列表")
     bbox: Optional[BoundingBox] = Field(None, description="边界框坐标")
     mode: str = Field(..., description="处理模式 (layout/text/ocr)")
@@ -14,8 +14,10 @@ class PDFTask(TaskBase):
     mode: str = Field(..., description="处理模式")
     result: Optional[Dict[str, Any]] = Field(None, description="处理结果")
     pages: Optional[List[int]] = Field(None, description="处理的页码列表")
+    file_id: Optional[str] = Field(None, description="处理的上传文件ID")
 
 class PDFResponse(ResponseBase):
     """PDF处理响应模型"""
+    fileId: Optional[str] = Field(None, description="上传文件的ID，用于逐页提取、图像和瓦片等接口")
     result: Optional[Dict[str, Any]] = Field(None, description="处理结果")
     pages: Optional[List[int]] = Field(None, description="处理的页码列表") 
\ No newline at end of file
@@ -1,15 +1,19 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from .base import TaskBase, ResponseBase, BoundingBox, ApiKeys
 
 class TranslationRequest(BaseModel):
     """翻译请求模型"""
-    text: str = Field(..., description="要翻译的文本")
-    provider: str = Field(..., description="翻译服务提供商")
+    text: str = Field("", description="要翻译的文本，按文档翻译时可为空")
+    provider: str = Field(..., description="翻译服务提供商，auto表示自动选择")
     targetLanguage: str = Field(..., description="目标语言")
     mode: str = Field(..., description="翻译模式 (selection/full)")
     apiKeys: Optional[ApiKeys] = Field(None, description="API密钥配置")
     bbox: Optional[BoundingBox] = Field(None, description="选择区域的边界框坐标")
+    segments: Optional[List[str]] = Field(None, description="按段落拆分的文本，提供时批量翻译")
+    file_id: Optional[str] = Field(None, description="上传接口返回的PDF文件ID，提供时按文本块翻译整个文档")
+    pages: Optional[List[int]] = Field(None, description="要翻译的页码列表，仅在提供file_id时使用")
+    glossary: Optional[str] = Field(None, description="术语表名称，对应GLOSSARY_DIR下的JSON文件")
 
 class TranslationTask(TaskBase):
     """翻译任务模型"""
@@ -1,6 +1,12 @@
 from typing import Optional, Dict, Any, List
+from celery import chord, group
 from ..core.celery_app import celery_app
+from ..core.config import settings
 from ..core.pdf_processor import PDFProcessor
+from ..core.task_manager import task_manager
+
+# 可按页分片并行处理的模式
+SHARDED_MODES = ("text", "layout")
 
 @celery_app.task(name="tasks.process_pdf")
 def process_pdf(
@@ -10,11 +16,51 @@ def process_pdf(
     pages: Optional[List[int]] = None,
     bbox: Optional[Dict[str, float]] = None
 ) -> None:
-    """PDF处理任务"""
+    """PDF处理任务，页数较多的文本和布局提取拆分为子任务，由多个工作进程并行处理"""
+    with PDFProcessor(file_path) as processor:
+        shards = processor.plan_shards(pages) if mode in SHARDED_MODES and not bbox else []
+        if len(shards) <= 1:
+            processor.process_task(
+                task_id=task_id,
+                mode=mode,
+                pages=pages,
+                bbox=bbox
+            )
+            return
+
+    task_manager.set_task_progress(task_id, 10)
+    chord(
+        extract_pdf_pages.s(task_id, file_path, mode, shard) for shard in shards
+    )(merge_pdf_pages.s(task_id, file_path, mode))
+
+@celery_app.task(name="tasks.extract_pdf_pages")
+def extract_pdf_pages(task_id: str, file_path: str, mode: str, page_numbers: List[int]) -> List[List[Any]]:
+    """提取一个分片的页面，返回[页码, 结果]列表，JSON序列化后页码仍为整数"""
+    try:
+        with PDFProcessor(file_path) as processor:
+            if mode == "text":
+                # 全文检索索引在合并结果后单独建立，不占用提取时间
+                result = processor.extract_text(page_numbers, index=False)
+            else:
+                result = processor.analyze_layout(page_numbers)
+    except Exception as e:
+        task_manager.set_task_error(task_id, str(e))
+        raise
+    return [[page_num, value] for page_num, value in result.items()]
+
+@celery_app.task(name="tasks.merge_pdf_pages")
+def merge_pdf_pages(shard_results: List[List[List[Any]]], task_id: str, file_path: str, mode: str) -> None:
+    """按分片顺序合并各分片结果并写入任务结果，文本模式随后按分片建立全文检索索引"""
+    result = {page_num: value for shard in shard_results for page_num, value in shard}
+    task_manager.set_task_progress(task_id, 90)
+    task_manager.set_task_result(task_id, {"result": result})
+    if mode == "text" and settings.SEARCH_INDEX_ENABLED:
+        group(
+            index_pdf_pages.s(file_path, [page_num for page_num, _ in shard]) for shard in shard_results
+        ).apply_async()
+
+@celery_app.task(name="tasks.index_pdf_pages")
+def index_pdf_pages(file_path: str, page_numbers: List[int]) -> None:
+    """为一个分片的页面建立全文检索索引"""
     with PDFProcessor(file_path) as processor:
-        processor.process_task(
-            task_id=task_id,
-            mode=mode,
-            pages=pages,
-            bbox=bbox
-        ) 
\ No newline at end of file
+        processor.index_pages(page_numbers)
@@ -1,20 +1,31 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from ..core.celery_app import celery_app
+from ..core.http_client import http_client_pool
 from ..core.translation_processor import translation_processor
 
 @celery_app.task(name="tasks.translate_text")
-async def translate_text(
+def translate_text(
     task_id: str,
     text: str,
     provider: str,
     target_lang: str,
-    api_keys: Dict[str, str]
+    api_keys: Dict[str, str],
+    segments: Optional[List[str]] = None,
+    mode: str = "full",
+    file_path: Optional[str] = None,
+    pages: Optional[List[int]] = None,
+    glossary: Optional[str] = None
 ) -> None:
-    """翻译文本任务"""
-    await translation_processor.process_task(
+    """翻译文本任务，在工作进程的常驻事件循环中执行，复用翻译服务的长连接"""
+    http_client_pool.run(translation_processor.process_task(
         task_id=task_id,
         text=text,
         provider=provider,
         target_lang=target_lang,
-        api_keys=api_keys
-    ) 
\ No newline at end of file
+        api_keys=api_keys,
+        segments=segments,
+        mode=mode,
+        file_path=file_path,
+        pages=pages,
+        glossary=glossary
+    )) 
\ No newline at end of file
@@ -0,0 +1,21 @@
+import os
+import tempfile
+import pytest
+from unittest.mock import patch
+
+# 测试运行的日志写入临时目录，必须在导入app之前设置
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="swiftdocs-logs-"))
+
+from app.core.render_cache import RenderCache
+from app.core.spatial_index import SpatialIndexStore
+from app.core.search_index import SearchIndex
+from app.core.document_cache import DocumentCache
+
+@pytest.fixture(autouse=True)
+def isolated_pdf_caches(tmp_path):
+    """PDF处理的磁盘缓存和索引写入临时目录，文档句柄不跨测试复用"""
+    with patch("app.core.pdf_processor.render_cache", RenderCache(str(tmp_path / "render"))), \
+            patch("app.core.pdf_processor.document_cache", DocumentCache()), \
+            patch("app.core.pdf_processor.spatial_index_store", SpatialIndexStore(str(tmp_path / "spatial"))), \
+            patch("app.core.pdf_processor.search_index", SearchIndex(str(tmp_path / "search.db"))) as index:
+        yield index
@@ -0,0 +1,72 @@
+import time
+import redis
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.core.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from app.core.exceptions import CircuitOpenError
+from app.core.translation_processor import TranslationProcessor
+
+def make_breaker():
+    # 不可达的Redis，验证退回进程内状态
+    return CircuitBreaker(redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1))
+
+def test_opens_after_consecutive_failures():
+    """测试连续失败达到阈值后打开断路器"""
+    breaker = make_breaker()
+    with patch("app.core.circuit_breaker.settings.CIRCUIT_FAILURE_THRESHOLD", 3):
+        for _ in range(2):
+            breaker.record_failure("deepseek")
+        assert breaker.allow("deepseek")
+        breaker.record_failure("deepseek")
+    assert breaker.get_state("deepseek") == OPEN
+    assert not breaker.allow("deepseek")
+    assert breaker.get_status("deepseek")["rejected"] == 1
+
+def test_half_open_allows_single_probe():
+    """测试冷却后只放行一个探测请求，成功后关闭"""
+    breaker = make_breaker()
+    with patch("app.core.circuit_breaker.settings.CIRCUIT_FAILURE_THRESHOLD", 1), \
+         patch("app.core.circuit_breaker.settings.CIRCUIT_OPEN_SECONDS", 0.0):
+        breaker.record_failure("google")
+        assert breaker.get_state("google") == HALF_OPEN
+        assert breaker.allow("google")
+        assert not breaker.allow("google")
+        breaker.record_success("google")
+        assert breaker.get_state("google") == CLOSED
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_over_immediately():
+    """测试断路器打开时不调用上游，直接故障转移到备选提供商"""
+    processor = TranslationProcessor()
+    breaker = make_breaker()
+    with patch("app.core.circuit_breaker.settings.CIRCUIT_FAILURE_THRESHOLD", 1):
+        breaker.record_failure("deepseek")
+    invoke = AsyncMock(return_value="译文")
+    api_keys = {"deepseek": "key-a", "openai": "key-b"}
+    with patch("app.core.translation_processor.circuit_breaker", breaker), \
+         patch.object(processor, "_invoke_provider", invoke):
+        with pytest.raises(CircuitOpenError):
+            await processor._call_provider("deepseek", "hello", "zh-CN", api_keys)
+        result, served_by = await processor._call_routed(
+            "deepseek", api_keys, "full",
+            lambda candidate: processor._call_provider(candidate, "hello", "zh-CN", api_keys)
+        )
+    assert (result, served_by) == ("译文", "openai")
+    assert invoke.await_args.args[0] == "openai"
+
+def test_shared_state_synced_in_background():
+    """测试请求路径不访问Redis，flush写入失败事件并采用其他进程打开的共享状态"""
+    client = MagicMock()
+    breaker = CircuitBreaker(client)
+    with patch.object(breaker._flusher, "start"):
+        breaker.record_failure("openai")
+        assert breaker.allow("openai") and breaker.allow("deepseek")
+    client.hgetall.assert_not_called()
+    client.pipeline.assert_not_called()
+
+    pipe = client.pipeline.return_value
+    pipe.execute.return_value = [0, {}, {"state": "open", "failures": "5", "opened_at": str(time.time())}]
+    breaker.flush()
+    assert breaker._failure_script.call_count == 1
+    assert breaker.get_state("openai") == OPEN
+    assert breaker.get_state("deepseek") == CLOSED
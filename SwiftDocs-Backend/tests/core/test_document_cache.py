@@ -0,0 +1,67 @@
+import os
+import fitz
+import pytest
+from unittest.mock import patch
+from app.core.document_cache import DocumentCache
+from app.core.pdf_processor import PDFProcessor
+
+def make_pdf(path, text="Hello"):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+def test_reuses_handle_and_opens_separate_handle_when_busy(tmp_path):
+    """测试归还的句柄被复用，并发使用同一文档时各自持有句柄"""
+    path = make_pdf(tmp_path / "a.pdf")
+    cache = DocumentCache(max_documents=4, max_bytes=10 ** 9)
+    with cache.open(path) as first:
+        with cache.open(path) as second:
+            assert first is not second
+    with cache.open(path) as third:
+        assert third is first
+    metrics = cache.get_metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["idle_documents"]) == (1, 2, 2)
+
+def test_evicts_by_count_and_bytes(tmp_path):
+    """测试空闲句柄超出数量或内存上限时关闭最久未使用的句柄"""
+    paths = [make_pdf(tmp_path / f"{name}.pdf") for name in "abc"]
+    cache = DocumentCache(max_documents=2, max_bytes=10 ** 9)
+    docs = []
+    for path in paths:
+        with cache.open(path) as doc:
+            docs.append(doc)
+    assert docs[0].is_closed and not docs[2].is_closed
+    assert cache.get_metrics()["evictions"] == 1
+
+    small = DocumentCache(max_documents=10, max_bytes=os.path.getsize(paths[0]))
+    with small.open(paths[0]) as doc_a:
+        pass
+    with small.open(paths[1]):
+        pass
+    assert doc_a.is_closed
+
+def test_modified_file_is_reopened(tmp_path):
+    """测试文件被替换后不复用旧句柄，并关闭过期句柄"""
+    path = make_pdf(tmp_path / "a.pdf", "Old")
+    cache = DocumentCache(max_documents=4, max_bytes=10 ** 9)
+    with cache.open(path) as old:
+        pass
+    make_pdf(tmp_path / "a.pdf", "New content")
+    os.utime(path, ns=(1, 10 ** 18))
+    with cache.open(path) as new:
+        assert new[0].get_text().strip() == "New content"
+    assert old.is_closed
+
+def test_processor_returns_handle_to_cache(tmp_path):
+    """测试PDFProcessor退出时归还句柄而不是关闭"""
+    path = make_pdf(tmp_path / "a.pdf")
+    cache = DocumentCache(max_documents=4, max_bytes=10 ** 9)
+    with patch("app.core.pdf_processor.document_cache", cache):
+        with PDFProcessor(path) as processor:
+            doc = processor.doc
+        with PDFProcessor(path) as processor:
+            assert processor.doc is doc
+            assert processor.extract_text()[0].strip() == "Hello"
+    assert not doc.is_closed
@@ -0,0 +1,78 @@
+import redis
+import numpy as np
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.core.fuzzy_memory import FuzzyMemory, FuzzyCandidate, shingles, jaccard
+from app.core.translation_processor import TranslationProcessor
+
+def make_memory():
+    # 不可达的Redis，验证查询失败时不影响翻译
+    return FuzzyMemory(redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1))
+
+def test_shingles_ignore_number_changes():
+    """测试仅数字不同的片段特征相同，改动单词时相似度下降"""
+    a = shingles("Revenue increased by 12 percent in 2023 compared to last year.")
+    b = shingles("Revenue increased by 15 percent in 2024 compared to last year.")
+    c = shingles("Profit increased by 15 percent in 2024 compared to last year.")
+    assert jaccard(a, b) == 1.0
+    assert 0.6 < jaccard(a, c) < 1.0
+
+def test_minhash_estimates_similarity():
+    """测试MinHash签名的一致比例接近Jaccard相似度，且签名与进程无关"""
+    memory = make_memory()
+    a = shingles("The committee approved the annual budget for the research department.")
+    b = shingles("The committee approved the annual budget for the marketing department.")
+    agreement = float((memory.signature(a) == memory.signature(b)).mean())
+    assert abs(agreement - jaccard(a, b)) < 0.2
+    assert np.array_equal(memory.signature(a), make_memory().signature(a))
+    assert len(memory._band_keys("fm:auto:zh-CN", memory.signature(a))) == memory.bands
+
+def test_reuse_only_number_variants():
+    """测试默认只复用仅数字不同的历史译文，并替换为当前片段的数字"""
+    memory = make_memory()
+    source = "Revenue increased by 12 percent in 2023."
+    candidates = [FuzzyCandidate(source, "2023年收入增长了12%。", 1.0)]
+    assert memory.reuse("Revenue increased by 15 percent in 2024.", candidates) == "2024年收入增长了15%。"
+    assert memory.reuse("Profit increased by 15 percent in 2024.", [candidates[0]._replace(similarity=0.8)]) is None
+
+def test_lookup_survives_redis_failure():
+    """测试Redis不可用时查询返回空结果"""
+    assert make_memory().lookup_many(["A reasonably long segment of text."], "auto", "zh-CN", "openai", "gpt-3.5-turbo") == [[]]
+
+def test_namespace_separates_provider_model_and_glossary():
+    """测试不同提供商、模型或术语表的历史译文分开索引"""
+    namespaces = {
+        FuzzyMemory._namespace("auto", "zh-CN", "openai", "gpt-3.5-turbo", None),
+        FuzzyMemory._namespace("auto", "zh-CN", "deepseek", "deepseek-chat", None),
+        FuzzyMemory._namespace("auto", "zh-CN", "openai", "gpt-4", None),
+        FuzzyMemory._namespace("auto", "zh-CN", "openai", "gpt-3.5-turbo", "legal")
+    }
+    assert len(namespaces) == 4
+
+@pytest.mark.asyncio
+async def test_segments_use_provider_scoped_memory():
+    """测试批量翻译按请求的提供商查询记忆，按实际提供服务的提供商写入"""
+    processor = TranslationProcessor()
+    memory = MagicMock()
+    memory.lookup_many.return_value = [[]]
+    memory.reuse.return_value = None
+    with patch("app.core.translation_processor.fuzzy_memory", memory), \
+            patch("app.core.translation_processor.translation_cache") as cache, \
+            patch("app.core.translation_processor.settings.SINGLE_FLIGHT_ENABLED", False), \
+            patch.object(processor, "_call_routed", AsyncMock(return_value=(["译文"], "deepseek"))):
+        cache.get_many.return_value = {}
+        await processor._translate_segments(["Hello world"], "openai", "zh-CN", {"openai": "key"}, glossary="legal")
+    assert memory.lookup_many.call_args.args[3:] == ("openai", "gpt-3.5-turbo", "legal")
+    assert memory.add_many.call_args.args[3:] == ("deepseek", "deepseek-chat", "legal")
+
+@pytest.mark.asyncio
+async def test_references_added_to_llm_prompt():
+    """测试相似片段的历史译文作为参考附加到大模型提示词"""
+    processor = TranslationProcessor()
+    chat = AsyncMock(return_value="译文")
+    references = [FuzzyCandidate("Profit increased by 5 percent.", "利润增长了5%。", 0.8)]
+    with patch.object(processor, "_chat_completion", chat):
+        await processor._invoke_provider("openai", "Revenue increased by 5 percent.", "zh-CN", {"openai": "key"}, references)
+    system_prompt = chat.await_args.args[2]
+    assert "Profit increased by 5 percent." in system_prompt
+    assert "利润增长了5%。" in system_prompt
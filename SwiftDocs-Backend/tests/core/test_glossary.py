@@ -0,0 +1,80 @@
+import json
+import pytest
+from unittest.mock import patch
+from app.core.glossary import AhoCorasick, Glossary, GlossaryRegistry
+from app.core.translation_processor import TranslationProcessor
+
+def test_aho_corasick_finds_overlapping_patterns():
+    """测试自动机找出所有重叠匹配"""
+    matcher = AhoCorasick(["he", "she", "his", "hers"])
+    matches = sorted((start, end) for start, end, _ in matcher.find_all("ushers"))
+    assert matches == [(1, 4), (2, 4), (2, 6)]
+
+def test_mask_and_restore_terms():
+    """测试术语按指定译文还原，受保护术语原样保留"""
+    glossary = Glossary(terms={"neural network": "神经网络", "network": "网络"}, protected=["SwiftDocs"])
+    masked, replacements = glossary.mask("SwiftDocs uses a Neural Network, not a networking stack.")
+    assert masked == "⟦0⟧ uses a ⟦1⟧, not a networking stack."
+    assert replacements == ["SwiftDocs", "神经网络"]
+    assert glossary.restore("⟦0⟧使用⟦ 1 ⟧。", replacements) == "SwiftDocs使用神经网络。"
+
+def test_mask_protects_urls_code_and_formulas():
+    """测试URL、行内代码和公式不参与翻译"""
+    glossary = Glossary()
+    text = "See https://example.com/a?b=1 and run `pip install x` where $E=mc^2$."
+    masked, replacements = glossary.mask(text)
+    assert masked == "See ⟦0⟧ and run ⟦1⟧ where ⟦2⟧."
+    assert glossary.restore(masked, replacements) == text
+
+def test_currency_and_paths_are_not_protected():
+    """测试两个金额之间的正文和Windows路径不被当作公式或LaTeX命令"""
+    glossary = Glossary()
+    text = "Revenue rose from $5 million to $10 million in 2023."
+    assert glossary.mask(text) == (text, [])
+    assert glossary.mask(r"Open C:\Users\foo\file.txt") == (r"Open C:\Users\foo\file.txt", [])
+    assert glossary.mask(r"where $x$ and \alpha{1} hold")[1] == ["$x$", r"\alpha{1}"]
+
+def test_terms_keyed_by_target_language():
+    """测试术语按目标语言还原，没有对应语言译文的术语照常翻译"""
+    glossary = Glossary(terms={"neural network": {"zh-CN": "神经网络", "ja": "ニューラルネットワーク"}, "GPU": "图形处理器"})
+    assert glossary.mask("A neural network on a GPU", "zh-CN")[1] == ["神经网络", "图形处理器"]
+    assert glossary.mask("A neural network on a GPU", "ja-JP")[1] == ["ニューラルネットワーク", "图形处理器"]
+    assert glossary.mask("A neural network on a GPU", "fr-FR") == ("A neural network on a ⟦0⟧", ["图形处理器"])
+
+def test_large_glossary():
+    """测试数万条术语的术语表"""
+    terms = {f"term{i}x": f"术语{i}" for i in range(20000)}
+    glossary = Glossary(terms=terms, protect_patterns=False)
+    masked, replacements = glossary.mask("alpha term123x beta term19999x term5")
+    assert masked == "alpha ⟦0⟧ beta ⟦1⟧ term5"
+    assert replacements == ["术语123", "术语19999"]
+
+def test_registry_loads_and_reloads(tmp_path):
+    """测试从目录加载术语表并拒绝非法名称"""
+    (tmp_path / "medical.json").write_text(
+        json.dumps({"terms": {"MRI": "磁共振成像"}, "case_sensitive": True}),
+        encoding="utf-8"
+    )
+    registry = GlossaryRegistry(str(tmp_path))
+    glossary = registry.get("medical")
+    assert registry.get("medical") is glossary
+    assert glossary.mask("mri and MRI")[0] == "mri and ⟦0⟧"
+    with pytest.raises(ValueError):
+        registry.get("../secrets")
+    with pytest.raises(ValueError):
+        registry.get("missing")
+
+@pytest.mark.asyncio
+async def test_translate_restores_placeholders():
+    """测试翻译时遮蔽术语并还原译文中的占位符"""
+    processor = TranslationProcessor()
+    sent = []
+
+    async def fake_translate_text(text, *args, **kwargs):
+        sent.append(text)
+        return text.replace("Open", "打开"), False
+
+    with patch.object(processor, "_translate_text", fake_translate_text):
+        result, _ = await processor.translate("Open https://example.com", "openai", "zh-CN", {"openai": "key"})
+    assert sent == ["Open ⟦0⟧"]
+    assert result == "打开 https://example.com"
@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from app.core.http_client import HTTPClientPool
+
+@pytest.mark.asyncio
+async def test_client_reused_within_loop():
+    """测试同一事件循环内复用客户端"""
+    pool = HTTPClientPool()
+    client = pool.get_client("openai")
+    assert pool.get_client("openai") is client
+    assert pool.get_client("deepseek") is not client
+    await pool.aclose()
+    assert client.is_closed
+
+def test_client_recreated_for_new_loop():
+    """测试事件循环变化时重新创建客户端"""
+    pool = HTTPClientPool()
+
+    async def get_client():
+        return pool.get_client("google")
+
+    first = asyncio.run(get_client())
+    second = asyncio.run(get_client())
+    assert first is not second
+    # asyncio.run结束时在原事件循环中关闭了客户端
+    assert first.is_closed and second.is_closed
+
+def test_worker_loop_reuses_client_across_tasks():
+    """测试工作进程的常驻事件循环在任务之间复用客户端"""
+    pool = HTTPClientPool()
+    pool.start_worker_loop()
+
+    async def get_client():
+        return pool.get_client("openai")
+
+    first = pool.run(get_client())
+    second = pool.run(get_client())
+    assert first is second and not first.is_closed
+    pool.close()
+    assert first.is_closed
+
+@pytest.mark.asyncio
+async def test_unknown_provider():
+    """测试不支持的提供商"""
+    pool = HTTPClientPool()
+    with pytest.raises(ValueError):
+        pool.get_client("unknown")
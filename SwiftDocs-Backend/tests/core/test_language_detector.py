@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.core.language_detector import detect_language, needs_translation, filter_segments
+from app.core.translation_processor import TranslationProcessor
+
+def test_detect_language_by_script():
+    """测试按文字系统识别中日韩俄及简繁体"""
+    assert detect_language("使用数据分析的方法改进系统") == "zh-CN"
+    assert detect_language("這是一個關於經濟發展的問題") == "zh-TW"
+    assert detect_language("これは日本語の文章です") == "ja"
+    assert detect_language("이것은 한국어 문장입니다") == "ko"
+    assert detect_language("Это предложение на русском языке") == "ru"
+
+def test_detect_latin_language_by_trigrams():
+    """测试用三元组特征识别拉丁字母语言，过短的文本不做判断"""
+    assert detect_language("Please review the attached invoice and let me know if anything needs to be changed.") == "en"
+    assert detect_language("Bitte prüfen Sie die beigefügte Rechnung und teilen Sie mir mit, ob etwas fehlt.") == "de"
+    assert detect_language("Hello world") is None
+
+def test_needs_translation():
+    """测试跳过纯数字、符号和已是目标语言的片段"""
+    assert not needs_translation("12.5%  (3/4)", "zh-CN")
+    assert not needs_translation("• — ©", "en-US")
+    assert not needs_translation("本文介绍了系统的整体架构", "zh-CN")
+    assert needs_translation("本文介绍了系统的整体架构", "en-US")
+    assert needs_translation("這是一個關於經濟發展的問題", "zh-CN")
+    assert needs_translation("Hello world", "en-US")
+    assert filter_segments(["", "42", "Figure 3 shows the distribution of response times across regions."], "en-US") == [False, False, False]
+
+def test_embedded_english_sentence_is_translated():
+    """测试夹带英文句子的中文段落按字母计数，不被判定为已是中文"""
+    paragraph = "本文介绍了系统的整体架构与各模块之间的协作方式。" * 4 + "The cache layer reduces latency for repeated requests across all regions."
+    assert detect_language(paragraph) is None
+    assert needs_translation(paragraph, "zh-CN")
+
+@pytest.mark.asyncio
+async def test_process_task_does_not_skip_whole_text():
+    """测试整段文本不按语言整体跳过，只有不含字母的文本直接返回"""
+    processor = TranslationProcessor()
+    translate = AsyncMock(return_value=("译文", False))
+    with patch.object(processor, "translate", translate), \
+            patch("app.core.translation_processor.task_manager") as manager:
+        await processor.process_task("t1", "已经是中文的段落", "openai", "zh-CN", {"openai": "key"})
+    translate.assert_awaited_once()
+    assert manager.set_task_result.call_args.args[1]["skipped_segments"] == 0
+
+@pytest.mark.asyncio
+async def test_translate_segments_reports_skipped():
+    """测试批量翻译时跳过的片段不发给提供商并统计数量"""
+    processor = TranslationProcessor()
+    inner = AsyncMock(side_effect=lambda segments, *args: [f"译:{segment}" for segment in segments])
+    stats = {"skipped": 0}
+    with patch.object(processor, "_translate_segments", inner):
+        results = await processor.translate_segments(
+            ["2024", "Hello world", "已经是中文的段落"], "openai", "zh-CN", {"openai": "key"}, stats=stats
+        )
+    assert results == ["2024", "译:Hello world", "已经是中文的段落"]
+    assert inner.await_args.args[0] == ["Hello world"]
+    assert stats == {"skipped": 2}
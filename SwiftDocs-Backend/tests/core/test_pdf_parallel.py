@@ -0,0 +1,69 @@
+import fitz
+import pytest
+from unittest.mock import patch
+from app.core.config import settings
+from app.core.celery_app import celery_app
+from app.core.pdf_processor import PDFProcessor
+from app.tasks import pdf_tasks
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for number in range(6):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number + 1}")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+@pytest.fixture
+def eager_shards():
+    """Celery子任务在当前进程中同步执行，每片两页"""
+    celery_app.conf.task_always_eager = True
+    try:
+        with patch.object(settings, "PDF_PARALLEL_MIN_PAGES", 2), patch.object(settings, "PDF_EXTRACT_SHARD_PAGES", 2), \
+                patch("app.tasks.pdf_tasks.task_manager") as manager:
+            yield manager
+    finally:
+        celery_app.conf.task_always_eager = False
+
+def test_plan_shards_splits_contiguous_ranges(pdf_path, eager_shards):
+    """测试页面按连续区间分片，页数不足阈值时只有一个分片"""
+    with PDFProcessor(pdf_path) as processor:
+        assert processor.plan_shards() == [[0, 1], [2, 3], [4, 5]]
+        assert processor.plan_shards([5, 1, 9]) == [[5, 1]]
+        with patch.object(settings, "PDF_EXTRACT_WORKERS", 2):
+            assert processor.plan_shards() == [[0, 1, 2], [3, 4, 5]]
+        with patch.object(settings, "PDF_PARALLEL_MIN_PAGES", 64):
+            assert processor.plan_shards() == [[0, 1, 2, 3, 4, 5]]
+
+def test_sharded_task_matches_serial(pdf_path, eager_shards):
+    """测试分片子任务合并的文本和布局与串行提取一致，并按页码顺序合并"""
+    with PDFProcessor(pdf_path) as processor:
+        serial_text = processor.extract_text(index=False)
+        serial_layout = processor.analyze_layout([5, 1, 3])
+
+    pdf_tasks.process_pdf("text-task", pdf_path, "text")
+    text = eager_shards.set_task_result.call_args.args[1]["result"]
+    pdf_tasks.process_pdf("layout-task", pdf_path, "layout", pages=[5, 1, 3])
+    layout = eager_shards.set_task_result.call_args.args[1]["result"]
+    assert list(text) == list(range(6))
+    assert text == serial_text
+    assert layout == serial_layout
+
+def test_index_built_after_shards_merge(pdf_path, eager_shards, isolated_pdf_caches):
+    """测试分片提取时不写入索引，合并结果后再按分片建立全文检索索引"""
+    order = []
+    eager_shards.set_task_result.side_effect = lambda *args: order.append(isolated_pdf_caches.search("Page 3"))
+    pdf_tasks.process_pdf("text-task", pdf_path, "text")
+    assert order == [[]]
+    assert [hit["page"] for hit in isolated_pdf_caches.search("Page 3")] == [2]
+
+def test_shard_failure_marks_task_failed(pdf_path, eager_shards):
+    """测试分片失败时任务记录错误，不写入部分结果"""
+    with patch.object(PDFProcessor, "extract_text", side_effect=RuntimeError("损坏的页面")):
+        with pytest.raises(RuntimeError):
+            pdf_tasks.process_pdf("text-task", pdf_path, "text")
+    eager_shards.set_task_error.assert_called_with("text-task", "损坏的页面")
+    eager_shards.set_task_result.assert_not_called()
@@ -0,0 +1,75 @@
+import fitz
+import pytest
+from unittest.mock import patch
+from app.core.pdf_processor import PDFProcessor, negotiate_image_format
+from app.core.render_cache import RenderCache
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for number in range(3):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number + 1}")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+def test_iter_pages_yields_one_record_per_page(pdf_path):
+    """测试逐页产出文本、布局和图像引用，跳过超出范围的页码"""
+    with PDFProcessor(pdf_path) as processor:
+        records = list(processor.iter_pages([2, 0, 9], image_url=lambda page_num: f"/pages/{page_num}/image"))
+    assert [record["page"] for record in records] == [2, 0]
+    assert records[0]["text"].strip() == "Page 3"
+    assert records[0]["layout"][0]["type"] == "text"
+    assert records[1]["image"] == "/pages/0/image"
+
+def test_iter_pages_is_lazy(pdf_path):
+    """测试生成器按需处理页面"""
+    with PDFProcessor(pdf_path) as processor:
+        pages = processor.iter_pages(layout=False)
+        assert next(pages) == {"page": 0, "text": processor.extract_text([0])[0]}
+
+def test_render_page_returns_png(pdf_path, tmp_path):
+    """测试渲染页面返回PNG数据"""
+    with patch("app.core.pdf_processor.render_cache", RenderCache(str(tmp_path / "render"))):
+        with PDFProcessor(pdf_path) as processor:
+            assert processor.render_page(0, zoom=1.0).startswith(b"\x89PNG")
+            assert processor.render_page(5) is None
+
+def test_tile_pyramid_covers_page(pdf_path, tmp_path):
+    """测试瓦片网格覆盖整页，边缘瓦片按页面边界裁剪，超出网格的瓦片不存在"""
+    with patch("app.core.pdf_processor.render_cache", RenderCache(str(tmp_path / "render"))):
+        with PDFProcessor(pdf_path) as processor:
+            grid = processor.get_tile_grid(0, 1)
+            assert (grid["width"], grid["height"]) == (1190, 1684)
+            assert (grid["columns"], grid["rows"]) == (5, 7)
+            assert len(processor.get_tile_pyramid(0)) == 5
+
+            full = fitz.Pixmap(processor.render_tile(0, 1, 0, 0))
+            edge = fitz.Pixmap(processor.render_tile(0, 1, 4, 6))
+            assert (full.width, full.height) == (256, 256)
+            assert edge.width < 256 and edge.height < 256
+            assert processor.render_tile(0, 1, 5, 0) is None
+            assert processor.render_tile(0, 9, 0, 0) is None
+
+def test_negotiate_image_format():
+    """测试按Accept请求头的权重选择图像格式，默认PNG"""
+    assert negotiate_image_format(None) == "png"
+    assert negotiate_image_format("*/*") == "png"
+    assert negotiate_image_format("image/avif,image/webp,image/png;q=0.8,*/*;q=0.5") == "webp"
+    assert negotiate_image_format("image/webp;q=0.5, image/jpeg") == "jpeg"
+
+def test_render_page_formats_and_references(pdf_path, tmp_path):
+    """测试按格式和质量编码，任务结果只保存图像引用"""
+    with patch("app.core.pdf_processor.render_cache", RenderCache(str(tmp_path / "render"))):
+        with PDFProcessor(pdf_path) as processor:
+            assert processor.render_page(0, zoom=1.0, fmt="webp")[8:12] == b"WEBP"
+            low = processor.render_page(0, zoom=1.0, fmt="jpeg", quality=10)
+            high = processor.render_page(0, zoom=1.0, fmt="jpeg", quality=95)
+            assert low.startswith(b"\xff\xd8") and len(low) < len(high)
+
+            reference = processor.image_reference(1, bbox=(0, 0, 100, 50))
+            assert reference["url"].endswith("/pages/1/region?x0=0&y0=0&x1=100&y1=50&zoom=2.0")
+            assert "image/webp" in reference["media_types"]
+            assert processor.image_reference(9) is None
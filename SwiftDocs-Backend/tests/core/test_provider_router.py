@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.core.provider_router import ProviderRouter, LatencyTracker
+
+def make_call(delays, failures=()):
+    calls = []
+
+    async def call(provider):
+        calls.append(provider)
+        await asyncio.sleep(delays.get(provider, 0))
+        if provider in failures:
+            raise ValueError(f"{provider}失败")
+        return f"{provider}译文"
+
+    return call, calls
+
+def test_latency_percentile():
+    """测试延迟分位数计算"""
+    tracker = LatencyTracker(min_samples=5)
+    for value in [0.1, 0.2, 0.3, 0.4]:
+        tracker.record("openai", value)
+    assert tracker.percentile("openai", 0.9) is None
+    tracker.record("openai", 1.0)
+    assert tracker.percentile("openai", 0.9) == 1.0
+
+@pytest.mark.asyncio
+async def test_hedge_takes_first_response():
+    """测试主请求过慢时对冲请求先返回"""
+    router = ProviderRouter()
+    call, calls = make_call({"openai": 1.0, "deepseek": 0.01})
+    with patch("app.core.provider_router.settings.TRANSLATION_HEDGE_DEFAULT_DELAY", 0.05), \
+         patch("app.core.provider_router.settings.TRANSLATION_HEDGE_MIN_DELAY", 0.0):
+        result, served_by = await router.run(["openai", "deepseek"], call, hedge=True)
+    assert (result, served_by) == ("deepseek译文", "deepseek")
+    assert calls == ["openai", "deepseek"]
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_is_fast():
+    """测试主请求及时返回时不发对冲请求"""
+    router = ProviderRouter()
+    call, calls = make_call({"openai": 0.0})
+    with patch("app.core.provider_router.settings.TRANSLATION_HEDGE_DEFAULT_DELAY", 0.5):
+        result, served_by = await router.run(["openai", "deepseek"], call, hedge=True)
+    assert served_by == "openai"
+    assert calls == ["openai"]
+
+@pytest.mark.asyncio
+async def test_failover_on_error():
+    """测试失败时故障转移"""
+    router = ProviderRouter()
+    call, calls = make_call({}, failures={"openai", "deepseek"})
+    result, served_by = await router.run(["openai", "deepseek", "google"], call, failover=True)
+    assert served_by == "google"
+    assert calls == ["openai", "deepseek", "google"]
+
+@pytest.mark.asyncio
+async def test_error_without_failover():
+    """测试未开启故障转移时直接抛出错误"""
+    router = ProviderRouter()
+    call, calls = make_call({}, failures={"openai"})
+    with pytest.raises(ValueError):
+        await router.run(["openai", "deepseek"], call)
+    assert calls == ["openai"]
@@ -0,0 +1,57 @@
+import redis
+import pytest
+from unittest.mock import MagicMock, patch
+from app.core.provider_stats import ProviderStats
+from app.core.translation_processor import TranslationProcessor
+
+def make_stats():
+    # 不可达的Redis，验证退回进程内统计
+    return ProviderStats(redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1))
+
+def test_select_lowest_latency():
+    """测试选择平均延迟最低的提供商"""
+    stats = make_stats()
+    for _ in range(5):
+        stats.record("openai", "key-a", 2.0, chars=100)
+        stats.record("deepseek", "key-b", 0.5, chars=100)
+    assert stats.select([("openai", "key-a"), ("deepseek", "key-b")]) == "deepseek"
+
+def test_skip_unhealthy_provider():
+    """测试错误率过高的提供商不再被选择"""
+    stats = make_stats()
+    for _ in range(10):
+        stats.record("deepseek", "key-b", 0.5, failed=True)
+        stats.record("openai", "key-a", 2.0, chars=100)
+    assert stats.select([("deepseek", "key-b"), ("openai", "key-a")]) == "openai"
+
+def test_unknown_provider_is_explored():
+    """测试没有统计的提供商优先尝试"""
+    stats = make_stats()
+    stats.record("openai", "key-a", 0.1, chars=100)
+    assert stats.select([("openai", "key-a"), ("google", "key-c")]) == "google"
+
+def test_resolve_auto_requires_keys():
+    """测试自动选择时只在已配置密钥的提供商中选择"""
+    processor = TranslationProcessor()
+    assert processor.resolve_provider("openai", {}) == "openai"
+    assert processor.resolve_provider("auto", {"google": "key-c"}) == "google"
+    with pytest.raises(ValueError):
+        processor.resolve_provider("auto", {})
+
+def test_samples_flushed_in_one_pipeline():
+    """测试记录和选择不访问Redis，样本由flush批量写入并刷新共享统计"""
+    client = MagicMock()
+    stats = ProviderStats(client)
+    with patch.object(stats._flusher, "start"):
+        for _ in range(3):
+            stats.record("openai", "key-a", 1.0, chars=100)
+        assert stats.select([("openai", "key-a"), ("google", "key-c")]) == "google"
+    client.pipeline.assert_not_called()
+
+    shared = {"latency": "0.5", "error_rate": "0", "throughput": "200", "samples": "50", "updated_at": "1"}
+    pipe = client.pipeline.return_value
+    pipe.execute.return_value = [1, 1, 1, shared, {}]
+    stats.flush()
+    assert client.pipeline.call_count == 1
+    assert stats._update_script.call_count == 3
+    assert stats.get_many([stats.make_key("openai", "key-a")])[stats.make_key("openai", "key-a")]["samples"] == 50
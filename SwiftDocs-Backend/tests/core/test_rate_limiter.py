@@ -0,0 +1,57 @@
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.core.rate_limiter import TokenBucket, AdaptiveConcurrencyLimiter, RateLimiterRegistry
+from app.core.exceptions import ProviderError
+from app.core.translation_processor import TranslationProcessor, parse_retry_after
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    """测试令牌桶按速率发放令牌"""
+    bucket = TokenBucket(rate=20.0, capacity=1.0)
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+def test_aimd_adjusts_limit():
+    """测试AIMD加性增大、乘性减小"""
+    limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=1, max_limit=8, cooldown=0)
+    limiter.on_overload()
+    assert limiter.limit == 2
+    for _ in range(10):
+        limiter.on_success()
+    assert 4 < limiter.limit <= 8
+    for _ in range(10):
+        limiter.on_overload()
+    assert limiter.limit == 1
+
+def test_parse_retry_after():
+    """测试解析Retry-After"""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("invalid") is None
+
+@pytest.mark.asyncio
+async def test_call_with_limits_retries_on_429():
+    """测试429时降低并发并按Retry-After重试"""
+    processor = TranslationProcessor()
+    registry = RateLimiterRegistry()
+    request = AsyncMock(side_effect=[ProviderError("限流", "openai", upstream_status=429, retry_after=0.01), "你好"])
+    with patch("app.core.translation_processor.rate_limiter", registry):
+        result = await processor._call_with_limits("openai", {"openai": "key"}, request)
+    assert result == "你好"
+    assert request.await_count == 2
+    metrics = next(iter(registry.get_metrics().values()))
+    assert metrics["throttled"] == 1
+    assert metrics["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_call_with_limits_does_not_retry_client_errors():
+    """测试非限流错误不重试"""
+    processor = TranslationProcessor()
+    request = AsyncMock(side_effect=ProviderError("密钥无效", "openai", upstream_status=401))
+    with patch("app.core.translation_processor.rate_limiter", RateLimiterRegistry()):
+        with pytest.raises(ProviderError):
+            await processor._call_with_limits("openai", {"openai": "key"}, request)
+    assert request.await_count == 1
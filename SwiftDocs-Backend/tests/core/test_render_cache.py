@@ -0,0 +1,72 @@
+import fitz
+from unittest.mock import patch
+from app.core.render_cache import RenderCache
+from app.core.pdf_processor import PDFProcessor
+
+def test_memory_and_disk_tiers(tmp_path):
+    """测试内存层命中、内存淘汰后从磁盘层命中，以及新进程从磁盘恢复索引"""
+    cache = RenderCache(str(tmp_path), memory_bytes=10, disk_bytes=100)
+    cache.set("a" * 64, b"12345678")
+    cache.set("b" * 64, b"87654321")
+    assert cache.get("b" * 64) == b"87654321"
+    assert cache.get("a" * 64) == b"12345678"
+    assert cache.get("c" * 64) is None
+    metrics = cache.get_metrics()
+    assert (metrics["memory_hits"], metrics["disk_hits"], metrics["misses"]) == (1, 1, 1)
+
+    reopened = RenderCache(str(tmp_path), memory_bytes=10, disk_bytes=100)
+    assert reopened.get("b" * 64) == b"87654321"
+    assert reopened.get_metrics()["disk_entries"] == 2
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    """测试磁盘层超出总大小时删除最久未使用的文件"""
+    cache = RenderCache(str(tmp_path), memory_bytes=0, disk_bytes=20)
+    cache.set("a" * 64, b"x" * 8)
+    cache.set("b" * 64, b"y" * 8)
+    assert cache.get("a" * 64) is not None
+    cache.set("c" * 64, b"z" * 8)
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) == b"x" * 8
+    assert cache.get_metrics()["evictions"] == 1
+    assert not (tmp_path / "bb" / ("b" * 64)).exists()
+
+def test_disk_budget_shared_across_processes(tmp_path):
+    """测试多个进程共享目录时，超出预算后重新扫描并按目录总大小淘汰其他进程写入的旧文件"""
+    first = RenderCache(str(tmp_path), memory_bytes=0, disk_bytes=20)
+    second = RenderCache(str(tmp_path), memory_bytes=0, disk_bytes=20)
+    second.get_metrics()
+    for name in "ab":
+        first.set(name * 64, b"x" * 8)
+    for name in "cde":
+        second.set(name * 64, b"y" * 8)
+    files = [path for path in tmp_path.glob("*/*") if path.is_file()]
+    assert sum(path.stat().st_size for path in files) <= 20
+    assert sorted(path.name[0] for path in files) == ["d", "e"]
+    assert second.get_metrics()["disk_bytes"] == 16
+
+def test_content_hash_cache_is_bounded(tmp_path):
+    """测试按路径缓存的内容哈希超出容量时淘汰最久未使用的条目"""
+    cache = RenderCache(str(tmp_path / "render"))
+    cache.HASH_CACHE_SIZE = 2
+    for name in "abc":
+        (tmp_path / name).write_bytes(name.encode())
+        cache.content_hash(str(tmp_path / name))
+    assert list(cache._hashes) == [str(tmp_path / "b"), str(tmp_path / "c")]
+
+def test_render_page_uses_cache(tmp_path):
+    """测试同一页面重复渲染只光栅化一次，文档内容变化后缓存失效"""
+    path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Hello")
+    doc.save(str(path))
+    doc.close()
+
+    cache = RenderCache(str(tmp_path / "render"))
+    with patch("app.core.pdf_processor.render_cache", cache):
+        with PDFProcessor(str(path)) as processor:
+            first = processor.render_page(0, zoom=1.0)
+            assert processor.render_page(0, zoom=1.0) == first
+            processor.render_page(0, zoom=1.0, clip=(0, 0, 100, 100))
+    metrics = cache.get_metrics()
+    assert metrics["memory_hits"] == 1
+    assert metrics["misses"] == 2
@@ -0,0 +1,88 @@
+import redis
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from app.core.revision_tracker import RevisionTracker, RevisionMatch, segment_hash
+from app.core.translation_processor import TranslationProcessor
+
+def make_tracker():
+    # 不可达的Redis，验证查询失败时按新文档翻译
+    return RevisionTracker(redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1), sketch_size=16)
+
+def test_segment_hash_ignores_layout_whitespace():
+    """测试片段指纹忽略换行与空白差异，空白片段没有指纹"""
+    assert segment_hash("Annual\n  Report") == segment_hash("Annual Report")
+    assert segment_hash("  ") is None
+
+def test_sketch_similarity_estimates_overlap():
+    """测试草图相似度估计片段集合的重合比例"""
+    tracker = make_tracker()
+    original = [segment_hash(f"Paragraph {index}") for index in range(200)]
+    revised = original[:180] + [segment_hash(f"New paragraph {index}") for index in range(20)]
+    tracker.sketch_size = 128
+    assert tracker.similarity(tracker.sketch(original), tracker.sketch(original)) == 1.0
+    assert 0.6 < tracker.similarity(tracker.sketch(original), tracker.sketch(revised)) < 1.0
+
+def test_find_previous_survives_redis_failure():
+    """测试Redis不可用时视为没有旧版本"""
+    assert make_tracker().find_previous("doc", [segment_hash("text")]) is None
+
+@pytest.mark.asyncio
+async def test_revision_translates_only_changed_segments():
+    """测试修订版文档只翻译改动的片段，其余复用旧版本译文"""
+    processor = TranslationProcessor()
+    calls = []
+
+    async def fake_translate_segments(segments, *args, **kwargs):
+        calls.append(list(segments))
+        return [f"译:{segment}" for segment in segments]
+
+    tracker = MagicMock()
+    tracker.find_previous.return_value = RevisionMatch("old", 0.9)
+    tracker.get_translations.return_value = {segment_hash("Intro"): "旧译:Intro", segment_hash("Summary"): "旧译:Summary"}
+    tracker.metrics = {"reused": 0, "translated": 0}
+    pages = {0: ["Intro", "Changed paragraph"], 1: ["Summary"]}
+    with patch("app.core.translation_processor.revision_tracker", tracker), \
+            patch.object(processor, "translate_segments", fake_translate_segments):
+        translated, _, revision = await processor.translate_revision("new", pages, "openai", "zh-CN", {"openai": "key"})
+    assert calls == [["Changed paragraph"]]
+    assert translated == {0: ["旧译:Intro", "译:Changed paragraph"], 1: ["旧译:Summary"]}
+    assert revision == {"document_id": "new", "previous_document": "old", "similarity": 0.9, "reused": 2, "translated": 1}
+    assert tracker.get_translations.call_args.args[:3] == (["new", "old"], "openai", "gpt-3.5-turbo")
+    assert tracker.register.call_args.args[5] == {segment_hash("Changed paragraph"): "译:Changed paragraph"}
+
+def test_translations_are_kept_per_provider_and_model():
+    """测试不同提供商或模型的译文互不复用"""
+    tracker = make_tracker()
+    keys = {
+        tracker._translations_key("doc", "openai", "gpt-3.5-turbo", "zh-CN", None),
+        tracker._translations_key("doc", "deepseek", "deepseek-chat", "zh-CN", None),
+        tracker._translations_key("doc", "openai", "gpt-4", "zh-CN", None)
+    }
+    assert len(keys) == 3
+
+@pytest.mark.asyncio
+async def test_document_parsing_runs_off_event_loop():
+    """测试按文档翻译时PDF解析和文件哈希在线程中执行"""
+    processor = TranslationProcessor()
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def fake_extract(file_path, pages):
+        threads.append(threading.get_ident())
+        return {0: [{"text": "Intro", "bbox": [0, 0, 1, 1]}]}
+
+    def fake_document_id(file_path):
+        threads.append(threading.get_ident())
+        return "doc"
+
+    async def fake_revision(document, pages, *args, **kwargs):
+        return {0: ["译:Intro"]}, {"skipped": 0}, {"document_id": document}
+
+    with patch.object(processor, "_extract_blocks", fake_extract), \
+            patch("app.core.translation_processor.document_id", fake_document_id), \
+            patch.object(processor, "translate_revision", fake_revision), \
+            patch("app.core.translation_processor.task_manager") as manager:
+        await processor.process_task("t1", "", "openai", "zh-CN", {"openai": "key"}, file_path="doc.pdf")
+    assert len(threads) == 2 and loop_thread not in threads
+    assert manager.set_task_result.call_args.args[1]["pages"][0][0]["translated_text"] == "译:Intro"
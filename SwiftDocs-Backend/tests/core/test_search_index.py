@@ -0,0 +1,81 @@
+import fitz
+import threading
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.core.search_index import SearchIndex, tokenize, index_tokens, build_match_query
+from app.core.pdf_processor import PDFProcessor
+from app.main import app
+
+WORDS = [(72, 60, 120, 72, "Quarterly"), (124, 60, 170, 72, "revenue"), (72, 80, 160, 92, "翻译系统的性能")]
+
+def test_cjk_text_is_split_into_bigrams():
+    """测试中日韩文字切分为二元词，查询中的连续二元词作为短语"""
+    assert tokenize("Hello 翻译系统") == [["hello"], ["翻译", "译系", "系统"]]
+    assert build_match_query("翻译系统 hello") == '"翻译 译系 系统" AND "hello"'
+    assert build_match_query("  ,. ") is None
+
+def test_search_returns_snippets_and_highlights(tmp_path):
+    """测试检索返回页码、摘要和命中词的边界框，中文词在句中也能命中"""
+    index = SearchIndex(str(tmp_path / "search.db"))
+    index.add_page("doc1", 0, "hash", "Quarterly revenue\n翻译系统的性能", WORDS)
+    index.add_page("doc2", 3, "hash", "Nothing relevant here", [])
+
+    hits = index.search("系统")
+    assert [(hit["document_id"], hit["page"]) for hit in hits] == [("doc1", 0)]
+    assert hits[0]["highlights"] == [[72, 80, 160, 92]]
+    assert "翻译系统的性能" in hits[0]["snippet"]
+    assert index.search("REVENUE quarterly")[0]["highlights"] == [[72, 60, 120, 72], [124, 60, 170, 72]]
+    assert index.search("统的系") == []
+
+def test_single_cjk_character_matches(tmp_path):
+    """测试单字查询命中二元词中间和末尾的字，二元词短语不跨越到单字上"""
+    assert index_tokens("好书 猫") == "好书 猫 好 书"
+    index = SearchIndex(str(tmp_path / "search.db"))
+    index.add_page("doc1", 0, "hash", "这本书很好，我喜欢猫。", [])
+    for query in ["书", "猫", "本书", "喜欢猫"]:
+        assert [hit["page"] for hit in index.search(query)] == [0], query
+    assert index.search("狗") == []
+    assert index.search("猫我") == []
+
+def test_reindexing_page_replaces_previous_content(tmp_path):
+    """测试重新写入页面时替换旧索引，删除文档后不再命中"""
+    index = SearchIndex(str(tmp_path / "search.db"))
+    index.add_page("doc1", 0, "v1", "old text", [])
+    index.add_page("doc1", 0, "v2", "new text", [])
+    assert index.search("old") == []
+    assert index.is_indexed("doc1", 0, "v2")
+    index.remove_document("doc1")
+    assert index.search("new") == []
+
+def test_extraction_feeds_index(tmp_path, isolated_pdf_caches):
+    """测试逐页提取时写入索引，并可通过检索接口查询"""
+    path = tmp_path / "report.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Introduction")
+    doc.new_page().insert_text((72, 72), "Searchable conclusion")
+    doc.save(str(path))
+    doc.close()
+
+    with PDFProcessor(str(path)) as processor:
+        list(processor.iter_pages(layout=False))
+    with patch("app.routers.document.search_index", isolated_pdf_caches):
+        response = TestClient(app).get("/api/v1/documents/search", params={"q": "conclusion"})
+    assert response.status_code == 200
+    hits = response.json()["hits"]
+    assert [(hit["document_id"], hit["page"]) for hit in hits] == [("report", 1)]
+    assert len(hits[0]["highlights"]) == 1
+
+def test_search_and_delete_run_in_threadpool(isolated_pdf_caches):
+    """测试检索和删除接口在线程池中执行SQLite查询，不占用事件循环线程"""
+    threads = []
+    index = isolated_pdf_caches
+    index.add_page("doc1", 0, "hash", "Searchable conclusion", [])
+    search, remove = index.search, index.remove_document
+    index.search = lambda *args: threads.append(threading.current_thread().name) or search(*args)
+    index.remove_document = lambda *args: threads.append(threading.current_thread().name) or remove(*args)
+    with patch("app.routers.document.search_index", index):
+        client = TestClient(app)
+        assert client.get("/api/v1/documents/search", params={"q": "conclusion"}).json()["hits"]
+        assert client.delete("/api/v1/documents/doc1").status_code == 200
+    assert len(threads) == 2 and all(name.startswith("AnyIO worker thread") for name in threads)
+    assert search("conclusion") == []
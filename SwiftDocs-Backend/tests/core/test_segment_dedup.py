@@ -0,0 +1,61 @@
+import fitz
+import pytest
+from unittest.mock import patch
+from app.core.segment_dedup import normalize_segment, plan_segments, expand_translations, adapt_translation
+from app.core.pdf_processor import PDFProcessor
+from app.core.translation_processor import TranslationProcessor
+
+def test_normalize_segment():
+    """测试规范化合并连字符断词与空白"""
+    assert normalize_segment("  trans-\nlation\n  memory ") == "translation memory"
+    # 复合词跨行时保留连字符
+    assert normalize_segment("state-\nof-the-art") == "state-of-the-art"
+    assert normalize_segment("Jean-\nPaul") == "Jean-Paul"
+    assert normalize_segment("ＡＢＣ　１２") == "ABC 12"
+
+def test_plan_groups_exact_and_numbered_duplicates():
+    """测试完全相同和仅页码不同的片段归为同一组"""
+    segments = ["Annual Report", "Page 1 of 3", "Body text", " ", "Annual  Report", "Page 2 of 3"]
+    plan = plan_segments(segments)
+    assert plan.unique == ["Annual Report", "Page 1 of 3", "Body text"]
+    assert plan.groups == [0, 1, 2, -1, 0, 1]
+
+    results = expand_translations(segments, plan, ["年度报告", "第1页，共3页", "正文"])
+    assert results == ["年度报告", "第1页，共3页", "正文", " ", "年度报告", "第2页，共3页"]
+
+def test_adapt_rejects_unmatched_numbers():
+    """测试译文数字无法对应时不套用"""
+    assert adapt_translation("Figure 2", "Figure 1", "图一") is None
+
+@pytest.mark.asyncio
+async def test_translate_pages_translates_each_unique_segment_once():
+    """测试跨页重复片段只翻译一次并回填到各页"""
+    processor = TranslationProcessor()
+    calls = []
+
+    async def fake_translate_segments(segments, *args, **kwargs):
+        calls.append(list(segments))
+        return [f"译:{segment}" for segment in segments]
+
+    pages = {0: ["ACME Corp", "Intro", "1"], 1: ["ACME Corp", "Details", "2"]}
+    with patch.object(processor, "translate_segments", fake_translate_segments):
+        translated, stats = await processor.translate_pages(pages, "openai", "zh-CN", {"openai": "key"})
+    assert calls == [["ACME Corp", "Intro", "1", "Details"]]
+    assert translated == {0: ["译:ACME Corp", "译:Intro", "译:1"], 1: ["译:ACME Corp", "译:Details", "译:2"]}
+    assert stats == {"segments": 6, "translated": 4, "deduplicated": 2, "skipped": 0}
+
+def test_extract_segments(tmp_path):
+    """测试按文本块提取片段"""
+    path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for number in range(2):
+        page = doc.new_page()
+        page.insert_text((72, 40), "ACME Corp")
+        page.insert_text((72, 400), f"Body of page {number + 1}")
+    doc.save(str(path))
+    doc.close()
+
+    with PDFProcessor(str(path)) as processor:
+        segments = processor.extract_segments()
+    assert [block["text"].strip() for block in segments[1]] == ["ACME Corp", "Body of page 2"]
+    assert len(segments[0][0]["bbox"]) == 4
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import redis
+import pytest
+from unittest.mock import MagicMock
+from app.core.single_flight import SingleFlight
+
+@pytest.fixture
+def flight():
+    # Redis不可达时仍在进程内合并请求
+    unreachable = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1)
+    return SingleFlight(redis_client=unreachable, lock_ttl=1, wait_timeout=1)
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_coalesced(flight):
+    """测试相同键的并发调用只执行一次"""
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "译文"
+
+    results = await asyncio.gather(*(flight.do("key", func, lambda: None) for _ in range(5)))
+    assert results == ["译文"] * 5
+    assert calls == 1
+    assert flight.get_metrics()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others(flight):
+    """测试单个调用方取消不影响其他等待者"""
+    async def func():
+        await asyncio.sleep(0.05)
+        return "译文"
+
+    first = asyncio.ensure_future(flight.do("key", func, lambda: None))
+    second = asyncio.ensure_future(flight.do("key", func, lambda: None))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "译文"
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_callers(flight):
+    """测试上游错误传递给所有等待者"""
+    async def func():
+        await asyncio.sleep(0.01)
+        raise ValueError("上游失败")
+
+    results = await asyncio.gather(*(flight.do("key", func, lambda: None) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+@pytest.mark.asyncio
+async def test_remote_wait_polls_off_event_loop():
+    """测试未抢到锁时在线程中轮询共享缓存，读到其他进程写入的结果后返回"""
+    client = MagicMock()
+    client.set.return_value = False
+    client.exists.return_value = True
+    flight = SingleFlight(redis_client=client, lock_ttl=1, wait_timeout=1)
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def lookup():
+        threads.append(threading.get_ident())
+        return "译文" if len(threads) > 1 else None
+
+    async def func():
+        raise AssertionError("不应重复请求上游")
+
+    assert await flight.do("key", func, lookup) == "译文"
+    assert loop_thread not in threads
+    assert flight.get_metrics()["remote_coalesced"] == 1
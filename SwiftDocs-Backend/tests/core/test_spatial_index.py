@@ -0,0 +1,83 @@
+import fitz
+import pytest
+from unittest.mock import patch
+from app.core.spatial_index import PageIndex, SpatialIndexStore
+from app.core.render_cache import RenderCache
+from app.core.pdf_processor import PDFProcessor
+
+WORDS = [
+    (72, 60, 100, 72, "Hello", 0, 0, 0),
+    (104, 60, 140, 72, "world", 0, 0, 1),
+    (72, 80, 110, 92, "Second", 0, 1, 0),
+    (300, 400, 340, 412, "Far", 1, 0, 0),
+]
+
+def test_query_returns_words_in_reading_order():
+    """测试区域查询按阅读顺序返回中心点落在区域内的单词"""
+    index = PageIndex(list(reversed(WORDS)), cell_size=32)
+    assert index.text_in((60, 50, 150, 95)) == "Hello world\nSecond\n"
+    assert index.text_in((60, 50, 120, 75)) == "Hello\n"
+    assert index.text_in((0, 0, 10, 10)) == ""
+
+def test_hit_test_returns_word_and_line():
+    """测试点击测试返回光标下的单词及所在行"""
+    index = PageIndex(WORDS, cell_size=32)
+    hit = index.hit_test(120, 66)
+    assert hit["word"] == "world"
+    assert hit["line"] == "Hello world"
+    assert hit["line_bbox"] == [72, 60, 140, 72]
+    assert index.hit_test(200, 200) is None
+
+def test_store_persists_index(tmp_path):
+    """测试页面索引只构建一次，新进程从磁盘加载"""
+    loads = []
+
+    def load_words():
+        loads.append(1)
+        return WORDS
+
+    store = SpatialIndexStore(str(tmp_path), memory_pages=1)
+    store.get("abc", 0, load_words)
+    store.get("abc", 0, load_words)
+    reopened = SpatialIndexStore(str(tmp_path))
+    assert reopened.get("abc", 0, load_words).text_in((60, 50, 150, 75)) == "Hello world\n"
+    assert len(loads) == 1
+    assert store.get_metrics()["memory_hits"] == 1
+    assert reopened.get_metrics()["disk_hits"] == 1
+
+def test_store_evicts_least_recently_used_files(tmp_path):
+    """测试磁盘层超出总大小时删除最久未使用的索引文件，重新打开时按修改时间恢复"""
+    size = len(PageIndex(WORDS).to_json().encode("utf-8"))
+    budget = size * 5 // 2
+    store = SpatialIndexStore(str(tmp_path), memory_pages=0, disk_bytes=budget)
+    store.get("aaa", 0, lambda: WORDS)
+    store.get("bbb", 0, lambda: WORDS)
+    store.get("aaa", 0, lambda: WORDS)
+    store.get("ccc", 0, lambda: WORDS)
+    # 淘汰最后一页后文档目录一并删除
+    assert not (tmp_path / "bb").exists()
+    assert store._path("aaa", 0).exists() and store._path("ccc", 0).exists()
+    metrics = store.get_metrics()
+    assert metrics["evictions"] == 1
+    assert metrics["disk_bytes"] == size * 2
+
+    reopened = SpatialIndexStore(str(tmp_path), memory_pages=0, disk_bytes=budget)
+    assert reopened.get_metrics()["disk_bytes"] == size * 2
+
+def test_processor_bbox_text_matches_mupdf(tmp_path):
+    """测试通过索引提取的区域文本与MuPDF裁剪提取的单词一致"""
+    path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Spatial index lookup")
+    page.insert_text((72, 300), "Outside the selection")
+    doc.save(str(path))
+    doc.close()
+
+    with patch("app.core.pdf_processor.spatial_index_store", SpatialIndexStore(str(tmp_path / "spatial"))), \
+            patch("app.core.pdf_processor.render_cache", RenderCache(str(tmp_path / "render"))):
+        with PDFProcessor(str(path)) as processor:
+            bbox = (50, 50, 400, 100)
+            indexed = processor.extract_text_from_bbox(0, bbox)
+            assert indexed.split() == processor.doc[0].get_text("text", clip=bbox).split()
+            assert processor.hit_test(0, 80, 68)["line"] == "Spatial index lookup"
@@ -0,0 +1,57 @@
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+from app.core.translation_processor import TranslationProcessor
+from app.core.rate_limiter import RateLimiterRegistry
+
+def sse_body(deltas):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}" for delta in deltas]
+    return ("\n\n".join(lines + ["data: [DONE]"]) + "\n\n").encode()
+
+@pytest.mark.asyncio
+async def test_stream_translation_yields_deltas():
+    """测试OpenAI流式接口的增量译文逐段产出"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=sse_body(["你", "好"]), headers={"Content-Type": "text/event-stream"})
+
+    client = httpx.AsyncClient(base_url="https://api.openai.com", transport=httpx.MockTransport(handler))
+    processor = TranslationProcessor()
+    with patch("app.core.translation_processor.http_client_pool.get_client", return_value=client), \
+         patch("app.core.translation_processor.rate_limiter", RateLimiterRegistry()), \
+         patch("app.core.translation_processor.settings.TRANSLATION_CACHE_ENABLED", False):
+        deltas = [delta async for delta in processor.stream_translation("Hello", "openai", "zh-CN", {"openai": "key"})]
+    assert deltas == ["你", "好"]
+
+@pytest.mark.asyncio
+async def test_stream_translation_requires_api_key():
+    """测试缺少API密钥时报错"""
+    processor = TranslationProcessor()
+    with pytest.raises(ValueError):
+        async for _ in processor.stream_translation("Hello", "openai", "zh-CN", {}):
+            pass
+
+@pytest.mark.asyncio
+async def test_stream_failure_recorded_and_routed():
+    """测试流式请求失败时计入断路器和提供商统计，尚未产出译文时改为路由翻译"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, json={"error": {"message": "overloaded"}})
+
+    client = httpx.AsyncClient(base_url="https://api.openai.com", transport=httpx.MockTransport(handler))
+    processor = TranslationProcessor()
+
+    async def fake_translate(text, *args, **kwargs):
+        return "路由译文", False
+
+    with patch("app.core.translation_processor.http_client_pool.get_client", return_value=client), \
+         patch("app.core.translation_processor.rate_limiter", RateLimiterRegistry()), \
+         patch("app.core.translation_processor.circuit_breaker") as breaker, \
+         patch("app.core.translation_processor.provider_stats") as stats, \
+         patch("app.core.translation_processor.settings.TRANSLATION_CACHE_ENABLED", False), \
+         patch.object(processor, "translate", fake_translate):
+        breaker.allow.return_value = True
+        deltas = [delta async for delta in processor.stream_translation("Hello", "openai", "zh-CN", {"openai": "key"})]
+    assert deltas == ["路由译文"]
+    breaker.record_failure.assert_called_once_with("openai")
+    assert stats.record.call_args.kwargs["failed"] is True
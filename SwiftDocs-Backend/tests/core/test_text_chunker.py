@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.core.text_chunker import split_text, join_chunks, split_sentences
+from app.core.translation_batcher import estimate_tokens
+from app.core.translation_processor import TranslationProcessor
+
+SAMPLE_TEXT = (
+    "First paragraph. It has two sentences.\n\n"
+    "Second paragraph is here! Is it long? Yes, 3.14 is a number.\n\n\n"
+    "第三段。这是中文句子！还有一句。\n"
+)
+
+def test_split_sentences_keeps_decimals():
+    """测试句子拆分不会拆开小数"""
+    sentences = [s for s, _ in split_sentences("Pi is 3.14 exactly. Next one!")]
+    assert sentences == ["Pi is 3.14 exactly.", "Next one!"]
+
+@pytest.mark.parametrize("max_tokens", [4, 10, 30, 1000])
+def test_split_text_round_trip(max_tokens):
+    """测试拆分后按分隔符拼接可还原原文，且每块不超出预算"""
+    chunks = split_text(SAMPLE_TEXT, max_tokens)
+    assert join_chunks([chunk.text for chunk in chunks], chunks) == SAMPLE_TEXT
+    assert all(estimate_tokens(chunk.text) <= max_tokens for chunk in chunks)
+
+def test_split_text_prefers_paragraph_boundary():
+    """测试优先在段落边界处断开"""
+    chunks = split_text("aaaa aaaa\n\nbbbb bbbb", 5)
+    assert [chunk.text for chunk in chunks] == ["aaaa aaaa", "bbbb bbbb"]
+    assert chunks[0].separator == "\n\n"
+
+@pytest.mark.asyncio
+async def test_translate_chunked_keeps_order():
+    """测试并发翻译的分块按原顺序拼接，并保存部分结果"""
+    processor = TranslationProcessor()
+    translate = AsyncMock(side_effect=lambda text, *args, **kwargs: (text.upper(), False))
+    with patch.object(processor, "translate", translate), \
+         patch("app.core.translation_processor.task_manager") as mock_task_manager, \
+         patch("app.core.translation_processor.settings.TRANSLATION_CHUNK_MAX_TOKENS", 10):
+        result = await processor._translate_chunked("task", SAMPLE_TEXT, "openai", "zh-CN", {"openai": "key"})
+    assert result == SAMPLE_TEXT.upper()
+    last_update = mock_task_manager.update_task.call_args.kwargs
+    assert last_update["result"]["completed_chunks"] == last_update["result"]["total_chunks"]
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.core.config import settings
+from app.core.translation_processor import TranslationProcessor
+
+async def produce(segments, delay=0.0):
+    for segment in segments:
+        if delay:
+            await asyncio.sleep(delay)
+        yield segment
+
+@pytest.mark.asyncio
+async def test_stream_yields_translations_tagged_with_id():
+    """测试按批翻译并以片段ID标记译文，慢批次不阻塞后续批次的产出"""
+    processor = TranslationProcessor()
+    calls = []
+
+    async def fake_translate_segments(segments, *args, **kwargs):
+        calls.append(list(segments))
+        if "slow" in segments:
+            await asyncio.sleep(0.2)
+        return [f"译:{segment}" for segment in segments]
+
+    segments = [{"id": "a", "text": "slow"}, {"id": "b", "text": "fast"}]
+    with patch.object(processor, "translate_segments", fake_translate_segments), \
+            patch.object(settings, "TRANSLATION_BATCH_MAX_SEGMENTS", 1):
+        results = [item async for item in processor.translate_stream(produce(segments), "openai", "zh-CN", {"openai": "key"})]
+    assert calls == [["slow"], ["fast"]]
+    assert results == [{"id": "b", "translated_text": "译:fast"}, {"id": "a", "translated_text": "译:slow"}]
+
+@pytest.mark.asyncio
+async def test_stream_flushes_partial_batch_after_interval():
+    """测试输入暂停时按刷新间隔发出未满的批次"""
+    processor = TranslationProcessor()
+    calls = []
+
+    async def fake_translate_segments(segments, *args, **kwargs):
+        calls.append(list(segments))
+        return list(segments)
+
+    segments = [{"id": index, "text": f"text {index}"} for index in range(3)]
+    with patch.object(processor, "translate_segments", fake_translate_segments), \
+            patch.object(settings, "TRANSLATION_STREAM_FLUSH_INTERVAL", 0.01):
+        results = [item async for item in processor.translate_stream(produce(segments, 0.05), "openai", "zh-CN", {"openai": "key"})]
+    assert calls == [["text 0"], ["text 1"], ["text 2"]]
+    assert [item["id"] for item in results] == [0, 1, 2]
+
+@pytest.mark.asyncio
+async def test_stream_reports_batch_errors_per_segment():
+    """测试批次失败时为其中每个片段产出错误，不中断整个流"""
+    processor = TranslationProcessor()
+
+    async def fake_translate_segments(segments, *args, **kwargs):
+        if "bad" in segments:
+            raise RuntimeError("provider down")
+        return list(segments)
+
+    segments = [{"id": 1, "text": "bad"}, {"id": 2, "text": "good"}]
+    with patch.object(processor, "translate_segments", fake_translate_segments), \
+            patch.object(settings, "TRANSLATION_BATCH_MAX_SEGMENTS", 1):
+        results = [item async for item in processor.translate_stream(produce(segments), "openai", "zh-CN", {"openai": "key"})]
+    assert {"id": 1, "error": "provider down"} in results
+    assert {"id": 2, "translated_text": "good"} in results
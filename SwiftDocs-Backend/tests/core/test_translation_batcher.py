@@ -0,0 +1,39 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.core.translation_batcher import (
+    BatchSplitError,
+    pack_batches,
+    split_llm_batch_response
+)
+from app.core.translation_processor import TranslationProcessor
+
+def test_pack_batches_respects_budget():
+    """测试按字符预算和条数打包"""
+    texts = ["a" * 10, "b" * 10, "c" * 10, "d" * 25]
+    assert pack_batches(texts, max_chars=25) == [[0, 1], [2], [3]]
+    assert pack_batches(texts, max_chars=1000, max_segments=3) == [[0, 1, 2], [3]]
+
+def test_split_llm_batch_response():
+    """测试解析大模型返回的JSON数组"""
+    assert split_llm_batch_response('```json\n["你好", "世界"]\n```', 2) == ["你好", "世界"]
+    with pytest.raises(BatchSplitError):
+        split_llm_batch_response('["你好"]', 2)
+    with pytest.raises(BatchSplitError):
+        split_llm_batch_response("你好，世界", 2)
+
+@pytest.mark.asyncio
+async def test_translate_segments_batches_and_dedupes():
+    """测试片段批量翻译时合并请求并去重"""
+    processor = TranslationProcessor()
+    call_batch = AsyncMock(side_effect=lambda provider, texts, *args: [f"T({t})" for t in texts])
+    with patch.object(processor, "_call_provider_batch", call_batch), \
+         patch("app.core.translation_processor.settings.TRANSLATION_CACHE_ENABLED", False):
+        result = await processor.translate_segments(
+            ["Header", "Body", "", "Header"],
+            "google",
+            "zh-CN",
+            {"google": "test-key"}
+        )
+    assert result == ["T(Header)", "T(Body)", "", "T(Header)"]
+    call_batch.assert_awaited_once()
+    assert call_batch.await_args.args[1] == ["Header", "Body"]
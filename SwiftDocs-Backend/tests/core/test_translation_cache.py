@@ -0,0 +1,79 @@
+import redis
+import threading
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.core.translation_cache import TranslationCache
+from app.core.translation_processor import TranslationProcessor
+
+@pytest.fixture
+def cache():
+    # 使用不可达的Redis，验证共享层故障时仍可使用进程内缓存
+    unreachable = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1)
+    return TranslationCache(redis_client=unreachable, local_size=2, ttl=60, max_entries=10)
+
+def test_key_normalizes_whitespace(cache):
+    """测试缓存键对空白和Unicode形式不敏感"""
+    key1 = cache.make_key("Hello   world\n", "auto", "zh-CN", "openai", "gpt-3.5-turbo")
+    key2 = cache.make_key(" Hello world", "auto", "zh-CN", "openai", "gpt-3.5-turbo")
+    key3 = cache.make_key("Hello world", "auto", "ja-JP", "openai", "gpt-3.5-turbo")
+    assert key1 == key2
+    assert key1 != key3
+
+def test_local_lru_eviction(cache):
+    """测试进程内LRU淘汰"""
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+def test_local_ttl_expiry(cache):
+    """测试缓存过期"""
+    cache.ttl = -1
+    cache.set("a", "A")
+    assert cache.get("a") is None
+
+@pytest.mark.asyncio
+async def test_cache_and_memory_io_runs_off_event_loop():
+    """测试翻译时缓存和模糊记忆的Redis读写在线程中执行"""
+    processor = TranslationProcessor()
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def record(result):
+        return lambda *args, **kwargs: threads.append(threading.get_ident()) or result
+
+    cache = MagicMock()
+    cache.get.side_effect = record(None)
+    cache.set_many.side_effect = record(None)
+    memory = MagicMock()
+    memory.lookup.side_effect = record([])
+    memory.add.side_effect = record(None)
+    memory.reuse.return_value = None
+    with patch("app.core.translation_processor.translation_cache", cache), \
+            patch("app.core.translation_processor.fuzzy_memory", memory), \
+            patch("app.core.translation_processor.settings.SINGLE_FLIGHT_ENABLED", False), \
+            patch.object(processor, "_call_routed", AsyncMock(return_value=("译文", "openai"))):
+        assert await processor._translate_text("Hello", "openai", "zh-CN", {"openai": "key"}) == ("译文", False)
+    assert len(threads) == 4 and loop_thread not in threads
+
+@pytest.mark.asyncio
+async def test_failover_result_cached_under_requested_and_served_keys(cache):
+    """测试故障转移后译文同时写入请求的和实际提供服务的提供商的键，等待合并结果的请求能读到"""
+    processor = TranslationProcessor()
+    cache.local_size = 10
+    with patch("app.core.translation_processor.translation_cache", cache), \
+            patch("app.core.translation_processor.fuzzy_memory") as memory, \
+            patch("app.core.translation_processor.settings.SINGLE_FLIGHT_ENABLED", False):
+        memory.lookup.return_value = []
+        memory.lookup_many.return_value = [[]]
+        memory.reuse.return_value = None
+        with patch.object(processor, "_call_routed", AsyncMock(return_value=("译文", "deepseek"))):
+            await processor._translate_text("Hello", "openai", "zh-CN", {"openai": "key"})
+        with patch.object(processor, "_call_routed", AsyncMock(return_value=(["批量译文"], "deepseek"))):
+            await processor._translate_segments(["World"], "openai", "zh-CN", {"openai": "key"})
+    for text, expected in [("Hello", "译文"), ("World", "批量译文")]:
+        for provider, model in [("openai", "gpt-3.5-turbo"), ("deepseek", "deepseek-chat")]:
+            assert cache.get(cache.make_key(text, "auto", "zh-CN", provider, model)) == expected
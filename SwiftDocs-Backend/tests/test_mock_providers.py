@@ -0,0 +1,40 @@
+import random
+import httpx
+import pytest
+from unittest.mock import patch
+from app.mock_providers import create_app, MockProviderConfig, parse_latency
+from app.core.translation_processor import TranslationProcessor
+from app.core.exceptions import ProviderError
+
+def mock_client(app):
+    return httpx.AsyncClient(base_url="http://mock", transport=httpx.ASGITransport(app=app))
+
+def test_parse_latency_is_reproducible():
+    """测试延迟分布按相同种子采样结果相同，且不为负"""
+    sampler = parse_latency("lognormal:0.2,0.5")
+    assert sampler(random.Random(1)) == sampler(random.Random(1))
+    assert parse_latency("normal:0,1")(random.Random(3)) >= 0.0
+    with pytest.raises(ValueError):
+        parse_latency("uniform:0.1")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider", ["openai", "google", "baidu"])
+async def test_processor_translates_against_mock(provider):
+    """测试翻译处理器可以直接调用模拟服务，批量译文按顺序确定性返回"""
+    processor = TranslationProcessor()
+    api_keys = {"openai": "key", "google": "key", "baidu_app_id": "id", "baidu_app_key": "secret"}
+    with patch("app.core.translation_processor.http_client_pool.get_client", return_value=mock_client(create_app())):
+        results = await processor._call_provider_batch(provider, ["Hello", "Page 2"], "zh-CN", api_keys)
+    assert results == ["[zh-CN] Hello", "[zh-CN] Page 2"]
+
+@pytest.mark.asyncio
+async def test_mock_injects_rate_limits():
+    """测试注入的429带有Retry-After，并计入统计"""
+    app = create_app(MockProviderConfig(rate_limit_rate=1.0, retry_after=2.0))
+    processor = TranslationProcessor()
+    with patch("app.core.translation_processor.http_client_pool.get_client", return_value=mock_client(app)):
+        with pytest.raises(ProviderError) as error:
+            await processor._translate_with_openai("Hello", "zh-CN", "key")
+    assert error.value.upstream_status == 429
+    assert error.value.retry_after == 2.0
+    assert app.state.mock.stats["chat_rate_limited"] == 1
@@ -0,0 +1,136 @@
+import json
+import fitz
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+
+@pytest.fixture
+def client(tmp_path):
+    """上传目录指向临时目录，其中包含一个三页的PDF"""
+    doc = fitz.open()
+    for number in range(3):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number + 1}")
+    doc.save(str(tmp_path / "doc.pdf"))
+    doc.close()
+    with patch("app.routers.pdf.file_manager.upload_dir", tmp_path):
+        yield TestClient(app)
+
+def test_stream_pages_returns_one_record_per_page(client):
+    """测试逐页流式接口每页返回一行JSON，按页码顺序"""
+    with client.stream("GET", "/api/v1/pdf/doc/pages", params={"image": "true"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.iter_lines() if line]
+    assert [record["page"] for record in records] == [0, 1, 2]
+    assert [record["text"].strip() for record in records] == ["Page 1", "Page 2", "Page 3"]
+    assert all(record["layout"] for record in records)
+    assert records[1]["image"].endswith("/api/v1/pdf/doc/pages/1/image")
+
+def test_stream_pages_unknown_file(client):
+    """测试文件不存在时返回404"""
+    assert client.get("/api/v1/pdf/missing/pages").status_code == 404
+
+@pytest.mark.parametrize("accept,media_type", [
+    ("image/webp,image/*;q=0.8", "image/webp"),
+    ("image/jpeg;q=0.9,image/png;q=0.5", "image/jpeg"),
+    ("*/*", "image/png"),
+    (None, "image/png")
+])
+def test_page_image_negotiates_accept(client, accept, media_type):
+    """测试页面图像按Accept请求头协商格式，响应声明随Accept变化"""
+    headers = {"Accept": accept} if accept else {}
+    response = client.get("/api/v1/pdf/doc/pages/0/image", params={"zoom": 1}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+    assert "Accept" in response.headers["vary"].split(", ")
+
+def test_region_image_format_query_overrides_accept(client):
+    """测试format参数优先于Accept请求头，非法区域和格式返回400"""
+    response = client.get(
+        "/api/v1/pdf/doc/pages/0/region",
+        params={"x0": 0, "y0": 0, "x1": 200, "y1": 100, "format": "jpeg"},
+        headers={"Accept": "image/webp"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.content[:2] == b"\xff\xd8"
+    params = {"x0": 200, "y0": 0, "x1": 100, "y1": 100}
+    assert client.get("/api/v1/pdf/doc/pages/0/region", params=params).status_code == 400
+    params = {"x0": 0, "y0": 0, "x1": 100, "y1": 100, "format": "gif"}
+    assert client.get("/api/v1/pdf/doc/pages/0/region", params=params).status_code == 400
+    assert client.get("/api/v1/pdf/doc/pages/9/image").status_code == 404
+
+def test_page_tiles(client):
+    """测试瓦片金字塔信息与按需渲染的瓦片尺寸，越界瓦片返回404"""
+    response = client.get("/api/v1/pdf/doc/pages/0/tiles")
+    assert response.status_code == 200
+    levels = response.json()["levels"]
+    assert [level["zoom"] for level in levels] == [2.0 ** index for index in range(len(levels))]
+    grid = levels[1]
+    last_x, last_y = grid["columns"] - 1, grid["rows"] - 1
+
+    response = client.get("/api/v1/pdf/doc/pages/0/tiles/1/0/0", headers={"Accept": "image/webp"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    response = client.get(f"/api/v1/pdf/doc/pages/0/tiles/1/{last_x}/{last_y}", params={"format": "png"})
+    pix = fitz.Pixmap(response.content)
+    assert pix.width == grid["width"] - last_x * grid["tile_size"]
+    assert pix.height == grid["height"] - last_y * grid["tile_size"]
+
+    assert client.get(f"/api/v1/pdf/doc/pages/0/tiles/1/{last_x + 1}/0").status_code == 404
+    assert client.get("/api/v1/pdf/doc/pages/9/tiles").status_code == 404
+
+def test_region_text_and_hit_test(client):
+    """测试区域取词和点击测试接口由空间索引返回结果，越界页码返回404"""
+    response = client.get("/api/v1/pdf/doc/pages/1/text", params={"x0": 50, "y0": 50, "x1": 300, "y1": 100})
+    assert response.status_code == 200
+    assert response.json()["text"].split() == ["Page", "2"]
+
+    response = client.get("/api/v1/pdf/doc/pages/1/hit", params={"x": 80, "y": 68})
+    assert response.status_code == 200
+    assert response.json()["hit"]["word"] == "Page"
+    assert response.json()["hit"]["line"] == "Page 2"
+    assert client.get("/api/v1/pdf/doc/pages/1/hit", params={"x": 500, "y": 700}).json()["hit"] is None
+
+    assert client.get("/api/v1/pdf/doc/pages/9/text", params={"x0": 0, "y0": 0, "x1": 1, "y1": 1}).status_code == 404
+    assert client.get("/api/v1/pdf/doc/pages/9/hit", params={"x": 0, "y": 0}).status_code == 404
+
+def test_process_accepts_only_uploaded_file_ids(client, tmp_path):
+    """测试处理接口只接受上传目录中的文件ID，不接受客户端路径"""
+    with patch("app.routers.pdf.process_pdf") as process_pdf, patch("app.routers.pdf.task_manager"):
+        for file_id in ["../doc", "missing"]:
+            assert client.post("/api/v1/pdf/process", json={"file_id": file_id, "mode": "text"}).status_code == 404
+        assert client.post("/api/v1/pdf/process", json={"file_path": "/etc/passwd", "mode": "text"}).status_code == 422
+        process_pdf.delay.assert_not_called()
+        assert client.post("/api/v1/pdf/process", json={"file_id": "doc", "mode": "text"}).status_code == 200
+    # 提交到Celery，不在API进程中处理
+    process_pdf.assert_not_called()
+    assert process_pdf.delay.call_args.kwargs["file_path"] == str(tmp_path / "doc.pdf")
+
+def test_cancel_deletes_only_resolved_uploads(client, tmp_path):
+    """测试取消任务时只删除由文件ID解析出的上传文件"""
+    outside = tmp_path.parent / "outside.pdf"
+    outside.write_bytes(b"%PDF")
+    task = {"id": "t1", "status": "pending", "created_at": "", "updated_at": ""}
+    with patch("app.routers.pdf.task_manager") as manager:
+        manager.get_task.return_value = {**task, "file_id": "../outside", "file_path": str(outside)}
+        assert client.delete("/api/v1/pdf/task/t1").status_code == 200
+        assert outside.exists()
+        manager.get_task.return_value = {**task, "file_id": "doc"}
+        assert client.delete("/api/v1/pdf/task/t1").status_code == 200
+    assert not (tmp_path / "doc.pdf").exists()
+
+def test_upload_returns_file_id_for_page_endpoints(client, tmp_path):
+    """测试上传接口返回文件ID，可直接用于逐页流式提取"""
+    with patch("app.routers.pdf.process_pdf"), patch("app.routers.pdf.task_manager"):
+        response = client.post(
+            "/api/v1/pdf/upload",
+            files={"file": ("report.pdf", (tmp_path / "doc.pdf").read_bytes(), "application/pdf")}
+        )
+    assert response.status_code == 200
+    file_id = response.json()["fileId"]
+    with client.stream("GET", f"/api/v1/pdf/{file_id}/pages", params={"layout": "false"}) as response:
+        records = [json.loads(line) for line in response.iter_lines() if line]
+    assert [record["text"].strip() for record in records] == ["Page 1", "Page 2", "Page 3"]
@@ -0,0 +1,86 @@
+import json
+import httpx
+import redis
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.mock_providers import create_app
+from app.core.circuit_breaker import CircuitBreaker
+
+@pytest.fixture
+def client():
+    """翻译服务请求转发到模拟服务"""
+    mock = create_app()
+    with patch(
+        "app.core.translation_processor.http_client_pool.get_client",
+        side_effect=lambda provider: httpx.AsyncClient(base_url="http://mock", transport=httpx.ASGITransport(app=mock))
+    ), patch("app.core.translation_processor.settings.TRANSLATION_CACHE_ENABLED", False):
+        yield TestClient(app)
+
+REQUEST = {
+    "text": "Hello streaming world",
+    "provider": "openai",
+    "targetLanguage": "zh-CN",
+    "mode": "selection",
+    "apiKeys": {"openai": "key"}
+}
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_stream_endpoint_sends_sse_events(client):
+    """测试SSE接口逐段推送增量译文，最后推送完整译文"""
+    response = client.post("/api/v1/translate/stream", json=REQUEST)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    deltas = [data["delta"] for event, data in events if event == "delta"]
+    assert len(deltas) > 1
+    assert events[-1] == ("done", {"type": "done", "translated_text": "[zh-CN] Hello streaming world"})
+    assert "".join(deltas) == "[zh-CN] Hello streaming world"
+
+def test_websocket_streams_translation(client):
+    """测试WebSocket按请求推送增量译文，非法请求返回错误后连接保持可用"""
+    with client.websocket_connect("/api/v1/translate/ws/client-1") as websocket:
+        websocket.send_json({"targetLanguage": "zh-CN", "requestId": "bad"})
+        error = websocket.receive_json()
+        assert error["type"] == "error" and error["requestId"] == "bad"
+
+        websocket.send_json({**REQUEST, "requestId": "r1"})
+        messages = []
+        while not messages or messages[-1]["type"] == "delta":
+            messages.append(websocket.receive_json())
+    assert {message["requestId"] for message in messages} == {"r1"}
+    assert messages[-1] == {"type": "done", "translated_text": "[zh-CN] Hello streaming world", "requestId": "r1"}
+
+def test_providers_status_endpoint(client):
+    """测试断路器状态接口列出所有提供商，打开的断路器返回剩余冷却时间"""
+    breaker = CircuitBreaker(redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1))
+    with patch("app.core.circuit_breaker.settings.CIRCUIT_FAILURE_THRESHOLD", 1):
+        breaker.record_failure("deepseek")
+    with patch("app.routers.translation.circuit_breaker", breaker):
+        response = client.get("/api/v1/translate/providers/status")
+    assert response.status_code == 200
+    status = response.json()
+    assert set(status) == {"openai", "deepseek", "baidu", "google"}
+    assert status["openai"]["state"] == "closed"
+    assert status["deepseek"]["state"] == "open" and status["deepseek"]["retry_in"] > 0
+
+def test_document_translation_resolves_uploaded_file_id(client, tmp_path):
+    """测试按文档翻译只接受上传目录中的文件ID，文件不存在时返回404"""
+    (tmp_path / "doc.pdf").write_bytes(b"%PDF")
+    request = {**REQUEST, "text": "", "mode": "full"}
+    with patch("app.routers.translation.file_manager.upload_dir", tmp_path), \
+            patch("app.routers.translation.task_manager"), \
+            patch("app.routers.translation.translation_processor.process_task") as process_task:
+        for file_id in ["../doc", "missing"]:
+            response = client.post("/api/v1/translate/translate", json={**request, "file_id": file_id})
+            assert response.status_code == 404
+        process_task.assert_not_called()
+        assert client.post("/api/v1/translate/translate", json={**request, "file_id": "doc"}).status_code == 200
+    assert process_task.call_args.kwargs["file_path"] == str(tmp_path / "doc.pdf")